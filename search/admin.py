@@ -1,17 +1,105 @@
+from django.conf import settings
 from django.contrib import admin
-from .models import GitHubUser, GitHubRepository, Profession, Language, Search
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from django.utils.text import smart_split, unescape_string_literal
+
+from .models import GitHubUser, GitHubRepository, Profession, Language, Search, CrawlJob, UserLanguage, Enumeration, \
+    EnumerationPartition
+
+
+def estimated_count(queryset):
+    """The planner's row estimate for the table of ``queryset``, or None if it has never been analyzed."""
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                       [queryset.model._meta.db_table])
+        row = cursor.fetchone()
+    return row[0] if row and row[0] >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator using the planner's estimate instead of ``COUNT(*)`` for unfiltered changelists of large tables.
+
+    Filtered and searched changelists are still counted exactly, through the indexes their filters use.
+    """
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is not None and not query.where:
+            estimate = estimated_count(self.object_list)
+            if estimate is not None and estimate >= settings.ADMIN_ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+        return super().count
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    # Skips the second, unfiltered COUNT(*) of every filtered changelist
+    show_full_result_count = False
+
+
+class LanguageListFilter(admin.SimpleListFilter):
+    title = 'language'
+    parameter_name = 'language'
+
+    def lookups(self, request, model_admin):
+        return [(name, name) for name in sorted(Language.registry().names)]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            # array containment, served by the GIN index on languages
+            return queryset.filter(languages__contains=[self.value()])
+        return queryset
 
 
 @admin.register(GitHubUser)
-class GitHubUserAdmin(admin.ModelAdmin):
-    list_display = ['login', 'name']
-    search_fields = ['login', 'name', 'location', 'hireable', 'company']
+class GitHubUserAdmin(LargeTableAdmin):
+    list_display = ['login', 'name', 'location', 'hireable', 'fetched_at']
+    list_filter = ['hireable']
+    search_fields = ['login', 'name', 'location', 'company']
+    search_help_text = 'Login, name, location or company containing every word.'
 
 
 @admin.register(GitHubRepository)
-class GitHubRepositoryAdmin(admin.ModelAdmin):
-    list_display = ['owner', 'name', 'languages']
-    search_fields = ['owner', 'name', 'languages', 'created_at', 'description']
+class GitHubRepositoryAdmin(LargeTableAdmin):
+    list_display = ['owner', 'name', 'languages', 'license', 'created_at']
+    list_select_related = ['owner']
+    list_filter = [LanguageListFilter, 'license', 'owner__hireable']
+    search_fields = ['name', 'description', 'owner__login']
+    search_help_text = 'Owner login, name or description containing every word, or a language name.'
+    raw_id_fields = ['owner']
+
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Match every word against the name, description, owner login and languages.
+
+        Each field is searched in its own subquery so every one of them can use its index, which an
+        ``OR`` across the join to the owner would not.
+        """
+        registry = Language.registry()
+        for bit in smart_split(search_term):
+            if bit.startswith(('"', "'")) and bit[0] == bit[-1]:
+                bit = unescape_string_literal(bit)
+            repositories = GitHubRepository.objects.values('pk')
+            matches = repositories.filter(name__icontains=bit).union(
+                repositories.filter(description__icontains=bit),
+                repositories.filter(owner__login__icontains=bit),
+            )
+            language = registry.canonical_name(bit)
+            if language is not None:
+                matches = matches.union(repositories.filter(languages__contains=[language]))
+            queryset = queryset.filter(pk__in=matches)
+        return queryset, False
+
+
+@admin.register(UserLanguage)
+class UserLanguageAdmin(admin.ModelAdmin):
+    list_display = ['user', 'language', 'bytes', 'rank']
+    list_select_related = ['user', 'language']
+    search_fields = ['user__login', 'language__name']
 
 
 @admin.register(Profession)
@@ -28,5 +116,30 @@ class LanguageAdmin(admin.ModelAdmin):
 
 @admin.register(Search)
 class SearchAdmin(admin.ModelAdmin):
-    list_display = ['query', 'by']
-    search_fields = ['query', 'by']
+    list_display = ['query', 'by', 'page', 'result_count', 'page_count', 'latency', 'created_at']
+    list_filter = ['by']
+    search_fields = ['query']
+    date_hierarchy = 'created_at'
+
+
+@admin.register(CrawlJob)
+class CrawlJobAdmin(admin.ModelAdmin):
+    list_display = ['kind', 'target', 'status', 'attempts', 'created_at', 'finished_at']
+    list_filter = ['kind', 'status']
+    search_fields = ['target']
+
+
+@admin.register(Enumeration)
+class EnumerationAdmin(admin.ModelAdmin):
+    list_display = ['by', 'query', 'status', 'created_at', 'finished_at']
+    list_filter = ['by', 'status']
+    search_fields = ['query']
+    exclude = ['users']
+
+
+@admin.register(EnumerationPartition)
+class EnumerationPartitionAdmin(admin.ModelAdmin):
+    list_display = ['enumeration', 'ranges', 'total_count', 'next_page', 'status', 'truncated']
+    list_select_related = ['enumeration']
+    list_filter = ['status', 'truncated']
+    raw_id_fields = ['enumeration', 'parent']
@@ -0,0 +1,79 @@
+import asyncio
+import math
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .crawl import crawl_search_page, save_crawled_user
+from .models import CandidateFeatures, Enumeration, GitHubUser, GitHubRepository, Search
+from .utils.async_client import AsyncGitHubClient
+from .utils.graphql import GraphQLClient
+from .utils.pagination import MAX_SEARCH_RESULTS, PER_PAGE
+from .utils.results_cache import get_results_cache
+
+
+async def afetch_user(client: AsyncGitHubClient, login, known=None):
+    if settings.GITHUB_BACKEND == 'graphql':
+        return await sync_to_async(GraphQLClient().fetch_user, thread_sensitive=False)(login)
+    github_user = await client.get_user(login)
+    return github_user, await client.get_repositories(github_user, known=known)
+
+
+async def acrawl_user(login) -> GitHubUser:
+    """
+    :func:`search.crawl.crawl_user` with the profile, repository pages and languages fetched concurrently.
+
+    Saving stays a single transaction, which the async ORM cannot open, so it runs in a worker thread.
+    """
+    known = await sync_to_async(GitHubRepository.crawl_state)(login)
+    github_user, github_repos = await afetch_user(AsyncGitHubClient(), login, known=known)
+    return await sync_to_async(save_crawled_user)(github_user, github_repos)
+
+
+async def aresolve_users(logins, client: AsyncGitHubClient = None) -> list:
+    """:func:`search.crawl.resolve_users` with the missing profiles fetched concurrently."""
+    logins = list(dict.fromkeys(logins))
+    users = await GitHubUser.objects.ain_bulk(logins, field_name='login')
+    missing = [login for login in logins if login not in users or users[login].is_placeholder]
+    if missing:
+        client = client or AsyncGitHubClient()
+        await GitHubUser.asave_named_users(await asyncio.gather(*[client.get_user(login) for login in missing]))
+        resolved = await GitHubUser.objects.ain_bulk(missing, field_name='login')
+        await sync_to_async(CandidateFeatures.update_for_users)(
+            resolved[login] for login in missing if login in users and login in resolved
+        )
+        users.update(resolved)
+    return [users[login] for login in logins if login in users]
+
+
+async def acrawl_search_page(by, query, page):
+    """
+    :func:`search.crawl.crawl_search_page` for the user searches.
+
+    Profession searches rank their candidates from the database, and searches with a finished enumeration
+    are served from it; both run synchronously in a worker thread.
+    """
+    client = AsyncGitHubClient()
+    search = Search(query=query, by=by).use_client(client)
+    paginated_list, return_type = await sync_to_async(search.search)(query, by)
+    enumeration = await sync_to_async(Enumeration.latest_finished)(by, search.slug)
+    if return_type == GitHubRepository or enumeration is not None:
+        return await sync_to_async(crawl_search_page)(by, query, page)
+    max_page_count = math.ceil(MAX_SEARCH_RESULTS / PER_PAGE)
+    results_page = await paginated_list.get_page(min(page, max_page_count) - 1)
+    page_count = paginated_list.page_count
+    if page > page_count:
+        return [], page_count
+    return await aresolve_users([user.login for user in results_page], client), page_count
+
+
+async def asearch_page(by, query, page):
+    """:func:`search.crawl.search_page` for the async views."""
+    async def fetch():
+        users, page_count = await acrawl_search_page(by, query, page)
+        return {'page_count': page_count, 'logins': [user.login for user in users]}
+
+    results_cache = get_results_cache()
+    result = await results_cache.aget_or_fetch(results_cache.key(by, query, page), fetch)
+    users = await GitHubUser.objects.ain_bulk(result['logins'], field_name='login')
+    return [users[login] for login in result['logins'] if login in users], result['page_count']
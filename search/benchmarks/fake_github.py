@@ -0,0 +1,207 @@
+import copy
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+from search.utils.graphql import USER_QUERY
+
+
+FIXTURES = Path(__file__).parent / 'fixtures' / 'github.json'
+# Logins like ``bench-100`` own that many repositories.
+REPOSITORY_COUNT = re.compile(r'-(\d+)$')
+DEFAULT_REPOSITORY_COUNT = 8
+
+
+def load_fixtures(path=FIXTURES) -> dict:
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def record_fixtures(token=None, login='octocat', path=FIXTURES):
+    """Replace the fixtures with live responses for ``login`` and their first repository."""
+    session = requests.Session()
+    session.headers['Accept'] = 'application/vnd.github+json'
+    if token:
+        session.headers['Authorization'] = f'token {token}'
+
+    def get(url, **params):
+        response = session.get(f'https://api.github.com{url}', params=params, timeout=15)
+        response.raise_for_status()
+        return response.json()
+
+    fixtures = load_fixtures(path)
+    fixtures['user'] = get(f'/users/{login}')
+    fixtures['repository'] = get(f'/users/{login}/repos', per_page=1)[0]
+    fixtures['languages'] = get(f'/repos/{fixtures["repository"]["full_name"]}/languages')
+    if token:
+        # the GraphQL API takes no anonymous requests
+        variables = {'login': login, 'after': None, 'pageSize': 1, 'languageCount': 20}
+        response = session.post('https://api.github.com/graphql', json={'query': USER_QUERY, 'variables': variables},
+                                timeout=15)
+        response.raise_for_status()
+        fixtures['graphql_user'] = response.json()
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(fixtures, file, indent=2)
+        file.write('\n')
+    return fixtures
+
+
+class FakeGitHub:
+    """
+    Local stand-in for the GitHub REST API replaying recorded responses.
+
+    The recorded user, repository and languages are used as templates: ``/users/bench-100`` is a
+    user with 100 repositories, searches return ``search_users_total`` / ``search_repositories_total``
+    results made from the templates. ``POST /graphql`` answers the user query of
+    :mod:`search.utils.graphql` the same way from ``graphql_user``. Every response is delayed by
+    ``latency`` seconds and the requests are counted. While ``failure`` is set to a status and a
+    raw body, every request is answered with them, e.g. ``(502, b'<html>Bad Gateway</html>')``.
+    """
+
+    def __init__(self, fixtures=None, latency=0.05):
+        self.fixtures = fixtures or load_fixtures()
+        self.latency = latency
+        self.requests = 0
+        self.failure = None
+        self._lock = threading.Lock()
+        self._server = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f'http://{host}:{port}'
+
+    def start(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                fake.handle(self)
+
+            def do_POST(self):
+                fake.handle(self)
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.failure = None
+
+    def user(self, login):
+        user = copy.deepcopy(self.fixtures['user'])
+        match = REPOSITORY_COUNT.search(login)
+        user.update({
+            'login': login,
+            'url': f'{self.url}/users/{login}',
+            'html_url': f'https://github.com/{login}',
+            'repos_url': f'{self.url}/users/{login}/repos',
+            'public_repos': int(match.group(1)) if match else DEFAULT_REPOSITORY_COUNT,
+        })
+        return user
+
+    def repository(self, login, number):
+        repository = copy.deepcopy(self.fixtures['repository'])
+        name = f'{repository["name"]}-{number}'
+        repository.update({
+            'id': number,
+            'name': name,
+            'full_name': f'{login}/{name}',
+            'owner': {**repository['owner'], 'login': login, 'url': f'{self.url}/users/{login}'},
+            'url': f'{self.url}/repos/{login}/{name}',
+            'html_url': f'https://github.com/{login}/{name}',
+            'languages_url': f'{self.url}/repos/{login}/{name}/languages',
+            'forks_count': number,
+        })
+        return repository
+
+    @staticmethod
+    def page(params, total):
+        per_page = int(params.get('per_page', ['30'])[0])
+        page = int(params.get('page', ['1'])[0])
+        start = (page - 1) * per_page
+        return range(start, min(start + per_page, total))
+
+    def graphql_user(self, variables):
+        """Answer the user query with ``pageSize`` repositories after the ``after`` cursor, which is an offset."""
+        login = variables['login']
+        if login.startswith('ghost'):
+            message = f"Could not resolve to a User with the login of '{login}'."
+            return {'data': {'user': None}, 'errors': [{'type': 'NOT_FOUND', 'path': ['user'], 'message': message}]}
+        data = copy.deepcopy(self.fixtures['graphql_user'])
+        user = data['data']['user']
+        template = user['repositories']['nodes'][0]
+        match = REPOSITORY_COUNT.search(login)
+        total = int(match.group(1)) if match else DEFAULT_REPOSITORY_COUNT
+        start = int(variables.get('after') or 0)
+        numbers = range(start, min(start + variables['pageSize'], total))
+        user.update({'login': login, 'url': f'https://github.com/{login}'})
+        user['repositories'] = {
+            'totalCount': total,
+            'pageInfo': {'hasNextPage': numbers.stop < total, 'endCursor': str(numbers.stop)},
+            'nodes': [{**template, 'name': f'{template["name"]}-{number}', 'forkCount': number,
+                       'url': f'https://github.com/{login}/{template["name"]}-{number}'} for number in numbers],
+        }
+        return data
+
+    def respond(self, path, params, body=None):
+        if path == '/graphql':
+            return self.graphql_user(json.loads(body)['variables'])
+        match = re.fullmatch(r'/users/([^/]+)', path)
+        if match:
+            return self.user(match.group(1))
+        match = re.fullmatch(r'/users/([^/]+)/repos', path)
+        if match:
+            login = match.group(1)
+            total = self.user(login)['public_repos']
+            return [self.repository(login, number) for number in self.page(params, total)]
+        if re.fullmatch(r'/repos/[^/]+/[^/]+/languages', path):
+            return self.fixtures['languages']
+        if path == '/search/users':
+            total = self.fixtures['search_users_total']
+            items = [self.user(f'bench-user-{number}') for number in self.page(params, total)]
+            return {'total_count': total, 'incomplete_results': False, 'items': items}
+        if path == '/search/repositories':
+            total = self.fixtures['search_repositories_total']
+            items = [self.repository(f'bench-owner-{number % 50}', number) for number in self.page(params, total)]
+            return {'total_count': total, 'incomplete_results': False, 'items': items}
+        return None
+
+    def handle(self, handler):
+        with self._lock:
+            self.requests += 1
+        time.sleep(self.latency)
+        url = urlparse(handler.path)
+        request_body = handler.rfile.read(int(handler.headers.get('Content-Length') or 0))
+        if self.failure is not None:
+            status, data = self.failure
+            content_type = 'text/html'
+        else:
+            body = self.respond(url.path, parse_qs(url.query), request_body)
+            status = 200 if body is not None else 404
+            data = json.dumps(body if body is not None else {'message': 'Not Found'}).encode('utf-8')
+            content_type = 'application/json; charset=utf-8'
+        handler.send_response(status)
+        handler.send_header('Content-Type', content_type)
+        handler.send_header('Content-Length', str(len(data)))
+        handler.send_header('X-RateLimit-Limit', '1000000')
+        handler.send_header('X-RateLimit-Remaining', '1000000')
+        handler.send_header('X-RateLimit-Reset', str(int(time.time()) + 3600))
+        handler.end_headers()
+        handler.wfile.write(data)
@@ -0,0 +1,183 @@
+import logging
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+
+from .models import CandidateFeatures, Enumeration, GitHubUser, GitHubRepository, Profession, Search, UserLanguage
+from .utils.clients import get_client
+from .utils.fetch import fetch_all, fetch_repositories
+from .utils.graphql import GraphQLClient
+from .utils.pagination import PER_PAGE, QuerySetPaginatedList, count_pages
+from .utils.results_cache import get_results_cache
+
+
+logger = logging.getLogger(__name__)
+
+_refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='refresh')
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+
+
+def fetch_user(login, known=None):
+    if settings.GITHUB_BACKEND == 'graphql':
+        return GraphQLClient().fetch_user(login)
+    github_user = get_client().get_user(login)
+    return github_user, fetch_repositories(github_user, known=known)
+
+
+def crawl_user(login) -> GitHubUser:
+    """
+    Fetch and save a user with their repositories.
+
+    Only repositories that are new or changed since the last crawl have their languages fetched,
+    repositories that are gone are deleted, and the language totals are updated by the difference.
+    """
+    github_user, github_repos = fetch_user(login, known=GitHubRepository.crawl_state(login))
+    return save_crawled_user(github_user, github_repos)
+
+
+def save_crawled_user(github_user, github_repos) -> GitHubUser:
+    current = {repo.name: repo_languages for repo, repo_languages in github_repos}
+    with transaction.atomic():
+        previous = {
+            name: language_bytes
+            for name, (_, _, language_bytes) in GitHubRepository.crawl_state(github_user.login).items()
+        }
+        languages = UserLanguage.updated_totals(github_user.login, previous, current)
+        user = GitHubUser.save_named_user(github_user, GitHubRepository.sort_languages(languages))
+        GitHubRepository.save_repositories(github_repos, user)
+        GitHubRepository.objects.filter(owner=user).exclude(name__in=list(current)).delete()
+        UserLanguage.save_user_languages(user, languages)
+        CandidateFeatures.update_for_users([user])
+    return user
+
+
+def resolve_users(logins) -> list:
+    """
+    Return the GitHubUser rows for ``logins``, deduplicated and in order of first appearance.
+
+    Logins already in the database are served from it; the others, and placeholders only known by
+    their login, are fetched concurrently and saved.
+    """
+    logins = list(dict.fromkeys(logins))
+    users = GitHubUser.objects.in_bulk(logins, field_name='login')
+    missing = [login for login in logins if login not in users or users[login].is_placeholder]
+    if missing:
+        github = get_client()
+        GitHubUser.save_named_users(fetch_all(github.get_user, missing))
+        resolved = GitHubUser.objects.in_bulk(missing, field_name='login')
+        # placeholders were ranked without their profile
+        CandidateFeatures.update_for_users(resolved[login] for login in missing if login in users and login in resolved)
+        users.update(resolved)
+    return [users[login] for login in logins if login in users]
+
+
+def rank_repository_owners(search: Search, paginated_list, count) -> tuple:
+    """
+    Rank the owners of the repositories found by a profession search until at least ``count`` are
+    ranked or the search is exhausted.
+
+    Result pages are read ``RANKING_CANDIDATE_PAGES`` at a time. The owners and repositories of
+    every window are stored, owners as placeholders without a profile, so that every candidate has
+    a precomputed feature vector. The owners of a window are ranked among themselves and after
+    those of the windows before, so the ranking only grows as later result pages are served. It is
+    cached, which makes serving a page of the search as cheap as the first one once it is ranked.
+
+    Returns the ranked logins, best first, and whether every result page has been read.
+    """
+    cache_key = f'search:ranking:{search.slug}'
+    state = cache.get(cache_key) or {'logins': [], 'next_page': 0}
+    logins, next_page = state['logins'], state['next_page']
+    page_count = count_pages(paginated_list)
+    ranked = set(logins)
+    while len(logins) < count and next_page < page_count:
+        window = range(next_page, min(next_page + settings.RANKING_CANDIDATE_PAGES, page_count))
+        pages = paginated_list.get_pages(window)
+        next_page = window.stop
+        repositories = list({repo.full_name: repo for page in pages for repo in page}.values())
+        candidates = list(dict.fromkeys(repo.owner.login for repo in repositories if repo.owner.login not in ranked))
+        GitHubUser.save_logins(candidates)
+        owners = GitHubUser.objects.in_bulk(candidates, field_name='login')
+        with transaction.atomic():
+            new_repositories = GitHubRepository.save_search_results(repositories, owners)
+            changed = {repository.owner_id for repository in new_repositories}
+            featured = set(CandidateFeatures.objects
+                           .filter(user__in=list(owners.values()))
+                           .values_list('user_id', flat=True))
+            CandidateFeatures.update_for_users(user for user in owners.values()
+                                               if user.pk in changed or user.pk not in featured)
+        logins_by_id = {user.pk: login for login, user in owners.items()}
+        ranked_ids = CandidateFeatures.rank(list(logins_by_id), Profession.skills_for(search.query))
+        logins.extend(logins_by_id[user_id] for user_id in ranked_ids)
+        ranked.update(logins_by_id.values())
+    if next_page != state['next_page']:
+        cache.set(cache_key, {'logins': logins, 'next_page': next_page}, settings.RANKING_CACHE_TTL)
+    return logins, next_page >= page_count
+
+
+def crawl_search_page(by, query, page):
+    """Return the users on ``page`` of a search together with the search's page count."""
+    search = Search(query=query, by=by)
+    paginated_list, return_type = search.search(query, by)
+    if return_type == GitHubRepository:
+        logins, complete = rank_repository_owners(search, paginated_list, page * PER_PAGE)
+        page_count = math.ceil(len(logins) / PER_PAGE)
+        if not complete:
+            # more candidates are ranked as later pages are asked for
+            page_count += 1
+        if page > page_count:
+            return [], page_count
+        return resolve_users(logins[(page - 1) * PER_PAGE:page * PER_PAGE]), page_count
+    enumeration = Enumeration.latest_finished(by, search.slug)
+    if enumeration is not None:
+        # every result of the search has been collected, see search.enumeration; users found as
+        # placeholders are fetched by resolve_users when their page is served
+        paginated_list = QuerySetPaginatedList(enumeration.ranked_users())
+    page_count = count_pages(paginated_list)
+    if page > page_count:
+        return [], page_count
+    results_page = paginated_list.get_page(page - 1)
+    return resolve_users([user.login for user in results_page]), page_count
+
+
+def fetch_search_page(by, query, page) -> dict:
+    """:func:`crawl_search_page` reduced to what the results cache keeps: the logins and the page count."""
+    users, page_count = crawl_search_page(by, query, page)
+    return {'page_count': page_count, 'logins': [user.login for user in users]}
+
+
+def search_page(by, query, page):
+    """
+    :func:`crawl_search_page` through the shared results cache.
+
+    Only the logins and page count are cached; the users themselves are read back from the database.
+    """
+    results_cache = get_results_cache()
+    result = results_cache.get_or_fetch(results_cache.key(by, query, page),
+                                        lambda: fetch_search_page(by, query, page))
+    users = GitHubUser.objects.in_bulk(result['logins'], field_name='login')
+    return [users[login] for login in result['logins'] if login in users], result['page_count']
+
+
+def _refresh_user(login):
+    close_old_connections()
+    try:
+        crawl_user(login)
+    except Exception:
+        logger.exception('Background refresh of %s failed', login)
+    finally:
+        with _refreshing_lock:
+            _refreshing.discard(login)
+        close_old_connections()
+
+
+def refresh_user_in_background(login):
+    with _refreshing_lock:
+        if login in _refreshing:
+            return
+        _refreshing.add(login)
+    _refresh_executor.submit(_refresh_user, login)
@@ -0,0 +1,130 @@
+import logging
+import math
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from .models import Enumeration, EnumerationPartition
+from .utils.clients import get_client
+from .utils.pagination import MAX_SEARCH_RESULTS
+from .utils.ratelimit import get_scheduler
+
+
+logger = logging.getLogger(__name__)
+
+PER_PAGE = 100
+# Nothing on GitHub was created before its launch.
+FIRST_DAY = date(2007, 10, 1)
+# Qualifiers a search is split on, in order: once a partition spans a single day of account or
+# repository creation and still has too many results, it is split by the next one.
+DIMENSIONS = {
+    'users': ['created', 'repos', 'followers'],
+    'repositories': ['created', 'stars'],
+}
+UPPER_BOUNDS = {
+    'repos': 100_000,
+    'followers': 10_000_000,
+    'stars': 1_000_000,
+}
+
+
+def initial_ranges() -> dict:
+    return {'created': [FIRST_DAY.isoformat(), date.today().isoformat()]}
+
+
+def split_range(name, low, high):
+    if name == 'created':
+        low, high = date.fromisoformat(low), date.fromisoformat(high)
+        if low >= high:
+            return None
+        middle = low + (high - low) // 2
+        return [low.isoformat(), middle.isoformat()], [(middle + timedelta(days=1)).isoformat(), high.isoformat()]
+    if low >= high:
+        return None
+    middle = (low + high) // 2
+    return [low, middle], [middle + 1, high]
+
+
+def split(ranges: dict, kind) -> list:
+    """Split ``ranges`` into two disjoint halves along the first dimension that can still be split."""
+    for name in DIMENSIONS[kind]:
+        low, high = ranges.get(name, [0, UPPER_BOUNDS.get(name)])
+        halves = split_range(name, low, high)
+        if halves is not None:
+            return [{**ranges, name: half} for half in halves]
+    return []
+
+
+def fetch_page(enumeration: Enumeration, partition: EnumerationPartition, page_number):
+    """Return the total count of ``partition`` and the logins on one of its pages."""
+    github = get_client(per_page=PER_PAGE)
+    query = f'{enumeration.github_query} {partition.qualifiers}'
+    get_scheduler().pace('search')
+    if enumeration.kind == 'users':
+        paginated_list = github.search_users(query)
+        logins = [user.login for user in paginated_list.get_page(page_number)]
+    else:
+        paginated_list = github.search_repositories(query)
+        logins = [repository.owner.login for repository in paginated_list.get_page(page_number)]
+    return paginated_list.totalCount, logins
+
+
+def process_partition(partition_id) -> list:
+    """
+    Read one partition to the end, or split it if it has more results than search serves.
+
+    Returns the ids of the partitions it was split into. Progress is saved after every page.
+    """
+    close_old_connections()
+    try:
+        partition = EnumerationPartition.objects.select_related('enumeration').get(pk=partition_id)
+        enumeration = partition.enumeration
+        if partition.total_count is None:
+            total_count, logins = fetch_page(enumeration, partition, 0)
+            halves = split(partition.ranges, enumeration.kind) if total_count > MAX_SEARCH_RESULTS else []
+            with transaction.atomic():
+                enumeration.add_logins(logins, partition.depth)
+                partition.total_count = total_count
+                partition.next_page = 1
+                if halves:
+                    partition.status = EnumerationPartition.Status.SPLIT
+                    partition.save(update_fields=['total_count', 'next_page', 'status'])
+                    children = EnumerationPartition.objects.bulk_create([
+                        EnumerationPartition(enumeration=enumeration, parent=partition, ranges=ranges,
+                                             depth=partition.depth + 1)
+                        for ranges in halves
+                    ])
+                    return [child.pk for child in children]
+                partition.truncated = total_count > MAX_SEARCH_RESULTS
+                partition.save(update_fields=['total_count', 'next_page', 'truncated'])
+            if partition.truncated:
+                logger.warning('%s cannot be split further, only its first %d of %d results are read',
+                               partition, MAX_SEARCH_RESULTS, total_count)
+        page_count = math.ceil(min(partition.total_count, MAX_SEARCH_RESULTS) / PER_PAGE)
+        while partition.next_page < page_count:
+            _, logins = fetch_page(enumeration, partition, partition.next_page)
+            with transaction.atomic():
+                enumeration.add_logins(logins, partition.depth, partition.next_page * PER_PAGE)
+                partition.next_page += 1
+                partition.save(update_fields=['next_page'])
+        partition.status = EnumerationPartition.Status.DONE
+        partition.save(update_fields=['status'])
+        return []
+    finally:
+        close_old_connections()
+
+
+def run_enumeration(enumeration: Enumeration, max_workers=None) -> Enumeration:
+    """Read every pending partition of ``enumeration``, splitting them as needed, ``max_workers`` at a time."""
+    max_workers = max_workers or settings.GITHUB_MAX_WORKERS
+    pending = enumeration.partitions.filter(status=EnumerationPartition.Status.PENDING).values_list('pk', flat=True)
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='enumeration') as executor:
+        futures = {executor.submit(process_partition, partition_id) for partition_id in pending}
+        while futures:
+            done, futures = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                futures.update(executor.submit(process_partition, partition_id) for partition_id in future.result())
+    enumeration.finish()
+    return enumeration
@@ -0,0 +1,66 @@
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .crawl import crawl_user, search_page, refresh_user_in_background
+from .models import CrawlJob, Search
+
+
+logger = logging.getLogger(__name__)
+
+
+def search_page_target(by, query, page):
+    return f'{by}/{query}/{page}'
+
+
+def run_user_job(job):
+    user = crawl_user(job.target)
+    return {'login': user.login}
+
+
+def run_search_page_job(job):
+    by, query, page = job.target.rsplit('/', 2)
+    users, page_count = search_page(by, query, int(page))
+    return {'page_count': page_count, 'logins': [user.login for user in users]}
+
+
+def run_languages_job(job):
+    Search().update_known_languages()
+
+
+JOB_RUNNERS = {
+    CrawlJob.Kind.USER: run_user_job,
+    CrawlJob.Kind.SEARCH_PAGE: run_search_page_job,
+    CrawlJob.Kind.LANGUAGES: run_languages_job,
+}
+
+
+def run_job(job: CrawlJob):
+    try:
+        result = JOB_RUNNERS[job.kind](job)
+    except Exception:
+        logger.exception('%s failed', job)
+        job.fail(traceback.format_exc())
+    else:
+        job.finish(result)
+    return job
+
+
+def ensure_job(kind, target) -> CrawlJob:
+    """Return the latest job for ``target`` unless it finished too long ago, else enqueue a new one."""
+    target = target.lower()
+    job = CrawlJob.objects.filter(kind=kind, target=target).order_by('-created_at').first()
+    max_age = timedelta(seconds=settings.CRAWL_JOB_RESULT_MAX_AGE)
+    if job is not None and (job.is_active or job.finished_at >= timezone.now() - max_age):
+        return job
+    return CrawlJob.enqueue(kind, target)
+
+
+def schedule_user_refresh(login):
+    if settings.SEARCH_BACKGROUND_CRAWL:
+        CrawlJob.enqueue(CrawlJob.Kind.USER, login)
+    else:
+        refresh_user_in_background(login)
@@ -0,0 +1,179 @@
+import json
+import os
+import statistics
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings, setup_test_environment, \
+    teardown_test_environment
+from django.urls import reverse
+
+from search.benchmarks.fake_github import FakeGitHub, load_fixtures, record_fixtures
+from search.crawl import crawl_user
+from search.models import Language, Search
+
+
+BASELINE = Path(__file__).resolve().parents[2] / 'benchmarks' / 'baseline.json'
+
+
+def get(url):
+    def run():
+        response = Client().get(url)
+        if response.status_code != 200:
+            raise CommandError(f'GET {url} answered {response.status_code}')
+    return run
+
+
+def results(by, query):
+    return get(reverse('search:results', kwargs=dict(by=by, query=query, page=1)))
+
+
+def user_details(login):
+    return get(reverse('search:user', kwargs=dict(login=login)))
+
+
+def crawl_users(*logins):
+    def setup():
+        for login in logins:
+            crawl_user(login)
+    return setup
+
+
+def page_through_profession_search():
+    paginated_list, _ = Search(query='machine-learning').search_users_by_profession('machine-learning')
+    for page_number in range(paginated_list.page_count):
+        paginated_list.get_page(page_number)
+
+
+# name: (setup, run); only run is measured
+SCENARIOS = {
+    'results:username': (None, results('username', 'bench')),
+    'results:location': (None, results('location', 'berlin')),
+    'results:language': (None, results('language', 'python')),
+    'results:profession': (None, results('profession', 'machine-learning')),
+    'results:local': (crawl_users('bench-user-3', 'bench-user-5', 'bench-user-8'), results('local', 'python')),
+    'user_details:10': (None, user_details('bench-10')),
+    'user_details:100': (None, user_details('bench-100')),
+    'user_details:1000': (None, user_details('bench-1000')),
+    'pagination:combined': (None, page_through_profession_search),
+}
+
+
+class Command(BaseCommand):
+    help = ('Measures the search views against a local fake GitHub replaying recorded responses and fails '
+            'on regressions against the stored baseline. Runs on a throwaway test database.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('scenarios', nargs='*', help=f'Scenarios to run, out of: {", ".join(SCENARIOS)}.')
+        parser.add_argument('--iterations', type=int, default=3, help='Runs per scenario.')
+        parser.add_argument('--latency', type=float, default=0.05, help='Seconds the fake GitHub takes per response.')
+        parser.add_argument('--baseline', default=str(BASELINE), help='Baseline file to compare against.')
+        parser.add_argument('--update-baseline', action='store_true', help='Store the results as the new baseline.')
+        parser.add_argument('--tolerance', type=float, default=0.25,
+                            help='Allowed relative increase of the median wall time over the baseline.')
+        parser.add_argument('--ci', action='store_true', default=bool(os.environ.get('CI')),
+                            help='Fail when there is no baseline to compare against. Default when CI is set.')
+        parser.add_argument('--keepdb', action='store_true', help='Keep the test database between runs.')
+        parser.add_argument('--record', action='store_true',
+                            help='Record the fixtures from the live GitHub API with GITHUB_API_TOKEN and exit.')
+
+    def handle(self, *args, **options):
+        if options['record']:
+            record_fixtures(token=settings.GITHUB_API_TOKEN)
+            self.stdout.write('Recorded the GitHub fixtures.')
+            return
+        names = options['scenarios'] or list(SCENARIOS)
+        unknown = [name for name in names if name not in SCENARIOS]
+        if unknown:
+            raise CommandError(f'Unknown scenarios: {", ".join(unknown)}')
+        baseline_path = Path(options['baseline'])
+        if options['ci'] and not options['update_baseline'] and not baseline_path.exists():
+            raise CommandError(f'No baseline at {baseline_path}; run with --update-baseline to store one.')
+
+        fake = FakeGitHub(load_fixtures(), latency=options['latency']).start()
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=options['keepdb'])
+        try:
+            with override_settings(GITHUB_API_BASE_URL=fake.url, GITHUB_BACKEND='rest', GITHUB_CACHE_ENABLED=False,
+                                   SEARCH_BACKGROUND_CRAWL=False, GITHUB_SECONDS_BETWEEN_REQUESTS=None):
+                measurements = {name: self.measure(fake, *SCENARIOS[name], options['iterations']) for name in names}
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+            teardown_test_environment()
+            fake.stop()
+
+        self.report(measurements)
+        if options['update_baseline']:
+            baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+            baseline.update(measurements)
+            baseline_path.write_text(json.dumps(baseline, indent=2, sort_keys=True) + '\n')
+            self.stdout.write(f'Stored the baseline in {baseline_path}.')
+        elif baseline_path.exists():
+            self.compare(measurements, json.loads(baseline_path.read_text()), options['latency'], options['tolerance'])
+        else:
+            self.stdout.write(f'No baseline at {baseline_path}; run with --update-baseline to store one.')
+
+    @staticmethod
+    def reset_caches():
+        for alias in settings.CACHES:
+            caches[alias].clear()
+        Language.invalidate_registry()
+
+    def measure(self, fake, setup, run, iterations):
+        durations = []
+        api_calls = db_queries = 0
+        for _ in range(iterations):
+            self.reset_caches()
+            with transaction.atomic():
+                if setup is not None:
+                    setup()
+                fake.reset()
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.monotonic()
+                    run()
+                    durations.append(time.monotonic() - started)
+                api_calls = max(api_calls, fake.requests)
+                db_queries = max(db_queries, len(queries))
+                transaction.set_rollback(True)
+        median = statistics.median(durations)
+        return {
+            'api_calls': api_calls,
+            'db_queries': db_queries,
+            'median_seconds': round(median, 4),
+            'max_seconds': round(max(durations), 4),
+            'throughput': round(1 / median, 2) if median else None,
+            'latency': fake.latency,
+        }
+
+    def report(self, measurements):
+        self.stdout.write(f'{"scenario":<22} {"api calls":>9} {"queries":>8} {"median ms":>10} {"max ms":>9} {"req/s":>7}')
+        for name, measurement in measurements.items():
+            self.stdout.write(
+                f'{name:<22} {measurement["api_calls"]:>9} {measurement["db_queries"]:>8} '
+                f'{measurement["median_seconds"] * 1000:>10.1f} {measurement["max_seconds"] * 1000:>9.1f} '
+                f'{measurement["throughput"] or 0:>7.2f}'
+            )
+
+    def compare(self, measurements, baseline, latency, tolerance):
+        regressions = []
+        for name, measurement in measurements.items():
+            expected = baseline.get(name)
+            if expected is None:
+                continue
+            for counter in ['api_calls', 'db_queries']:
+                if measurement[counter] > expected[counter]:
+                    regressions.append(f'{name}: {counter} {expected[counter]} -> {measurement[counter]}')
+            if expected.get('latency') != latency:
+                continue
+            if measurement['median_seconds'] > expected['median_seconds'] * (1 + tolerance):
+                regressions.append(f'{name}: median {expected["median_seconds"]:.3f}s -> '
+                                   f'{measurement["median_seconds"]:.3f}s')
+        if regressions:
+            raise CommandError('Performance regressions against the baseline:\n' + '\n'.join(regressions))
+        self.stdout.write(self.style.SUCCESS('No regressions against the baseline.'))
@@ -0,0 +1,88 @@
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from search.jobs import run_job
+from search.models import CrawlJob
+
+
+class Command(BaseCommand):
+    help = 'Runs crawl jobs queued by the search views.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Number of concurrent workers.')
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help='Seconds to wait before polling an empty queue again.')
+        parser.add_argument('--lease', type=int, default=settings.CRAWL_JOB_LEASE,
+                            help='Seconds a running job is kept without a heartbeat from its worker before it is '
+                                 'requeued.')
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is empty.')
+
+    def handle(self, *args, **options):
+        self.running = {}
+        self.running_lock = threading.Lock()
+        stop = threading.Event()
+        leases = threading.Thread(target=self.keep_leases, args=(stop, timedelta(seconds=options['lease'])),
+                                  name='crawl-worker-leases', daemon=True)
+        leases.start()
+        workers = [
+            threading.Thread(target=self.work, args=(stop, options['poll_interval'], options['once']),
+                             name=f'crawl-worker-{number}')
+            for number in range(options['workers'])
+        ]
+        for worker in workers:
+            worker.start()
+        try:
+            for worker in workers:
+                while worker.is_alive():
+                    worker.join(timeout=1)
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping workers after their current job...')
+        stop.set()
+        for worker in workers:
+            worker.join()
+
+    def keep_leases(self, stop, lease):
+        """
+        Renew the lease of the jobs run by this process and requeue those of workers that stopped.
+
+        A job is only taken from a worker that has not renewed it for ``lease``, so jobs still being
+        run by a live worker, however long they take, are never run twice.
+        """
+        interval = lease.total_seconds() / 3
+        while True:
+            close_old_connections()
+            with self.running_lock:
+                jobs = list(self.running.values())
+            if jobs:
+                CrawlJob.renew_leases(jobs)
+            expired = CrawlJob.expire_leases(lease)
+            if expired:
+                self.stdout.write(f'Requeued {expired} jobs whose worker stopped.')
+            if stop.wait(interval):
+                break
+        close_old_connections()
+
+    def work(self, stop, poll_interval, once):
+        while not stop.is_set():
+            close_old_connections()
+            job = CrawlJob.claim()
+            if job is None:
+                if once:
+                    break
+                stop.wait(poll_interval)
+                continue
+            started = time.monotonic()
+            with self.running_lock:
+                self.running[job.pk] = job
+            try:
+                run_job(job)
+            finally:
+                with self.running_lock:
+                    del self.running[job.pk]
+            self.stdout.write(f'{job} in {time.monotonic() - started:.1f}s')
+        close_old_connections()
@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import text
+
+from search.enumeration import initial_ranges, run_enumeration
+from search.models import Enumeration, EnumerationPartition
+from search.utils.ratelimit import get_scheduler
+
+
+class Command(BaseCommand):
+    help = ('Collects every user matching a search past the 1,000 result cap of GitHub search by splitting it '
+            'into disjoint partitions. An interrupted enumeration resumes when the command is run again.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('by', choices=['username', 'location', 'language', 'profession'])
+        parser.add_argument('query')
+        parser.add_argument('--workers', type=int, default=settings.GITHUB_MAX_WORKERS,
+                            help='Number of partitions read at once.')
+        parser.add_argument('--max-wait', type=int, default=60 * 60,
+                            help='Seconds to wait for the search rate limit to reset before giving up.')
+
+    def handle(self, *args, **options):
+        get_scheduler().max_wait = options['max_wait']
+        enumeration = Enumeration.start(options['by'], text.slugify(options['query']), initial_ranges())
+        done = enumeration.partitions.filter(status=EnumerationPartition.Status.DONE).count()
+        if done:
+            self.stdout.write(f'Resuming {enumeration} with {done} partitions read.')
+        run_enumeration(enumeration, max_workers=options['workers'])
+        partitions = enumeration.partitions.filter(status=EnumerationPartition.Status.DONE)
+        truncated = partitions.filter(truncated=True).count()
+        self.stdout.write(f'Found {enumeration.users.count()} users in {partitions.count()} partitions'
+                          + (f', {truncated} of them truncated.' if truncated else '.'))
@@ -0,0 +1,111 @@
+import csv
+import itertools
+import json
+import sys
+from operator import itemgetter
+
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Sum
+
+from search.models import GitHubRepository, GitHubUser
+
+
+USER_FIELDS = ['login', 'name', 'email', 'company', 'location', 'blog', 'bio', 'hireable', 'html_url',
+               'public_repos', 'languages', 'fetched_at']
+REPOSITORY_FIELDS = ['name', 'description', 'created_at', 'pushed_at', 'forks_count', 'languages', 'license',
+                     'topics']
+
+
+def read_logins(path):
+    with open(path, encoding='utf-8') as file:
+        return [line.strip() for line in file if line.strip()]
+
+
+def split_languages(languages):
+    return [language.strip() for language in languages.split(GitHubUser.DELIMITER)] if languages else []
+
+
+def with_repositories(users, repositories):
+    """
+    Pair every user with their repositories.
+
+    Both iterators have to be ordered by user id; they are merged in one pass, so only the
+    repositories of the current user are held in memory.
+    """
+    groups = itertools.groupby(repositories, key=itemgetter('owner_id'))
+    owner_id, group = next(groups, (None, None))
+    for user in users:
+        while owner_id is not None and owner_id < user['pk']:
+            owner_id, group = next(groups, (None, None))
+        user_repositories = []
+        if owner_id == user['pk']:
+            user_repositories = list(group)
+            owner_id, group = next(groups, (None, None))
+        yield user, user_repositories
+
+
+class Command(BaseCommand):
+    help = 'Streams crawled users and their repositories out as JSONL or CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', nargs='?', default='-', help="File to write to, '-' for stdout.")
+        parser.add_argument('--format', choices=['jsonl', 'csv'],
+                            help='Output format; defaults to the extension of the output file, else jsonl.')
+        parser.add_argument('--logins', help='File with one login per line to export instead of every user.')
+        parser.add_argument('--chunk-size', type=int, default=2000,
+                            help='Rows fetched from the database server-side cursors at a time.')
+
+    def handle(self, *args, **options):
+        output_format = options['format'] or ('csv' if options['output'].endswith('.csv') else 'jsonl')
+        users = GitHubUser.objects.all()
+        if options['logins']:
+            users = users.filter(login__in=read_logins(options['logins']))
+        output = sys.stdout if options['output'] == '-' else open(options['output'], 'w', encoding='utf-8',
+                                                                  newline='')
+        try:
+            if output_format == 'csv':
+                count = self.write_csv(users, output, options['chunk_size'])
+            else:
+                count = self.write_jsonl(users, output, options['chunk_size'])
+        finally:
+            if output is not sys.stdout:
+                output.close()
+        self.stderr.write(f'Exported {count} users.')
+
+    @staticmethod
+    def write_jsonl(users, output, chunk_size):
+        """One JSON object per line: the user's profile with a ``repositories`` list."""
+        user_rows = users.order_by('pk').values('pk', *USER_FIELDS).iterator(chunk_size=chunk_size)
+        repository_rows = (GitHubRepository.objects
+                           .filter(owner__in=users.values('pk'))
+                           .order_by('owner_id', 'name')
+                           .values('owner_id', *REPOSITORY_FIELDS)
+                           .iterator(chunk_size=chunk_size))
+        count = 0
+        for user, repositories in with_repositories(user_rows, repository_rows):
+            del user['pk']
+            user['languages'] = split_languages(user['languages'])
+            for repository in repositories:
+                del repository['owner_id']
+            user['repositories'] = repositories
+            output.write(json.dumps(user, cls=DjangoJSONEncoder) + '\n')
+            count += 1
+        return count
+
+    @staticmethod
+    def write_csv(users, output, chunk_size):
+        """One row per user, with their repositories summed up into counts."""
+        fields = [*USER_FIELDS, 'repository_count', 'forks_count']
+        rows = (users
+                .annotate(repository_count=Count('githubrepository'), forks_count=Sum('githubrepository__forks_count'))
+                .order_by('pk')
+                .values_list(*fields)
+                .iterator(chunk_size=chunk_size))
+        writer = csv.writer(output)
+        writer.writerow(fields)
+        count = 0
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+        return count
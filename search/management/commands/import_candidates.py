@@ -0,0 +1,126 @@
+import itertools
+import json
+import sys
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from github.GithubException import GithubException
+
+from search.crawl import fetch_user, save_crawled_user
+from search.models import GitHubRepository, GitHubUser
+from search.utils.clients import get_client
+from search.utils.fetch import fetch_all
+from search.utils.ratelimit import get_scheduler
+
+
+def read_logins(paths):
+    """
+    Stream the logins listed in ``paths``.
+
+    Lines may hold a bare login, a CSV row starting with one (a ``login`` header is skipped) or a
+    JSON object with a ``login`` key, so files written by ``export_candidates`` can be read back.
+    """
+    for path in paths:
+        file = sys.stdin if path == '-' else open(path, encoding='utf-8')
+        try:
+            for line in file:
+                line = line.strip()
+                if not line:
+                    continue
+                if line.startswith('{'):
+                    login = json.loads(line).get('login')
+                else:
+                    login = line.split(',', 1)[0].strip()
+                if login and login != 'login':
+                    yield login
+        finally:
+            if file is not sys.stdin:
+                file.close()
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+class Command(BaseCommand):
+    help = 'Crawls the users listed in one or more files and saves them in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('inputs', nargs='+', help="Files listing logins, '-' for stdin.")
+        parser.add_argument('--workers', type=int, default=settings.GITHUB_MAX_WORKERS,
+                            help='Number of users crawled at once.')
+        parser.add_argument('--batch-size', type=int, default=100,
+                            help='Number of users fetched before they are written in one transaction.')
+        parser.add_argument('--profiles-only', action='store_true',
+                            help='Only fetch profiles, one request per user, instead of crawling repositories.')
+        parser.add_argument('--refresh', action='store_true',
+                            help='Crawl users again even if their snapshot is not stale yet.')
+        parser.add_argument('--max-wait', type=int, default=60 * 60,
+                            help='Seconds to wait for the rate limit to reset before giving up.')
+        parser.add_argument('--failed', help='File to write the logins that could not be fetched to.')
+
+    def handle(self, *args, **options):
+        get_scheduler().max_wait = options['max_wait']
+        failed_file = open(options['failed'], 'w', encoding='utf-8') if options['failed'] else None
+        imported = skipped = failed = 0
+        started = time.monotonic()
+        try:
+            for batch in batched(read_logins(options['inputs']), options['batch_size']):
+                logins = list(dict.fromkeys(batch))
+                if not options['refresh']:
+                    fresh = self.fresh_logins(logins, options['profiles_only'])
+                    skipped += len(fresh)
+                    logins = [login for login in logins if login not in fresh]
+                if options['profiles_only']:
+                    batch_failed = self.import_profiles(logins, options['workers'])
+                else:
+                    batch_failed = self.import_users(logins, options['workers'])
+                failed += len(batch_failed)
+                imported += len(logins) - len(batch_failed)
+                if failed_file is not None:
+                    failed_file.writelines(f'{login}\n' for login in batch_failed)
+                self.stdout.write(f'Imported {imported} users, skipped {skipped}, failed {failed} '
+                                  f'in {time.monotonic() - started:.1f}s')
+        finally:
+            if failed_file is not None:
+                failed_file.close()
+
+    @staticmethod
+    def fresh_logins(logins, profiles_only):
+        # placeholders saved by enumerations and rankings only have their login
+        users = GitHubUser.objects.filter(login__in=logins).exclude(html_url__isnull=True)
+        if not profiles_only:
+            users = users.filter(fetched_at__gte=timezone.now() - timedelta(seconds=settings.GITHUB_USER_MAX_AGE))
+        return set(users.values_list('login', flat=True))
+
+    def fetch_or_report(self, fn):
+        def fetch(login):
+            try:
+                return fn(login)
+            except GithubException as exception:
+                self.stderr.write(f'Could not fetch {login}: {exception.status} {exception.data}')
+                return None
+        return fetch
+
+    def import_users(self, logins, workers):
+        states = GitHubRepository.crawl_states(logins)
+        fetch = self.fetch_or_report(lambda login: fetch_user(login, known=states.get(login)))
+        crawled = fetch_all(fetch, logins, max_workers=workers)
+        with transaction.atomic():
+            for github_user, github_repos in filter(None, crawled):
+                save_crawled_user(github_user, github_repos)
+        return [login for login, result in zip(logins, crawled) if result is None]
+
+    def import_profiles(self, logins, workers):
+        named_users = fetch_all(self.fetch_or_report(get_client().get_user), logins, max_workers=workers)
+        GitHubUser.save_named_users(filter(None, named_users))
+        return [login for login, named_user in zip(logins, named_users) if named_user is None]
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from search.management.commands.import_candidates import batched
+from search.models import GitHubUser
+from search.utils import gazetteer
+
+
+class Command(BaseCommand):
+    help = ("Maps the stored users' free-text locations to gazetteer places. New and re-crawled users are "
+            'placed when they are saved; this fills in the rows saved before, or all of them after the '
+            'gazetteer changed.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Place every user again, not only unplaced ones.')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Number of users updated at once.')
+
+    def handle(self, *args, **options):
+        users = GitHubUser.objects.filter(location__isnull=False).exclude(location='')
+        if not options['all']:
+            users = users.filter(place__isnull=True)
+        placed = total = 0
+        rows = users.only('pk', 'location').iterator(chunk_size=options['batch_size'])
+        for batch in batched(rows, options['batch_size']):
+            for user in batch:
+                for field, value in GitHubUser.place_fields(user.location).items():
+                    setattr(user, field, value)
+                placed += user.place is not None
+            with transaction.atomic():
+                GitHubUser.objects.bulk_update(batch, GitHubUser.PLACE_FIELDS)
+            total += len(batch)
+            self.stdout.write(f'Placed {placed} of {total} users')
+        info = gazetteer.locate.cache_info()
+        self.stdout.write(f'{info.misses} distinct locations looked up, {info.hits} served from the lookup cache.')
@@ -0,0 +1,139 @@
+import time
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from github.GithubException import GithubException, RateLimitExceededException
+
+from search.crawl import crawl_user, fetch_search_page
+from search.models import GitHubUser, Search
+from search.utils.metrics import RequestMetrics, current_metrics
+from search.utils.page_cache import get_profile_page_cache
+from search.utils.ratelimit import BudgetExceededException, get_scheduler
+from search.utils.results_cache import get_results_cache
+from search.views import render_user
+
+
+def parse_window(window):
+    """Parse ``'HH:MM-HH:MM'`` into start and end times; the window may span midnight."""
+    try:
+        start, end = (datetime.strptime(bound.strip(), '%H:%M').time() for bound in window.split('-'))
+    except ValueError:
+        raise CommandError(f'Invalid window {window!r}, expected HH:MM-HH:MM')
+    return start, end
+
+
+def in_window(window, now):
+    start, end = window
+    if start <= end:
+        return start <= now < end
+    return now >= start or now < end
+
+
+class Command(BaseCommand):
+    help = ('Prewarms the result pages of the most popular logged searches and the profiles of their top '
+            'candidates, most popular first, until the API budget is spent or the off-peak window closes. '
+            'The search results and profile page caches must be shared with the web processes, not local memory.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=14, help='Days of the search log to rank.')
+        parser.add_argument('--half-life', type=float, default=3,
+                            help='Days after which a logged search counts half as much.')
+        parser.add_argument('--limit', type=int, default=50, help='Maximum number of result pages warmed.')
+        parser.add_argument('--profiles', type=int, default=10,
+                            help='Number of candidates warmed per result page, from the top.')
+        parser.add_argument('--budget', type=int, default=settings.PREWARM_API_BUDGET,
+                            help='Maximum number of GitHub API calls made.')
+        parser.add_argument('--window', default=settings.PREWARM_WINDOW,
+                            help='Off-peak window to run in, as HH:MM-HH:MM in local time.')
+        parser.add_argument('--force', action='store_true', help='Run outside of the off-peak window.')
+        parser.add_argument('--results-ttl', type=int, default=settings.PREWARM_RESULTS_TTL,
+                            help='Seconds the warmed result pages are kept.')
+        parser.add_argument('--max-wait', type=int, default=60,
+                            help='Seconds to wait for the rate limit to reset before giving up.')
+        parser.add_argument('--dry-run', action='store_true', help='Only list the ranked searches.')
+
+    def handle(self, *args, **options):
+        window = parse_window(options['window'])
+        if not options['force'] and not in_window(window, timezone.localtime().time()):
+            self.stdout.write(f'Outside of the off-peak window {options["window"]}, nothing to do.')
+            return
+        ranked = Search.popular(since=timezone.now() - timedelta(days=options['days']),
+                                half_life=timedelta(days=options['half_life']))[:options['limit']]
+        if options['dry_run']:
+            for by, query, page, score in ranked:
+                self.stdout.write(f'{score:8.2f}  {by}/{query}/page-{page}')
+            return
+
+        # the pages would be warmed in this process only and be gone when it exits
+        local = [alias for alias in [settings.SEARCH_RESULTS_CACHE, settings.PROFILE_PAGE_CACHE]
+                 if isinstance(caches[alias], (LocMemCache, DummyCache))]
+        if local:
+            raise CommandError(f'The {" and ".join(local)} cache must use a backend shared with the web processes, '
+                               'e.g. FileBasedCache, DatabaseCache or RedisCache.')
+        scheduler = get_scheduler()
+        scheduler.max_wait = options['max_wait']
+        # every GitHub call is counted against the budget, including those made within a page or profile
+        scheduler.budget = options['budget']
+        # GitHub calls are counted by the same hooks as per-request metrics
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        started = time.monotonic()
+        pages = profiles = 0
+        try:
+            for by, query, page, _ in ranked:
+                if self.should_stop(scheduler, options, window):
+                    break
+                try:
+                    logins = self.warm_results(by, query, page, options['results_ttl'])
+                    pages += 1
+                    for login in logins[:options['profiles']]:
+                        if self.should_stop(scheduler, options, window):
+                            break
+                        profiles += self.warm_profile(login)
+                except BudgetExceededException:
+                    self.stdout.write(f'API budget of {options["budget"]} calls spent.')
+                    break
+                except RateLimitExceededException:
+                    self.stderr.write('Rate limit exhausted, stopping.')
+                    break
+                except GithubException as exception:
+                    self.stderr.write(f'Could not warm {by}/{query}/page-{page}: {exception.status} {exception.data}')
+        finally:
+            current_metrics.reset(token)
+            scheduler.budget = None
+        self.stdout.write(f'Warmed {pages} result pages and {profiles} profiles with '
+                          f'{sum(metrics.github_calls.values())} GitHub calls in {time.monotonic() - started:.1f}s.')
+
+    def should_stop(self, scheduler, options, window):
+        if scheduler.budget <= 0:
+            self.stdout.write(f'API budget of {options["budget"]} calls spent.')
+            return True
+        if not options['force'] and not in_window(window, timezone.localtime().time()):
+            self.stdout.write('Off-peak window closed.')
+            return True
+        return False
+
+    @staticmethod
+    def warm_results(by, query, page, ttl):
+        """Fetch a result page and keep it in the results cache for ``ttl`` seconds, returning its logins."""
+        result = fetch_search_page(by, query, page)
+        results_cache = get_results_cache()
+        results_cache.cache.set(results_cache.key(by, query, page), result, timeout=ttl)
+        return result['logins']
+
+    @staticmethod
+    def warm_profile(login):
+        """Crawl ``login`` unless their snapshot is fresh and render their profile page unless it is cached."""
+        user = GitHubUser.objects.filter(login=login).first()
+        if user is None or user.is_stale:
+            user = crawl_user(login)
+        elif get_profile_page_cache().get(user) is not None:
+            return 0
+        github_repos_list = list(user.githubrepository_set.select_related('owner').order_by('name'))
+        render_user(None, user, user.ranked_languages, github_repos_list)
+        return 1
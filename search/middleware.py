@@ -0,0 +1,74 @@
+import json
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from .utils.metrics import RequestMetrics, current_metrics, registry
+
+
+logger = logging.getLogger('search.metrics')
+
+
+class RequestMetricsMiddleware:
+    """
+    Record what every request costs, see :class:`search.utils.metrics.RequestMetrics`.
+
+    Each request is logged as one JSON line and added to the totals served by the metrics view;
+    with ``DEBUG`` on, the numbers are also sent back in the ``X-Request-Metrics`` and
+    ``Server-Timing`` headers.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        started = time.monotonic()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.finish(request, response, metrics, time.monotonic() - started)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        started = time.monotonic()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.finish(request, response, metrics, time.monotonic() - started)
+
+    @staticmethod
+    def finish(request, response, metrics, seconds):
+        match = request.resolver_match
+        view = match.view_name if match is not None else 'unresolved'
+        registry.observe(view, response.status_code, metrics, seconds)
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'view': view,
+            'status': response.status_code,
+            'seconds': round(seconds, 4),
+            **metrics.as_dict(),
+        }
+        logger.info(json.dumps(record))
+        if settings.DEBUG:
+            response['X-Request-Metrics'] = json.dumps(metrics.as_dict())
+            response['Server-Timing'] = ', '.join([
+                f'github;dur={metrics.github_seconds * 1000:.1f};desc="{sum(metrics.github_calls.values())} calls"',
+                f'db;dur={metrics.db_seconds * 1000:.1f};desc="{metrics.db_queries} queries"',
+                f'template;dur={metrics.template_seconds * 1000:.1f}',
+                f'total;dur={seconds * 1000:.1f}',
+            ])
+        return response
@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-18 18:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0002_auto_20220321_2334'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='githubrepository',
+            constraint=models.UniqueConstraint(fields=('owner', 'name'), name='unique_repository_per_owner'),
+        ),
+    ]
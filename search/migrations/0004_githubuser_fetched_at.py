@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-18 18:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0003_unique_repository_per_owner'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='githubuser',
+            name='fetched_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.2 on 2026-10-18 18:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0004_githubuser_fetched_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CrawlJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('USER', 'Crawl user'), ('PAGE', 'Crawl search results page'), ('LANG', 'Refresh known languages')], max_length=4)),
+                ('target', models.CharField(blank=True, default='', max_length=256)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('RUNNING', 'Running'), ('DONE', 'Done'), ('FAILED', 'Failed')], default='PENDING', max_length=8)),
+                ('attempts', models.IntegerField(default=0)),
+                ('result', models.JSONField(blank=True, null=True)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Crawl Job',
+                'verbose_name_plural': 'Crawl Jobs',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='crawljob',
+            index=models.Index(fields=['status', 'created_at'], name='search_craw_status_b54e26_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='crawljob',
+            index=models.Index(fields=['kind', 'target', '-created_at'], name='search_craw_kind_f66790_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='crawljob',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['PENDING', 'RUNNING'])), fields=('kind', 'target'), name='unique_active_crawl_job'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2 on 2026-10-18 18:45
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0005_crawljob'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='search',
+            name='by',
+            field=models.CharField(choices=[('NAME', 'Username'), ('LOC', 'Location'), ('LANG', 'Language'), ('PROF', 'Profession'), ('LOCL', 'Local')], default='PROF', max_length=4),
+        ),
+        migrations.AddIndex(
+            model_name='githubrepository',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.search.SearchVector('description', config='english'), name='githubrepository_search_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='githubrepository',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['languages'], name='githubrepository_languages_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='githubrepository',
+            index=models.Index(fields=['license'], name='githubrepository_license_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='githubuser',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.search.SearchVector('bio', 'company', 'location', config='english'), name='githubuser_search_vector_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2 on 2026-10-18 18:46
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0006_local_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserLanguage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bytes', models.BigIntegerField(default=0)),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('language', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='user_languages', to='search.language')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='user_languages', to='search.githubuser')),
+            ],
+            options={
+                'verbose_name': 'User Language',
+                'verbose_name_plural': 'User Languages',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='userlanguage',
+            index=models.Index(fields=['language', '-bytes'], name='userlanguage_bytes_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userlanguage',
+            index=models.Index(fields=['language', 'rank'], name='userlanguage_rank_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='userlanguage',
+            constraint=models.UniqueConstraint(fields=('user', 'language'), name='unique_language_per_user'),
+        ),
+    ]
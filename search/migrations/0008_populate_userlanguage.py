@@ -0,0 +1,30 @@
+from django.db import migrations
+
+
+def populate_user_languages(apps, schema_editor):
+    GitHubUser = apps.get_model('search', 'GitHubUser')
+    Language = apps.get_model('search', 'Language')
+    UserLanguage = apps.get_model('search', 'UserLanguage')
+    language_ids = dict(Language.objects.values_list('name', 'id'))
+    users = GitHubUser.objects.exclude(languages__isnull=True).exclude(languages='')
+    for user in users.only('id', 'languages').iterator(chunk_size=1000):
+        # The comma-joined column is ordered by bytes but does not record them.
+        names = list(dict.fromkeys(name.strip() for name in user.languages.split(',') if name.strip()))
+        for name in names:
+            if name not in language_ids:
+                language_ids[name] = Language.objects.get_or_create(name=name)[0].id
+        UserLanguage.objects.bulk_create([
+            UserLanguage(user_id=user.id, language_id=language_ids[name], bytes=0, rank=rank)
+            for rank, name in enumerate(names, start=1)
+        ], ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0007_userlanguage'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_user_languages, migrations.RunPython.noop),
+    ]
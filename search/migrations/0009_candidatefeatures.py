@@ -0,0 +1,33 @@
+# Generated by Django 4.2 on 2026-10-18 18:52
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0008_populate_userlanguage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='githubrepository',
+            name='topics',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=50), blank=True, default=list, size=None),
+        ),
+        migrations.CreateModel(
+            name='CandidateFeatures',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('vector', django.contrib.postgres.fields.ArrayField(base_field=models.FloatField(), size=259)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='candidate_features', to='search.githubuser')),
+            ],
+            options={
+                'verbose_name': 'Candidate Features',
+                'verbose_name_plural': 'Candidate Features',
+            },
+        ),
+    ]
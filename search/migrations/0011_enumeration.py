@@ -0,0 +1,49 @@
+# Generated by Django 4.2 on 2026-10-18 19:02
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0010_incremental_crawl'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Enumeration',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('by', models.CharField(max_length=16)),
+                ('query', models.CharField(max_length=256)),
+                ('kind', models.CharField(max_length=16)),
+                ('github_query', models.CharField(max_length=256)),
+                ('status', models.CharField(choices=[('RUNNING', 'Running'), ('DONE', 'Done')], default='RUNNING', max_length=8)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('users', models.ManyToManyField(blank=True, related_name='enumerations', to='search.githubuser')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='EnumerationPartition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ranges', models.JSONField()),
+                ('total_count', models.IntegerField(blank=True, null=True)),
+                ('next_page', models.IntegerField(default=0)),
+                ('truncated', models.BooleanField(default=False)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('SPLIT', 'Split'), ('DONE', 'Done')], default='PENDING', max_length=8)),
+                ('enumeration', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='partitions', to='search.enumeration')),
+                ('parent', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='children', to='search.enumerationpartition')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='enumerationpartition',
+            index=models.Index(fields=['enumeration', 'status'], name='search_enum_enumera_0ec34c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='enumeration',
+            index=models.Index(fields=['by', 'query', 'status'], name='search_enum_by_8d0a57_idx'),
+        ),
+    ]
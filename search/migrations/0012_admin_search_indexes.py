@@ -0,0 +1,45 @@
+# Generated by Django 4.2 on 2026-10-18 19:04
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0011_enumeration'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='githubrepository',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='gin_trgm_ops'), name='githubrepository_name_trgm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='githubrepository',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('description'), name='gin_trgm_ops'), name='githubrepository_desc_trgm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='githubuser',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('login'), name='gin_trgm_ops'), name='githubuser_login_trgm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='githubuser',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='gin_trgm_ops'), name='githubuser_name_trgm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='githubuser',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('location'), name='gin_trgm_ops'), name='githubuser_location_trgm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='githubuser',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('company'), name='gin_trgm_ops'), name='githubuser_company_trgm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='githubuser',
+            index=models.Index(condition=models.Q(('hireable', True)), fields=['hireable'], name='githubuser_hireable_idx'),
+        ),
+    ]
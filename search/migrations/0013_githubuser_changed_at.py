@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-18 19:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0012_admin_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='githubuser',
+            name='changed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
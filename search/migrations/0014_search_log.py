@@ -0,0 +1,43 @@
+# Generated by Django 4.2 on 2026-10-18 19:08
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0013_githubuser_changed_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='search',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='search',
+            name='latency',
+            field=models.FloatField(blank=True, help_text='Seconds taken to find the results.', null=True),
+        ),
+        migrations.AddField(
+            model_name='search',
+            name='page',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='search',
+            name='page_count',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='search',
+            name='result_count',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='search',
+            index=models.Index(fields=['created_at'], name='search_created_at_idx'),
+        ),
+    ]
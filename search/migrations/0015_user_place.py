@@ -0,0 +1,36 @@
+# Generated by Django 4.2 on 2026-10-18 19:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0014_search_log'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='githubuser',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='githubuser',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='githubuser',
+            name='place',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='githubuser',
+            index=models.Index(fields=['latitude', 'longitude'], name='githubuser_coordinates_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='githubuser',
+            index=models.Index(fields=['place'], name='githubuser_place_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2 on 2026-10-18 19:29
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def mark_synced(apps, schema_editor):
+    # only languages.yml gives file extensions, languages inserted by crawls have none
+    Language = apps.get_model('search', 'Language')
+    Language.objects.filter(file_extensions__isnull=False).update(synced_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0016_crawljob_heartbeat_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='language',
+            name='synced_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(mark_synced, migrations.RunPython.noop),
+    ]
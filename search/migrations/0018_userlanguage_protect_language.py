@@ -0,0 +1,19 @@
+# Generated by Django 4.2 on 2026-10-18 19:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0017_language_synced_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='userlanguage',
+            name='language',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='user_languages', to='search.language'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 4.2 on 2026-10-18 19:38
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0018_userlanguage_protect_language'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='enumerationpartition',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        # the many-to-many table becomes the through model's, rows and constraints are kept
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='EnumerationUser',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False,
+                                                   verbose_name='ID')),
+                        ('enumeration', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE,
+                                                          related_name='entries', to='search.enumeration')),
+                        ('user', models.ForeignKey(db_column='githubuser_id',
+                                                   on_delete=django.db.models.deletion.CASCADE,
+                                                   related_name='enumeration_entries', to='search.githubuser')),
+                    ],
+                    options={
+                        'db_table': 'search_enumeration_users',
+                        'unique_together': {('enumeration', 'user')},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name='enumeration',
+                    name='users',
+                    field=models.ManyToManyField(blank=True, related_name='enumerations',
+                                                 through='search.EnumerationUser', to='search.githubuser'),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name='enumerationuser',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='enumerationuser',
+            name='position',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='enumerationuser',
+            index=models.Index(fields=['enumeration', 'depth', 'position'], name='search_enum_enumera_b9a326_idx'),
+        ),
+    ]
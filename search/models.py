@@ -1,10 +1,17 @@
+import math
 from collections import Counter
 from collections.abc import Iterable
+from datetime import timedelta
 from django.conf import settings
+from django.core.cache import cache
 from django.contrib.postgres.fields import ArrayField
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, Exists, F, OuterRef, Q, Sum
+from django.db.models.functions import ASin, Cos, Power, Radians, Sin, Sqrt, TruncDate, Upper
 from django.urls import reverse
-from django.utils import text
+from django.utils import text, timezone
 from github import Github
 from github.GithubException import UnknownObjectException
 from github.NamedUser import NamedUser
@@ -12,17 +19,107 @@ from typing import Union
 
 from github.Repository import Repository
 
-from .utils.pagination import CombinedPaginatedList
+from .utils import gazetteer, scoring
+from .utils.clients import get_client
+from .utils.pagination import CombinedPaginatedList, QuerySetPaginatedList
+import numpy as np
 import yaml
 
 
+class LanguageRegistry:
+    """In-process snapshot of the Language table: name -> extensions, with reverse indexes."""
+
+    def __init__(self, version, extensions: dict, synced=False):
+        self.version = version
+        self.extensions = extensions
+        # whether linguist's list was ever synced, as opposed to only names found by crawls
+        self.synced = synced
+        self.canonical_names = {name.lower(): name for name in extensions}
+        self.by_extension = {}
+        for name, file_extensions in extensions.items():
+            for extension in file_extensions or []:
+                self.by_extension.setdefault(extension.lower(), []).append(name)
+
+    @property
+    def names(self):
+        return list(self.extensions)
+
+    def canonical_name(self, name):
+        return self.canonical_names.get(name.lower())
+
+    def languages_for_extension(self, extension):
+        if not extension.startswith('.'):
+            extension = f'.{extension}'
+        return self.by_extension.get(extension.lower(), [])
+
+
 class Language(models.Model):
+    VERSION_CACHE_KEY = 'search:languages:version'
+
     name = models.CharField(max_length=64, unique=True, null=False, blank=False)
     file_extensions = ArrayField(base_field=models.CharField(max_length=16), null=True, blank=True)
+    # Last sync from linguist's list; languages first seen by crawls have none until then
+    synced_at = models.DateTimeField(null=True, blank=True)
+
+    _registry = None
 
     def __str__(self):
         return self.name
 
+    @staticmethod
+    def registry() -> LanguageRegistry:
+        """
+        Return the cached language registry, reloading it once another process has changed the table.
+
+        Changes are announced by bumping a version stamp in the default cache, which has to be shared
+        between processes for them to notice.
+        """
+        version = cache.get(Language.VERSION_CACHE_KEY, 0)
+        registry = Language._registry
+        if registry is None or registry.version != version:
+            rows = Language.objects.values_list('name', 'file_extensions', 'synced_at')
+            registry = LanguageRegistry(version, {name: extensions for name, extensions, _ in rows},
+                                        synced=any(synced_at is not None for _, _, synced_at in rows))
+            Language._registry = registry
+        return registry
+
+    @staticmethod
+    def invalidate_registry():
+        try:
+            cache.incr(Language.VERSION_CACHE_KEY)
+        except ValueError:
+            cache.set(Language.VERSION_CACHE_KEY, 1, timeout=None)
+        Language._registry = None
+
+    @staticmethod
+    def sync(languages: dict):
+        """
+        Add and update the languages of ``languages``, a mapping of name to file extensions, in a few bulk statements.
+
+        Languages no longer listed are kept: users' language breakdowns refer to them, and they keep
+        the ``synced_at`` of the last sync that listed them. Returns the number of languages created
+        and updated.
+        """
+        synced_at = timezone.now()
+        existing = {language.name: language for language in Language.objects.all()}
+        created = [
+            Language(name=name, file_extensions=extensions, synced_at=synced_at)
+            for name, extensions in languages.items()
+            if name not in existing
+        ]
+        updated = []
+        for name, extensions in languages.items():
+            language = existing.get(name)
+            if language is not None and language.file_extensions != extensions:
+                language.file_extensions = extensions
+                updated.append(language)
+        with transaction.atomic():
+            Language.objects.bulk_create(created, batch_size=500)
+            Language.objects.bulk_update(updated, ['file_extensions'], batch_size=500)
+            Language.objects.filter(name__in=list(languages)).update(synced_at=synced_at)
+        Language.invalidate_registry()
+        return len(created), len(updated)
+
 
 class Profession(models.Model):
     DELIMITER = ","
@@ -37,9 +134,20 @@ class Profession(models.Model):
     def skills_list(self):
         return [skill.strip().lower() for skill in self.skills.split(self.DELIMITER)]
 
+    @staticmethod
+    def skills_for(query):
+        """Return the skills of the profession matching ``query``, or the query itself when there is none."""
+        query = query.replace('-', ' ')
+        profession = Profession.objects.filter(name__icontains=query).first()
+        if profession is not None:
+            return profession.skills_list
+        return [query]
+
 
 class GitHubUser(models.Model):
     DELIMITER = ","
+    PROFILE_FIELDS = ['bio', 'blog', 'company', 'email', 'hireable', 'html_url', 'location', 'name', 'public_repos']
+    PLACE_FIELDS = ['place', 'latitude', 'longitude']
 
     login = models.CharField(max_length=39, unique=True, null=False, blank=False)
     bio = models.CharField(max_length=160, null=True, blank=True)
@@ -52,18 +160,53 @@ class GitHubUser(models.Model):
     name = models.CharField(max_length=255, null=True, blank=True)
     public_repos = models.IntegerField()
     languages = models.TextField(null=True, blank=True)
+    fetched_at = models.DateTimeField(null=True, blank=True)
+    # Gazetteer place of the free-text location, see search.utils.gazetteer
+    place = models.CharField(max_length=100, null=True, blank=True)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    # Last write to the profile or the repositories of the user, versions the cached profile page
+    changed_at = models.DateTimeField(null=True, blank=True)
 
     def __str__(self):
         return f'GitHubUser(login={str(self.login)})'
 
     @property
     def languages_list(self):
+        if not self.languages:
+            return []
         return [language.strip().capitalize()
                 for language in self.languages.split(self.DELIMITER)]
 
+    @property
+    def is_placeholder(self):
+        """Whether only the login is known, see :meth:`save_logins`; every fetched profile has an ``html_url``."""
+        return self.html_url is None
+
+    @property
+    def profile_changed_at(self):
+        return self.changed_at or self.fetched_at
+
+    @property
+    def ranked_languages(self):
+        return list(self.user_languages.order_by('rank').values_list('language__name', flat=True))
+
+    @property
+    def is_stale(self):
+        max_age = timedelta(seconds=settings.GITHUB_USER_MAX_AGE)
+        return self.fetched_at is None or self.fetched_at < timezone.now() - max_age
+
     def get_absolute_url(self):
         return reverse('search:user', kwargs=dict(login=self.login))
 
+    @staticmethod
+    def place_fields(location) -> dict:
+        """The place columns for the free-text ``location``, all None if it is not in the gazetteer."""
+        place = gazetteer.locate(location.strip()) if location else None
+        if place is None:
+            return dict.fromkeys(GitHubUser.PLACE_FIELDS)
+        return dict(place=place.label, latitude=place.latitude, longitude=place.longitude)
+
     @staticmethod
     def create_languages_str_from_list(languages):
         return ", ".join(languages)
@@ -77,19 +220,209 @@ class GitHubUser(models.Model):
                 blog=named_user.blog,
                 company=named_user.company,
                 email=named_user.email,
-                hireable=named_user.hireable,
+                hireable=bool(named_user.hireable),
                 html_url=named_user.html_url,
                 location=named_user.location,
                 name=named_user.name,
                 public_repos=named_user.public_repos,
-                languages=GitHubUser.create_languages_str_from_list(languages)
+                languages=GitHubUser.create_languages_str_from_list(languages),
+                fetched_at=timezone.now(),
+                changed_at=timezone.now(),
+                **GitHubUser.place_fields(named_user.location),
             )
         )
         return user
 
+    @staticmethod
+    def mark_changed(users: Iterable['GitHubUser']):
+        """Bump ``changed_at`` of ``users`` after writing their repositories, so their cached profile is re-rendered."""
+        users = list(users)
+        changed_at = timezone.now()
+        # the instances carry on to render and cache the page under the new version
+        for user in users:
+            user.changed_at = changed_at
+        return GitHubUser.objects.filter(pk__in=[user.pk for user in users]).update(changed_at=changed_at)
+
+    @staticmethod
+    def top_by_language(language, limit=10):
+        """Return the ``limit`` users with the most bytes written in ``language``."""
+        return (GitHubUser.objects
+                .filter(user_languages__language__name=language)
+                .annotate(language_bytes=F('user_languages__bytes'))
+                .order_by('-language_bytes')[:limit])
+
+    @staticmethod
+    def search_by_languages(languages, top=None):
+        """
+        Return the users using every one of ``languages``, most bytes across them first.
+
+        With ``top``, each language has to be among the user's ``top`` languages, e.g. ``top=1``
+        for users whose main language is the only one given.
+        """
+        matches = Q(user_languages__language__name__in=languages)
+        if top is not None:
+            matches &= Q(user_languages__rank__lte=top)
+        return (GitHubUser.objects
+                .filter(matches)
+                .annotate(matched=Count('user_languages'), language_bytes=Sum('user_languages__bytes'))
+                .filter(matched=len(languages))
+                .order_by('-language_bytes', 'login'))
+
+    @staticmethod
+    def search_vector():
+        return SearchVector('bio', 'company', 'location', config='english')
+
+    @staticmethod
+    def within(users, latitude, longitude, radius_km):
+        """
+        Narrow ``users`` down to those placed within ``radius_km`` of a point, annotated with their ``distance`` in km.
+
+        The bounding box of the circle is matched on the indexed coordinates first, so the haversine
+        distance is only computed for the users in it.
+        """
+        min_latitude, max_latitude, min_longitude, max_longitude = gazetteer.bounding_box(latitude, longitude,
+                                                                                          radius_km)
+        users = users.filter(latitude__range=(min_latitude, max_latitude))
+        if max_longitude - min_longitude < 360:
+            if min_longitude < -180 or max_longitude > 180:
+                # the box crosses the antimeridian
+                users = users.filter(Q(longitude__gte=(min_longitude + 540) % 360 - 180)
+                                     | Q(longitude__lte=(max_longitude + 540) % 360 - 180))
+            else:
+                users = users.filter(longitude__range=(min_longitude, max_longitude))
+        haversine = Power(Sin((Radians('latitude') - math.radians(latitude)) / 2), 2) + (
+            math.cos(math.radians(latitude)) * Cos(Radians('latitude'))
+            * Power(Sin((Radians('longitude') - math.radians(longitude)) / 2), 2)
+        )
+        return (users
+                .annotate(distance=2 * gazetteer.EARTH_RADIUS_KM * ASin(Sqrt(haversine)))
+                .filter(distance__lte=radius_km))
+
+    @staticmethod
+    def search_local(query, language=None, license_=None, near=None, radius_km=None):
+        """
+        Full-text search over the crawled users' bio, company and location and their repository descriptions.
+
+        ``language`` and ``license_`` narrow the results down to users owning a matching repository,
+        ``near`` to users placed within ``radius_km`` of that place.
+        """
+        search_query = SearchQuery(query, search_type='plain', config='english')
+        # each side of the union is matched on its own full-text index; an OR of both forces a scan of every user
+        matching_users = (GitHubUser.objects
+                          .annotate(search=GitHubUser.search_vector())
+                          .filter(search=search_query)
+                          .values('pk'))
+        matching_owners = (GitHubRepository.objects
+                           .annotate(search=GitHubRepository.search_vector())
+                           .filter(search=search_query)
+                           .values('owner_id'))
+        users = GitHubUser.objects.filter(pk__in=matching_users.union(matching_owners)).annotate(
+            rank=SearchRank(GitHubUser.search_vector(), search_query),
+        )
+        repositories = GitHubRepository.objects.filter(owner=OuterRef('pk'))
+        if language:
+            users = users.filter(Exists(repositories.filter(languages__contains=[language])))
+        if license_:
+            users = users.filter(Exists(repositories.filter(license=license_)))
+        if near:
+            place = gazetteer.locate(near)
+            if place is None:
+                return users.none()
+            users = GitHubUser.within(users, place.latitude, place.longitude,
+                                      radius_km or gazetteer.DEFAULT_RADIUS_KM)
+        return users.order_by('-rank', 'login')
+
+    @staticmethod
+    def local_facets(users, limit=10):
+        """Count the users in ``users`` writing each language and owning repositories of each license."""
+        user_ids = users.order_by().values('pk')
+        languages = (UserLanguage.objects
+                     .filter(user__in=user_ids)
+                     .values_list('language__name')
+                     .annotate(count=Count('user'))
+                     .order_by('-count', 'language__name')[:limit])
+        licenses = (GitHubRepository.objects
+                    .filter(owner__in=user_ids, license__isnull=False)
+                    .values_list('license')
+                    .annotate(count=Count('owner', distinct=True))
+                    .order_by('-count', 'license')[:limit])
+        return {
+            'language': list(languages),
+            'license': list(licenses),
+        }
+
+    @staticmethod
+    def profile_rows(named_users: Iterable[NamedUser]):
+        changed_at = timezone.now()
+        return [
+            GitHubUser(
+                login=named_user.login,
+                bio=named_user.bio,
+                blog=named_user.blog,
+                company=named_user.company,
+                email=named_user.email,
+                hireable=bool(named_user.hireable),
+                html_url=named_user.html_url,
+                location=named_user.location,
+                name=named_user.name,
+                public_repos=named_user.public_repos,
+                changed_at=changed_at,
+                **GitHubUser.place_fields(named_user.location),
+            )
+            for named_user in named_users
+        ]
+
+    @staticmethod
+    def save_logins(logins: Iterable[str]):
+        """
+        Insert placeholder rows for the ``logins`` not stored yet, e.g. users seen in search results.
+
+        Placeholders have no ``fetched_at``, so their profile is crawled when it is first viewed.
+        """
+        return GitHubUser.objects.bulk_create(
+            [GitHubUser(login=login, hireable=False, public_repos=0) for login in logins],
+            ignore_conflicts=True,
+        )
+
+    @staticmethod
+    def save_named_users(named_users: Iterable[NamedUser]):
+        """
+        Upsert the profile fields of ``named_users`` in one statement.
+
+        Crawled languages and ``fetched_at`` are left untouched, so these rows only count as
+        profile snapshots once the user has been crawled.
+        """
+        return GitHubUser.objects.bulk_create(
+            GitHubUser.profile_rows(named_users),
+            update_conflicts=True,
+            unique_fields=['login'],
+            update_fields=[*GitHubUser.PROFILE_FIELDS, *GitHubUser.PLACE_FIELDS, 'changed_at'],
+        )
+
+    @staticmethod
+    async def asave_named_users(named_users: Iterable[NamedUser]):
+        return await GitHubUser.objects.abulk_create(
+            GitHubUser.profile_rows(named_users),
+            update_conflicts=True,
+            unique_fields=['login'],
+            update_fields=[*GitHubUser.PROFILE_FIELDS, *GitHubUser.PLACE_FIELDS, 'changed_at'],
+        )
+
     class Meta:
         verbose_name = "GitHub User"
         verbose_name_plural = "GitHub Users"
+        indexes = [
+            models.Index(fields=['latitude', 'longitude'], name='githubuser_coordinates_idx'),
+            models.Index(fields=['place'], name='githubuser_place_idx'),
+            GinIndex(SearchVector('bio', 'company', 'location', config='english'),
+                     name='githubuser_search_vector_idx'),
+            # Trigram indexes on the same UPPER(...) expression icontains lookups compile to, used by the admin
+            GinIndex(OpClass(Upper('login'), name='gin_trgm_ops'), name='githubuser_login_trgm_idx'),
+            GinIndex(OpClass(Upper('name'), name='gin_trgm_ops'), name='githubuser_name_trgm_idx'),
+            GinIndex(OpClass(Upper('location'), name='gin_trgm_ops'), name='githubuser_location_trgm_idx'),
+            GinIndex(OpClass(Upper('company'), name='gin_trgm_ops'), name='githubuser_company_trgm_idx'),
+            models.Index(fields=['hireable'], condition=Q(hireable=True), name='githubuser_hireable_idx'),
+        ]
 
 
 class GitHubRepository(models.Model):
@@ -100,14 +433,33 @@ class GitHubRepository(models.Model):
     forks_count = models.IntegerField()
     languages = ArrayField(base_field=models.CharField(max_length=32))
     license = models.CharField(max_length=48, null=True, blank=True)
+    topics = ArrayField(base_field=models.CharField(max_length=50), default=list, blank=True)
+    pushed_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(null=True, blank=True)
+    language_bytes = models.JSONField(default=dict, blank=True)
 
     def __str__(self):
         return f'GitHubRepository(owner={str(self.owner)}, name={str(self.name)})'
 
+    @property
+    def html_url(self):
+        return f'https://github.com/{self.owner.login}/{self.name}'
+
+    @property
+    def language(self):
+        return self.languages[0] if self.languages else None
+
+    @staticmethod
+    def search_vector():
+        return SearchVector('description', config='english')
+
+    @staticmethod
+    def sort_languages(languages: dict) -> list:
+        return sorted(languages.keys(), key=languages.get, reverse=True)
+
     @staticmethod
     def save_repository(repository: Repository, owner: GitHubUser):
-        languages = repository.get_languages()
-        languages = sorted(languages.keys(), key=languages.get, reverse=True)
+        languages = GitHubRepository.sort_languages(repository.get_languages())
         try:
             license_ = repository.get_license().license.name
         except UnknownObjectException:
@@ -122,38 +474,491 @@ class GitHubRepository(models.Model):
                 license=license_
             )
         )
+        GitHubUser.mark_changed([owner])
         return repository
 
+    @staticmethod
+    def save_repositories(repositories: Iterable, owner: GitHubUser):
+        """
+        Upsert already fetched ``(repository, languages)`` pairs of ``owner`` in one statement.
+
+        The license comes from the repository listing payload, so no further API calls are made.
+        """
+        rows = [
+            GitHubRepository(
+                owner=owner,
+                name=repository.name,
+                created_at=repository.created_at,
+                description=repository.description,
+                forks_count=repository.forks_count,
+                languages=GitHubRepository.sort_languages(languages),
+                license=repository.license.name if repository.license else None,
+                topics=repository.topics or [],
+                pushed_at=repository.pushed_at,
+                updated_at=repository.updated_at,
+                language_bytes=languages,
+            )
+            for repository, languages in repositories
+        ]
+        rows = GitHubRepository.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=['owner', 'name'],
+            update_fields=['created_at', 'description', 'forks_count', 'languages', 'license', 'topics',
+                           'pushed_at', 'updated_at', 'language_bytes'],
+        )
+        GitHubUser.mark_changed([owner])
+        return rows
+
+    @staticmethod
+    def crawl_state(login) -> dict:
+        """Map the names of the stored repositories of ``login`` to their ``(pushed_at, updated_at, language_bytes)``."""
+        return {
+            name: (pushed_at, updated_at, language_bytes)
+            for name, pushed_at, updated_at, language_bytes in GitHubRepository.objects
+            .filter(owner__login__iexact=login)
+            .values_list('name', 'pushed_at', 'updated_at', 'language_bytes')
+        }
+
+    @staticmethod
+    def crawl_states(logins) -> dict:
+        """:meth:`crawl_state` of several users in one query, keyed by login."""
+        states = {}
+        for login, name, pushed_at, updated_at, language_bytes in (GitHubRepository.objects
+                                                                   .filter(owner__login__in=logins)
+                                                                   .values_list('owner__login', 'name', 'pushed_at',
+                                                                                'updated_at', 'language_bytes')):
+            states.setdefault(login, {})[name] = (pushed_at, updated_at, language_bytes)
+        return states
+
+    @staticmethod
+    def save_search_results(repositories: Iterable[Repository], owners: dict):
+        """
+        Insert the repositories of a repository search that are not stored yet and return the new rows.
+
+        Search results only carry a repository's main language, so rows that are already stored,
+        usually by a full crawl of their owner, are left untouched, and the new rows get no
+        ``pushed_at`` for the next crawl of their owner to fetch their languages. ``owners`` maps logins to GitHubUser rows.
+        """
+        repositories = [repository for repository in repositories if repository.owner.login in owners]
+        existing = set(GitHubRepository.objects
+                       .filter(owner__in=list(owners.values()))
+                       .values_list('owner__login', 'name'))
+        rows = [
+            GitHubRepository(
+                owner=owners[repository.owner.login],
+                name=repository.name,
+                created_at=repository.created_at,
+                description=repository.description,
+                forks_count=repository.forks_count,
+                languages=[repository.language] if repository.language else [],
+                license=repository.license.name if repository.license else None,
+                topics=repository.topics or [],
+            )
+            for repository in repositories
+            if (repository.owner.login, repository.name) not in existing
+        ]
+        GitHubRepository.objects.bulk_create(rows, ignore_conflicts=True)
+        GitHubUser.mark_changed({row.owner for row in rows})
+        return rows
+
     class Meta:
         verbose_name = "GitHub Repository"
         verbose_name_plural = "GitHub Repositories"
+        constraints = [
+            models.UniqueConstraint(fields=['owner', 'name'], name='unique_repository_per_owner'),
+        ]
+        indexes = [
+            GinIndex(SearchVector('description', config='english'), name='githubrepository_search_idx'),
+            GinIndex(fields=['languages'], name='githubrepository_languages_idx'),
+            models.Index(fields=['license'], name='githubrepository_license_idx'),
+            GinIndex(OpClass(Upper('name'), name='gin_trgm_ops'), name='githubrepository_name_trgm_idx'),
+            GinIndex(OpClass(Upper('description'), name='gin_trgm_ops'), name='githubrepository_desc_trgm_idx'),
+        ]
+
+
+class UserLanguage(models.Model):
+    user = models.ForeignKey(GitHubUser, on_delete=models.CASCADE, related_name='user_languages')
+    language = models.ForeignKey(Language, on_delete=models.PROTECT, related_name='user_languages')
+    bytes = models.BigIntegerField(default=0)
+    rank = models.PositiveSmallIntegerField()
+
+    def __str__(self):
+        return f'UserLanguage(user={str(self.user)}, language={str(self.language)}, rank={self.rank})'
+
+    @staticmethod
+    def updated_totals(login, previous: dict, current: dict) -> Counter:
+        """
+        Update the stored language totals of ``login`` with the repositories that changed since the last crawl.
 
+        ``previous`` and ``current`` map repository names to their language bytes before and after
+        the crawl; only repositories that were added, removed or whose languages changed are applied.
+        """
+        totals = Counter(dict(UserLanguage.objects
+                              .filter(user__login__iexact=login)
+                              .values_list('language__name', 'bytes')))
+        for name in previous.keys() | current.keys():
+            if previous.get(name) != current.get(name):
+                totals.subtract(previous.get(name) or {})
+                totals.update(current.get(name) or {})
+        return Counter({name: size for name, size in totals.items() if size > 0})
 
-class Search(models.Model, Github):
+    @staticmethod
+    def save_user_languages(user: GitHubUser, languages: Counter):
+        """Replace the language breakdown of ``user`` with ``languages``, a mapping of language name to bytes."""
+        language_ids = Language.objects.in_bulk(list(languages), field_name='name')
+        # looked up in the table rather than the registry, which may be behind it
+        missing = [name for name in languages if name not in language_ids]
+        if missing:
+            Language.objects.bulk_create([Language(name=name) for name in missing], ignore_conflicts=True)
+            Language.invalidate_registry()
+            language_ids.update(Language.objects.in_bulk(missing, field_name='name'))
+        UserLanguage.objects.filter(user=user).delete()
+        return UserLanguage.objects.bulk_create([
+            UserLanguage(user=user, language=language_ids[name], bytes=size, rank=rank)
+            for rank, (name, size) in enumerate(languages.most_common(), start=1)
+        ])
+
+    class Meta:
+        verbose_name = "User Language"
+        verbose_name_plural = "User Languages"
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'language'], name='unique_language_per_user'),
+        ]
+        indexes = [
+            models.Index(fields=['language', '-bytes'], name='userlanguage_bytes_idx'),
+            models.Index(fields=['language', 'rank'], name='userlanguage_rank_idx'),
+        ]
+
+
+class CandidateFeatures(models.Model):
+    """
+    Precomputed feature vector of a user, see :mod:`search.utils.scoring`.
+
+    Vectors are rebuilt from the stored profile and repositories whenever those change, so ranking
+    a set of candidates is a single matrix product.
+    """
+    user = models.OneToOneField(GitHubUser, on_delete=models.CASCADE, related_name='candidate_features')
+    vector = ArrayField(base_field=models.FloatField(), size=scoring.VECTOR_SIZE)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'CandidateFeatures(user={str(self.user)})'
+
+    @staticmethod
+    def update_for_users(users: Iterable[GitHubUser]):
+        users = list(users)
+        repositories = {user.pk: [] for user in users}
+        for owner_id, *row in (GitHubRepository.objects
+                               .filter(owner__in=users)
+                               .values_list('owner_id', 'description', 'languages', 'topics', 'forks_count',
+                                            'created_at')):
+            repositories[owner_id].append(row)
+        rows = [
+            CandidateFeatures(
+                user=user,
+                vector=scoring.feature_vector(repositories[user.pk], bio=user.bio, hireable=user.hireable),
+                updated_at=timezone.now(),
+            )
+            for user in users
+        ]
+        return CandidateFeatures.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=['user'],
+            update_fields=['vector', 'updated_at'],
+        )
+
+    @staticmethod
+    def rank(user_ids: list, skills: list) -> list:
+        """Return ``user_ids`` from the best to the worst candidate for ``skills``; users without features come last."""
+        features = dict(CandidateFeatures.objects.filter(user_id__in=user_ids).values_list('user_id', 'vector'))
+        ranked_ids = [user_id for user_id in user_ids if user_id in features]
+        if ranked_ids:
+            vectors = np.array([features[user_id] for user_id in ranked_ids], dtype=float)
+            ranked_ids = [ranked_ids[index] for index in scoring.rank(vectors, skills)]
+        return ranked_ids + [user_id for user_id in user_ids if user_id not in features]
+
+    class Meta:
+        verbose_name = "Candidate Features"
+        verbose_name_plural = "Candidate Features"
+
+
+class CrawlJob(models.Model):
+    class Kind(models.TextChoices):
+        USER = 'USER', 'Crawl user'
+        SEARCH_PAGE = 'PAGE', 'Crawl search results page'
+        LANGUAGES = 'LANG', 'Refresh known languages'
+
+    class Status(models.TextChoices):
+        PENDING = 'PENDING'
+        RUNNING = 'RUNNING'
+        DONE = 'DONE'
+        FAILED = 'FAILED'
+
+    ACTIVE_STATUSES = [Status.PENDING, Status.RUNNING]
+    MAX_ATTEMPTS = 3
+
+    kind = models.CharField(choices=Kind.choices, max_length=4)
+    target = models.CharField(max_length=256, blank=True, default='')
+    status = models.CharField(choices=Status.choices, max_length=8, default=Status.PENDING)
+    attempts = models.IntegerField(default=0)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Workers renew the lease of their running jobs; a job whose lease ran out is given to another worker
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f'CrawlJob(kind={self.kind}, target={self.target}, status={self.status})'
+
+    @property
+    def is_active(self):
+        return self.status in self.ACTIVE_STATUSES
+
+    @staticmethod
+    def enqueue(kind, target=''):
+        # logins and queries are case-insensitive on GitHub
+        target = target.lower()
+        active_jobs = CrawlJob.objects.filter(kind=kind, target=target, status__in=CrawlJob.ACTIVE_STATUSES)
+        job = active_jobs.first()
+        if job is not None:
+            return job
+        try:
+            with transaction.atomic():
+                return CrawlJob.objects.create(kind=kind, target=target)
+        except IntegrityError:
+            return active_jobs.first() or CrawlJob.enqueue(kind, target)
+
+    @staticmethod
+    def claim():
+        with transaction.atomic():
+            job = (CrawlJob.objects.select_for_update(skip_locked=True)
+                   .filter(status=CrawlJob.Status.PENDING)
+                   .order_by('created_at')
+                   .first())
+            if job is None:
+                return None
+            job.status = CrawlJob.Status.RUNNING
+            job.started_at = job.heartbeat_at = timezone.now()
+            job.attempts += 1
+            job.save(update_fields=['status', 'started_at', 'heartbeat_at', 'attempts'])
+        return job
+
+    @staticmethod
+    def renew_leases(jobs: Iterable['CrawlJob']):
+        return CrawlJob.objects.filter(
+            pk__in=[job.pk for job in jobs], status=CrawlJob.Status.RUNNING
+        ).update(heartbeat_at=timezone.now())
+
+    @staticmethod
+    def expire_leases(lease: timedelta):
+        """Requeue the running jobs whose worker stopped renewing their lease, or fail them after the last attempt."""
+        expired = CrawlJob.objects.filter(status=CrawlJob.Status.RUNNING, heartbeat_at__lt=timezone.now() - lease)
+        error = 'The worker stopped renewing the lease.'
+        return (expired.filter(attempts__lt=CrawlJob.MAX_ATTEMPTS).update(status=CrawlJob.Status.PENDING, error=error)
+                + expired.update(status=CrawlJob.Status.FAILED, error=error, finished_at=timezone.now()))
+
+    def _save_outcome(self, update_fields):
+        # once its lease expired the job may have been claimed again; only the latest attempt records its outcome
+        return CrawlJob.objects.filter(pk=self.pk, attempts=self.attempts).update(
+            **{field: getattr(self, field) for field in update_fields}
+        )
+
+    def finish(self, result=None):
+        self.status = self.Status.DONE
+        self.result = result
+        self.error = None
+        self.finished_at = timezone.now()
+        self._save_outcome(['status', 'result', 'error', 'finished_at'])
+
+    def fail(self, error):
+        self.status = self.Status.PENDING if self.attempts < self.MAX_ATTEMPTS else self.Status.FAILED
+        self.error = error
+        self.finished_at = timezone.now()
+        self._save_outcome(['status', 'error', 'finished_at'])
+
+    class Meta:
+        verbose_name = "Crawl Job"
+        verbose_name_plural = "Crawl Jobs"
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['kind', 'target', '-created_at']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'target'], condition=models.Q(status__in=['PENDING', 'RUNNING']),
+                                    name='unique_active_crawl_job'),
+        ]
+
+
+class Enumeration(models.Model):
+    """
+    Every user matching a search, collected past GitHub search's 1,000 result cap.
+
+    The search is split into :class:`EnumerationPartition` s small enough to be read in full, see
+    :mod:`search.enumeration`; the users found are stored as they come, so an interrupted
+    enumeration resumes where it stopped.
+    """
+    class Status(models.TextChoices):
+        RUNNING = 'RUNNING'
+        DONE = 'DONE'
+
+    by = models.CharField(max_length=16)
+    query = models.CharField(max_length=256)
+    kind = models.CharField(max_length=16)
+    github_query = models.CharField(max_length=256)
+    status = models.CharField(choices=Status.choices, max_length=8, default=Status.RUNNING)
+    users = models.ManyToManyField(GitHubUser, related_name='enumerations', blank=True, through='EnumerationUser')
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f'Enumeration(by={self.by}, query={self.query}, status={self.status})'
+
+    @staticmethod
+    def start(by, query, ranges: dict):
+        """Return the running enumeration of the search, or start one covering ``ranges``."""
+        enumeration = Enumeration.objects.filter(by=by, query=query, status=Enumeration.Status.RUNNING).first()
+        if enumeration is not None:
+            return enumeration
+        kind, github_query = Search(query=query).github_query(query, by)
+        with transaction.atomic():
+            enumeration = Enumeration.objects.create(by=by, query=query, kind=kind, github_query=github_query)
+            enumeration.partitions.create(ranges=ranges)
+        return enumeration
+
+    @staticmethod
+    def latest_finished(by, query):
+        """Return the newest enumeration of the search finished within ``ENUMERATION_MAX_AGE`` seconds."""
+        return (Enumeration.objects
+                .filter(by=by, query=query, status=Enumeration.Status.DONE,
+                        finished_at__gte=timezone.now() - timedelta(seconds=settings.ENUMERATION_MAX_AGE))
+                .order_by('-finished_at')
+                .first())
+
+    def ranked_users(self):
+        """
+        The users found, in GitHub's order for the first partition's results, then in the order of
+        the partitions it was split into, the top results of every partition before the next ones.
+        """
+        return (GitHubUser.objects
+                .filter(enumeration_entries__enumeration=self)
+                .order_by('enumeration_entries__depth', 'enumeration_entries__position', 'login'))
+
+    def add_logins(self, logins, depth=0, start=0):
+        """
+        Store the users found on a results page starting at position ``start`` of a partition ``depth``
+        splits down. A user is kept where they were first found, which is the shallowest partition.
+        """
+        logins = list(dict.fromkeys(logins))
+        GitHubUser.save_logins(logins)
+        users = GitHubUser.objects.in_bulk(logins, field_name='login')
+        EnumerationUser.objects.bulk_create(
+            [EnumerationUser(enumeration=self, user=users[login], depth=depth, position=start + position)
+             for position, login in enumerate(logins) if login in users],
+            ignore_conflicts=True,
+        )
+
+    def finish(self):
+        self.status = self.Status.DONE
+        self.finished_at = timezone.now()
+        self.save(update_fields=['status', 'finished_at'])
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['by', 'query', 'status']),
+        ]
+
+
+class EnumerationUser(models.Model):
+    enumeration = models.ForeignKey(Enumeration, on_delete=models.CASCADE, related_name='entries')
+    user = models.ForeignKey(GitHubUser, on_delete=models.CASCADE, related_name='enumeration_entries',
+                             db_column='githubuser_id')
+    # how often the search was split to find the user, and where they were in those results
+    depth = models.PositiveSmallIntegerField(default=0)
+    position = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f'EnumerationUser(user={str(self.user)}, depth={self.depth}, position={self.position})'
+
+    class Meta:
+        # the table of the plain many-to-many field this replaced
+        db_table = 'search_enumeration_users'
+        unique_together = [('enumeration', 'user')]
+        indexes = [
+            models.Index(fields=['enumeration', 'depth', 'position']),
+        ]
+
+
+class EnumerationPartition(models.Model):
+    class Status(models.TextChoices):
+        PENDING = 'PENDING'
+        SPLIT = 'SPLIT'
+        DONE = 'DONE'
+
+    enumeration = models.ForeignKey(Enumeration, on_delete=models.CASCADE, related_name='partitions')
+    parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='children')
+    # qualifier name -> [low, high], e.g. {"created": ["2007-10-01", "2012-12-31"], "repos": [0, 50]}
+    ranges = models.JSONField()
+    # number of splits from the search to this partition
+    depth = models.PositiveSmallIntegerField(default=0)
+    total_count = models.IntegerField(null=True, blank=True)
+    next_page = models.IntegerField(default=0)
+    truncated = models.BooleanField(default=False)
+    status = models.CharField(choices=Status.choices, max_length=8, default=Status.PENDING)
+
+    def __str__(self):
+        return f'EnumerationPartition(ranges={self.ranges}, status={self.status})'
+
+    @property
+    def qualifiers(self):
+        return ' '.join(f'{name}:{low}..{high}' for name, (low, high) in self.ranges.items())
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['enumeration', 'status']),
+        ]
+
+
+class Search(models.Model):
     class SearchCriteria(models.TextChoices):
         USERNAME = 'NAME'
         LOCATION = 'LOC'
         LANGUAGE = 'LANG'
         PROFESSION = 'PROF'
+        LOCAL = 'LOCL'
 
     query = models.CharField(max_length=256, blank=False, null=False)
     by = models.CharField(choices=SearchCriteria.choices, max_length=4,
                           default=SearchCriteria.PROFESSION)
+    # Searches served by the results views are logged with what they returned and how long it took
+    page = models.PositiveIntegerField(default=1)
+    result_count = models.PositiveIntegerField(null=True, blank=True)
+    page_count = models.PositiveIntegerField(null=True, blank=True)
+    latency = models.FloatField(null=True, blank=True, help_text='Seconds taken to find the results.')
+    created_at = models.DateTimeField(default=timezone.now)
 
-    def __init__(self, *args, **kwargs):
-        models.Model.__init__(self, *args, **kwargs)
-        Github.__init__(self, settings.GITHUB_API_TOKEN)
+    _github = None
+
+    @property
+    def github(self) -> Github:
+        return self._github or get_client()
+
+    def use_client(self, github):
+        """Run this search's queries through ``github`` instead of the process-wide client."""
+        self._github = github
+        return self
 
     @property
     def known_languages(self):
-        if not Language.objects.exists():
-            languages = self.get_known_languages()
-            for language, extensions in languages.items():
-                Language.objects.update_or_create(
-                    name=language,
-                    file_extensions=extensions
-                )
-        return [language.name for language in Language.objects.all()]
+        registry = Language.registry()
+        # crawls insert the languages they find, so the table is not empty before the first sync
+        if not registry.synced:
+            Language.sync(self.get_known_languages())
+            registry = Language.registry()
+        return registry.names
 
     @known_languages.setter
     def known_languages(self, value):
@@ -165,21 +970,17 @@ class Search(models.Model, Github):
 
     @staticmethod
     def reset_known_languages():
-        languages = Language.objects.all()
-        if languages.exists():
-            for language in languages:
-                language.delete()
+        """Forget linguist's list, so it is synced again; languages users write are kept."""
+        with transaction.atomic():
+            Language.objects.filter(user_languages__isnull=True).delete()
+            Language.objects.update(synced_at=None)
+        Language.invalidate_registry()
 
     def update_known_languages(self):
-        languages = self.get_known_languages()
-        for language, extensions in languages.items():
-            Language.objects.update_or_create(
-                name=language,
-                defaults=dict(file_extensions=extensions)
-            )
+        return Language.sync(self.get_known_languages())
 
     def get_known_languages(self):
-        user = self.get_user('github')
+        user = self.github.get_user('github')
         repo = user.get_repo('linguist')
         file = repo.get_contents('lib/linguist/languages.yml')
         content = file.decoded_content.decode('utf-8')
@@ -193,6 +994,42 @@ class Search(models.Model, Github):
     def slug(self):
         return text.slugify(self.query)
 
+    @staticmethod
+    def criteria(by) -> str:
+        """The stored criteria of a search ``by`` as in URLs, e.g. ``'PROF'`` for ``'profession'``."""
+        return {label.lower(): value for value, label in Search.SearchCriteria.choices}[by.lower()]
+
+    @staticmethod
+    def log(by, query, page, result_count, page_count, latency):
+        return Search.objects.create(query=query, by=Search.criteria(by), page=page, result_count=result_count,
+                                     page_count=page_count, latency=latency)
+
+    @staticmethod
+    def popular(since, half_life: timedelta) -> list:
+        """
+        Rank the GitHub searches logged since ``since`` by frequency and recency, most popular first.
+
+        Every logged search of a page counts ``0.5 ** (age / half_life)``, so a page searched every
+        day outranks one searched as often a while ago. Returns ``(by, query, page, score)`` tuples,
+        with ``by`` as in URLs.
+        """
+        today = timezone.localdate()
+        half_life_days = half_life / timedelta(days=1)
+        scores = Counter()
+        for row in (Search.objects
+                    .filter(created_at__gte=since)
+                    .exclude(by=Search.SearchCriteria.LOCAL)
+                    .annotate(day=TruncDate('created_at'))
+                    .values('by', 'query', 'page', 'day')
+                    .annotate(count=Count('pk'))
+                    .order_by()):
+            age = (today - row['day']).days
+            scores[(row['by'], row['query'], row['page'])] += row['count'] * 0.5 ** (age / half_life_days)
+        return [
+            (Search.SearchCriteria(by).label.lower(), query, page, score)
+            for (by, query, page), score in scores.most_common()
+        ]
+
     def get_absolute_url(self):
         kwargs = {
             "query": self.slug,
@@ -201,41 +1038,72 @@ class Search(models.Model, Github):
         }
         return reverse("search:results", kwargs=kwargs)
 
+    @staticmethod
+    def readme_and_description_query(keywords: Iterable):
+        return '+'.join(keywords) + '+in:readme+in:description'
+
+    @staticmethod
+    def username_query(username):
+        return username + ' in:login'
+
+    @staticmethod
+    def location_query(location):
+        return location + ' in:location'
+
+    @staticmethod
+    def language_query(language: Union[Language, str]):
+        if isinstance(language, Language):
+            language = language.name
+        elif not isinstance(language, str):
+            raise ValueError('language has to be a string or a search.models.Language instance')
+        else:
+            language = Language.registry().canonical_name(language) or language
+        return 'language:' + language
+
+    def github_query(self, query, by):
+        """Return what a search by ``by`` looks for on GitHub: ``'users'`` or ``'repositories'``, and the query."""
+        by = by.lower()
+        if by == 'profession':
+            return 'repositories', self.readme_and_description_query(Profession.skills_for(query))
+        if by in ('username', 'location', 'language'):
+            return 'users', getattr(self, f'{by}_query')(query)
+        raise ValueError(f'{by} searches are not sent to GitHub')
+
     def search_in_readme_and_description(self, keywords: Iterable):
-        query = '+'.join(keywords) + '+in:readme+in:description'
-        return self.search_repositories(query, sort='stars', order='desc')
+        return self.github.search_repositories(self.readme_and_description_query(keywords), sort='stars',
+                                               order='desc')
 
     def search_in_topics(self, topics: Iterable):
         query = " ".join([f'topic:{topic}' for topic in topics])
-        return self.search_repositories(query)
+        return self.github.search_repositories(query)
 
     def search_users_by_username(self, username):
-        query = username + ' in:login'
-        return self.search_users(query), GitHubUser
+        return self.github.search_users(self.username_query(username)), GitHubUser
 
     def search_users_by_location(self, location):
-        query = location + ' in:location'
-        return self.search_users(query), GitHubUser
+        return self.github.search_users(self.location_query(location)), GitHubUser
 
     def search_users_by_language(self, language: Union[Language, str]):
-        if isinstance(language, Language):
-            language = language.name
-        elif not isinstance(language, str):
-            raise ValueError('language has to be a string or a search.models.Language instance')
-        query = 'language:' + language
-        return self.search_users(query), GitHubUser
+        return self.github.search_users(self.language_query(language)), GitHubUser
 
     def search_users_by_profession(self, profession):
-        query = list(profession)
-        profession = Profession.objects.filter(name__icontains=profession)
-        if profession.exists():
-            query = profession.first().skills_list
+        query = Profession.skills_for(profession)
         paginated_lists = [
             self.search_in_readme_and_description(query),
             self.search_in_topics(query)
         ]
-        return CombinedPaginatedList(paginated_lists), GitHubRepository
+        return CombinedPaginatedList(paginated_lists, prefetch=settings.SEARCH_PREFETCH_PAGES), GitHubRepository
+
+    def search_users_by_local(self, query, language=None, license_=None, near=None, radius_km=None):
+        users = GitHubUser.search_local(query.replace('-', ' '), language=language, license_=license_, near=near,
+                                        radius_km=radius_km)
+        return QuerySetPaginatedList(users), GitHubUser
 
-    def search(self, query, by):
+    def search(self, query, by, **filters):
         search_fn = getattr(self, f'search_users_by_{by.lower()}')
-        return search_fn(query)
+        return search_fn(query, **filters)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at'], name='search_created_at_idx'),
+        ]
@@ -0,0 +1,28 @@
+from django.test.utils import override_settings
+
+from search.benchmarks.fake_github import FakeGitHub
+from search.utils import clients, response_cache
+
+
+class FakeGitHubMixin:
+    """Point the GitHub clients at a :class:`FakeGitHub` started for the test class."""
+    latency = 0
+
+    @classmethod
+    def setUpClass(cls):
+        cls.fake = FakeGitHub(latency=cls.latency).start()
+        cls.addClassCleanup(cls.fake.stop)
+        settings = override_settings(GITHUB_API_BASE_URL=cls.fake.url, GITHUB_GRAPHQL_URL=f'{cls.fake.url}/graphql',
+                                     GITHUB_BACKEND='rest', GITHUB_CACHE_ENABLED=False,
+                                     SEARCH_BACKGROUND_CRAWL=False, GITHUB_SECONDS_BETWEEN_REQUESTS=None)
+        settings.enable()
+        cls.addClassCleanup(settings.disable)
+        # the clients are process-wide and keep the base URL they were created with
+        cls.addClassCleanup(clients._clients.clear)
+        clients._clients.clear()
+        response_cache._response_cache = None
+        super().setUpClass()
+
+    def setUp(self):
+        super().setUp()
+        self.fake.reset()
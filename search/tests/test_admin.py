@@ -0,0 +1,81 @@
+from unittest import mock
+
+from django.contrib.admin.sites import site
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from search.admin import EstimatedCountPaginator
+from search.models import GitHubRepository, GitHubUser, Language
+
+
+class RepositorySearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Language.objects.get_or_create(name='Python')
+        Language.objects.get_or_create(name='Rust')
+        Language.invalidate_registry()
+        GitHubUser.save_logins(['ada', 'grace'])
+        users = GitHubUser.objects.in_bulk(['ada', 'grace'], field_name='login')
+        for owner, name, description, languages in [
+            ('ada', 'engine', 'Analytical engine notes', ['Python']),
+            ('ada', 'loom', 'Punched cards for the loom', ['Rust']),
+            ('grace', 'compiler', 'A-0 system for the engine', ['Python', 'Rust']),
+            ('grace', 'cobol', None, []),
+        ]:
+            GitHubRepository.objects.create(owner=users[owner], name=name, description=description,
+                                            languages=languages, created_at=timezone.now(), forks_count=0)
+
+    def search(self, term):
+        model_admin = site._registry[GitHubRepository]
+        queryset, may_have_duplicates = model_admin.get_search_results(
+            RequestFactory().get('/'), GitHubRepository.objects.all(), term)
+        self.assertFalse(may_have_duplicates)
+        return sorted(queryset.values_list('name', flat=True))
+
+    def test_matches_name_description_and_owner(self):
+        self.assertEqual(self.search('loom'), ['loom'])
+        self.assertEqual(self.search('engine'), ['compiler', 'engine'])
+        self.assertEqual(self.search('grace'), ['cobol', 'compiler'])
+
+    def test_every_word_must_match(self):
+        self.assertEqual(self.search('grace engine'), ['compiler'])
+        self.assertEqual(self.search('"punched cards"'), ['loom'])
+        self.assertEqual(self.search('ada cobol'), [])
+
+    def test_matches_languages_by_their_canonical_name(self):
+        self.assertEqual(self.search('rust'), ['compiler', 'loom'])
+        self.assertEqual(self.search('python ada'), ['engine'])
+
+
+class EstimatedCountPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        GitHubUser.save_logins([f'user-{number}' for number in range(5)])
+
+    def count(self, queryset):
+        return EstimatedCountPaginator(queryset.order_by('pk'), 2).count
+
+    @override_settings(ADMIN_ESTIMATED_COUNT_THRESHOLD=1000)
+    def test_large_tables_use_the_estimate(self):
+        with mock.patch('search.admin.estimated_count', return_value=250_000):
+            self.assertEqual(self.count(GitHubUser.objects.all()), 250_000)
+            # filtered changelists are counted exactly
+            self.assertEqual(self.count(GitHubUser.objects.filter(login__startswith='user-')), 5)
+
+    @override_settings(ADMIN_ESTIMATED_COUNT_THRESHOLD=1000)
+    def test_small_and_unanalyzed_tables_are_counted(self):
+        with mock.patch('search.admin.estimated_count', return_value=999):
+            self.assertEqual(self.count(GitHubUser.objects.all()), 5)
+        with mock.patch('search.admin.estimated_count', return_value=None):
+            self.assertEqual(self.count(GitHubUser.objects.all()), 5)
+
+    @override_settings(ADMIN_ESTIMATED_COUNT_THRESHOLD=1)
+    def test_estimate_comes_from_the_planner(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {GitHubUser._meta.db_table}')
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.count(GitHubUser.objects.all()), 5)
+        self.assertEqual(len(queries), 1)
+        self.assertIn('pg_class', queries[0]['sql'])
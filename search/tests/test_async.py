@@ -0,0 +1,107 @@
+import asyncio
+import tempfile
+import threading
+
+import httpx
+from django.core.cache import caches
+from django.test import SimpleTestCase
+from github.GithubException import GithubException, UnknownObjectException
+
+from search.tests.fake import FakeGitHubMixin
+from search.utils.async_client import AsyncGitHubClient
+from search.utils.response_cache import ResponseCache
+from search.utils.results_cache import ResultsCache
+
+
+class ResultsCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.results_cache = ResultsCache('search_results', lock_timeout=5, poll_interval=0.01)
+        caches['search_results'].clear()
+
+    def test_location_searches_are_keyed_by_what_was_typed(self):
+        # GitHub is searched for the typed text, so spellings of the same place find different users
+        self.assertNotEqual(ResultsCache.key('location', 'sf', 1), ResultsCache.key('location', 'san-francisco', 1))
+        self.assertEqual(ResultsCache.key('location', 'San Francisco', 1),
+                         ResultsCache.key('location', 'san-francisco', 1))
+
+    def test_concurrent_misses_share_one_fetch(self):
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return {'logins': ['ada']}
+
+        async def fetch_twice():
+            return await asyncio.gather(*[self.results_cache.aget_or_fetch('search:results:test', fetch)
+                                          for _ in range(2)])
+
+        self.assertEqual(asyncio.run(fetch_twice()), [{'logins': ['ada']}] * 2)
+        self.assertEqual(len(calls), 1)
+
+    def test_event_loops_do_not_share_tasks(self):
+        started = threading.Event()
+        results, errors = [], []
+
+        async def fetch():
+            started.set()
+            await asyncio.sleep(0.2)
+            return {'logins': ['ada']}
+
+        def run():
+            try:
+                results.append(asyncio.run(self.results_cache.aget_or_fetch('search:results:test', fetch)))
+            except Exception as exception:
+                errors.append(exception)
+
+        first = threading.Thread(target=run)
+        first.start()
+        started.wait(1)
+        second = threading.Thread(target=run)
+        second.start()
+        first.join()
+        second.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(results, [{'logins': ['ada']}] * 2)
+
+
+class AsyncResponseCacheTests(SimpleTestCase):
+    def test_afetch_stores_and_serves_responses(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        cache = ResponseCache(directory.name, max_bytes=1024 * 1024, ttls={}, default_ttl=60)
+        url = 'https://api.github.com/users/octocat'
+        sent = []
+
+        async def send(headers):
+            sent.append(headers)
+            return httpx.Response(200, json={'login': 'octocat'}, headers={'ETag': '"a"'})
+
+        async def fetch_twice():
+            await cache.afetch('GET', url, {'Accept': 'application/json'}, send)
+            return await cache.afetch('GET', url, {'Accept': 'application/json'}, send)
+
+        response = asyncio.run(fetch_twice())
+        self.assertEqual(len(sent), 1)
+        self.assertEqual(response.read(), '{"login":"octocat"}')
+
+
+class AsyncGitHubClientTests(FakeGitHubMixin, SimpleTestCase):
+    def test_get_user(self):
+        async def get_user():
+            return await AsyncGitHubClient().get_user('bench-12')
+
+        user = asyncio.run(get_user())
+        self.assertEqual((user.login, user.public_repos), ('bench-12', 12))
+
+    def test_errors(self):
+        async def get(path):
+            return await AsyncGitHubClient().get(path)
+
+        with self.assertRaises(UnknownObjectException):
+            asyncio.run(get('/nowhere'))
+        self.fake.failure = (502, b'<html><body>Bad Gateway</body></html>')
+        with self.assertRaises(GithubException) as raised:
+            asyncio.run(get('/users/bench-1'))
+        self.assertEqual(raised.exception.status, 502)
+        self.assertIn('Bad Gateway', raised.exception.data['message'])
@@ -0,0 +1,71 @@
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+
+from search.crawl import crawl_user
+from search.management.commands.export_candidates import with_repositories
+from search.models import GitHubRepository, GitHubUser
+from search.tests.fake import FakeGitHubMixin
+
+
+class WithRepositoriesTests(SimpleTestCase):
+    def test_pairs_users_with_their_repositories(self):
+        users = [{'pk': 1}, {'pk': 2}, {'pk': 3}, {'pk': 5}]
+        repositories = [{'owner_id': owner_id, 'name': name}
+                        for owner_id, name in [(1, 'a'), (1, 'b'), (3, 'c'), (4, 'orphan'), (5, 'd')]]
+        pairs = [(user['pk'], [repository['name'] for repository in user_repositories])
+                 for user, user_repositories in with_repositories(iter(users), iter(repositories))]
+        self.assertEqual(pairs, [(1, ['a', 'b']), (2, []), (3, ['c']), (5, ['d'])])
+
+    def test_users_without_any_repositories(self):
+        self.assertEqual(list(with_repositories(iter([{'pk': 1}]), iter([]))), [({'pk': 1}, [])])
+
+
+class CandidatesTests(FakeGitHubMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+
+    def test_round_trip(self):
+        crawl_user('bench-3')
+        crawl_user('bench-5')
+        export = self.directory / 'candidates.jsonl'
+        call_command('export_candidates', str(export), stderr=StringIO())
+        rows = [json.loads(line) for line in export.read_text().splitlines()]
+        self.assertEqual([(row['login'], len(row['repositories'])) for row in rows], [('bench-3', 3), ('bench-5', 5)])
+
+        GitHubRepository.objects.all().delete()
+        GitHubUser.objects.all().delete()
+        self.fake.reset()
+        call_command('import_candidates', str(export), stdout=StringIO())
+        self.assertEqual(GitHubRepository.objects.filter(owner__login='bench-5').count(), 5)
+        self.assertTrue(GitHubUser.objects.get(login='bench-3').fetched_at)
+        # fresh users are not crawled again
+        self.fake.reset()
+        call_command('import_candidates', str(export), stdout=StringIO())
+        self.assertEqual(self.fake.requests, 0)
+
+    def test_export_csv(self):
+        crawl_user('bench-3')
+        export = self.directory / 'candidates.csv'
+        call_command('export_candidates', str(export), stderr=StringIO())
+        header, row = export.read_text().splitlines()
+        self.assertTrue(header.endswith('repository_count,forks_count'))
+        self.assertTrue(row.startswith('bench-3,'))
+
+    def test_profiles_only_fetches_placeholders(self):
+        crawl_user('bench-3')
+        GitHubUser.save_logins(['bench-user-1'])
+        logins = self.directory / 'logins.txt'
+        logins.write_text('bench-3\nbench-user-1\n')
+        self.fake.reset()
+        call_command('import_candidates', str(logins), '--profiles-only', stdout=StringIO())
+        # the profile of the placeholder only, bench-3 is stored already
+        self.assertEqual(self.fake.requests, 1)
+        self.assertFalse(GitHubUser.objects.get(login='bench-user-1').is_placeholder)
@@ -0,0 +1,55 @@
+from collections import Counter
+
+from django.test import TestCase
+
+from search.crawl import crawl_user, fetch_user, save_crawled_user
+from search.models import GitHubRepository, GitHubUser, UserLanguage
+from search.tests.fake import FakeGitHubMixin
+
+
+class RecrawlTests(FakeGitHubMixin, TestCase):
+    def languages(self, login):
+        return dict(UserLanguage.objects.filter(user__login=login).values_list('language__name', 'bytes'))
+
+    def test_recrawl_applies_the_changed_repositories(self):
+        crawl_user('bench-3')
+        languages = self.fake.fixtures['languages']
+        self.assertEqual(self.languages('bench-3'), {name: 3 * size for name, size in languages.items()})
+
+        github_user, github_repos = fetch_user('bench-3', known=GitHubRepository.crawl_state('bench-3'))
+        (changed, _), (unchanged, unchanged_languages), (removed, _) = github_repos
+        save_crawled_user(github_user, [(changed, {'Rust': 1000, 'Python': 10}), (unchanged, unchanged_languages)])
+
+        expected = {name: size for name, size in languages.items()}
+        expected['Python'] += 10
+        expected['Rust'] = 1000
+        self.assertEqual(self.languages('bench-3'), expected)
+        self.assertEqual(list(UserLanguage.objects.filter(user__login='bench-3').order_by('rank')
+                              .values_list('language__name', flat=True)),
+                         [name for name, _ in Counter(expected).most_common()])
+        repositories = GitHubRepository.objects.filter(owner__login='bench-3')
+        self.assertEqual(dict(repositories.values_list('name', 'language_bytes')),
+                         {changed.name: {'Rust': 1000, 'Python': 10}, unchanged.name: languages})
+        self.assertFalse(GitHubRepository.objects.filter(name=removed.name).exists())
+        self.assertEqual(GitHubUser.objects.get(login='bench-3').languages,
+                         ', '.join(GitHubRepository.sort_languages(Counter(expected))))
+
+    def test_recrawl_without_changes_keeps_the_totals(self):
+        crawl_user('bench-3')
+        totals = self.languages('bench-3')
+        crawl_user('bench-3')
+        self.assertEqual(self.languages('bench-3'), totals)
+
+
+class UpdatedTotalsTests(TestCase):
+    def test_only_changed_repositories_are_applied(self):
+        GitHubUser.save_logins(['ada'])
+        user = GitHubUser.objects.get(login='ada')
+        UserLanguage.save_user_languages(user, Counter({'Python': 30, 'C': 5}))
+        previous = {'same': {'Python': 10}, 'changed': {'Python': 20}, 'removed': {'C': 5}}
+        current = {'same': {'Python': 10}, 'changed': {'Python': 15, 'Go': 7}, 'added': {'Go': 1}}
+        self.assertEqual(UserLanguage.updated_totals('ada', previous, current), Counter({'Python': 25, 'Go': 8}))
+
+    def test_first_crawl_sums_the_repositories(self):
+        self.assertEqual(UserLanguage.updated_totals('nobody', {}, {'a': {'C': 1}, 'b': {'C': 2, 'Go': 3}}),
+                         Counter({'C': 3, 'Go': 3}))
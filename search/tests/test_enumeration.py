@@ -0,0 +1,29 @@
+from django.test import SimpleTestCase
+
+from search.enumeration import UPPER_BOUNDS, initial_ranges, split
+
+
+class SplitTests(SimpleTestCase):
+    def test_splits_the_creation_dates_in_disjoint_halves(self):
+        first, second = split({'created': ['2020-01-01', '2020-01-10']}, 'users')
+        self.assertEqual(first, {'created': ['2020-01-01', '2020-01-05']})
+        self.assertEqual(second, {'created': ['2020-01-06', '2020-01-10']})
+
+    def test_moves_to_the_next_dimension_on_a_single_day(self):
+        first, second = split({'created': ['2020-01-01', '2020-01-01']}, 'users')
+        self.assertEqual(first, {'created': ['2020-01-01', '2020-01-01'], 'repos': [0, UPPER_BOUNDS['repos'] // 2]})
+        self.assertEqual(second['repos'], [UPPER_BOUNDS['repos'] // 2 + 1, UPPER_BOUNDS['repos']])
+
+    def test_repositories_split_by_stars(self):
+        first, _ = split({'created': ['2020-01-01', '2020-01-01']}, 'repositories')
+        self.assertIn('stars', first)
+
+    def test_gives_up_when_nothing_can_be_split(self):
+        ranges = {'created': ['2020-01-01', '2020-01-01'], 'stars': [7, 7]}
+        self.assertEqual(split(ranges, 'repositories'), [])
+
+    def test_halves_cover_the_range(self):
+        ranges = initial_ranges()
+        for _ in range(12):
+            ranges = split(ranges, 'users')[1]
+        self.assertEqual(ranges['created'][1], initial_ranges()['created'][1])
@@ -0,0 +1,67 @@
+import time
+
+from django.test import SimpleTestCase
+
+from search.tests.fake import FakeGitHubMixin
+from search.utils.clients import get_client
+from search.utils.fetch import fetch_all, fetch_repositories, get_languages
+
+
+class FetchAllTests(SimpleTestCase):
+    def test_keeps_input_order(self):
+        def slow_square(number):
+            time.sleep(0.01 * (5 - number))
+            return number * number
+
+        self.assertEqual(fetch_all(slow_square, range(5), max_workers=5), [0, 1, 4, 9, 16])
+
+    def test_runs_concurrently(self):
+        started = time.monotonic()
+        fetch_all(lambda _: time.sleep(0.2), range(8), max_workers=8)
+        self.assertLess(time.monotonic() - started, 0.8)
+
+    def test_raises_the_first_error(self):
+        def fail_on_three(number):
+            if number == 3:
+                raise ValueError(number)
+            return number
+
+        with self.assertRaises(ValueError):
+            fetch_all(fail_on_three, range(5))
+
+
+class FetchRepositoriesTests(FakeGitHubMixin, SimpleTestCase):
+    latency = 0.05
+
+    def test_fetches_every_page_and_language(self):
+        user = get_client().get_user('bench-100')
+        self.fake.reset()
+        repositories = fetch_repositories(user, max_workers=8)
+        self.assertEqual(len(repositories), 100)
+        self.assertEqual(len({repository.name for repository, _ in repositories}), 100)
+        # 4 pages of 30 and 100 language lookups
+        self.assertEqual(self.fake.requests, 104)
+        languages = self.fake.fixtures['languages']
+        self.assertTrue(all(repository_languages == languages for _, repository_languages in repositories))
+
+    def test_fans_out(self):
+        user = get_client().get_user('bench-40')
+        started = time.monotonic()
+        fetch_repositories(user, max_workers=8)
+        # 42 requests of 50ms each take over 2s one after the other
+        self.assertLess(time.monotonic() - started, 1.5)
+
+    def test_reuses_the_languages_of_unchanged_repositories(self):
+        user = get_client().get_user('bench-10')
+        repositories = fetch_repositories(user)
+        known = {repository.name: (repository.pushed_at, repository.updated_at, {'Cobol': 1})
+                 for repository, _ in repositories[:6]}
+        self.fake.reset()
+        repositories = {repository.name: languages for repository, languages in fetch_repositories(user, known=known)}
+        # one page and the languages of the 4 repositories not known
+        self.assertEqual(self.fake.requests, 5)
+        self.assertEqual(sum(languages == {'Cobol': 1} for languages in repositories.values()), 6)
+
+    def test_get_languages_drops_non_counts(self):
+        repository = get_client().get_user('bench-1').get_repos().get_page(0)[0]
+        self.assertTrue(all(isinstance(size, int) for size in get_languages(repository).values()))
@@ -0,0 +1,74 @@
+from django.test import SimpleTestCase
+
+from search.utils.gazetteer import bounding_box, fold, haversine_km, locate
+
+
+class LocateTests(SimpleTestCase):
+    def assertLocates(self, location, name, country):
+        place = locate(location)
+        self.assertIsNotNone(place, location)
+        self.assertEqual((place.name, place.country), (name, country), location)
+
+    def test_plain_names(self):
+        self.assertLocates('Berlin', 'Berlin', 'DE')
+        self.assertLocates('  são paulo ', 'São Paulo', 'BR')
+
+    def test_aliases_and_noise(self):
+        self.assertLocates('SF', 'San Francisco', 'US')
+        self.assertLocates('Greater London Area', 'London', 'GB')
+        self.assertLocates('NYC', 'New York', 'US')
+
+    def test_qualifiers(self):
+        self.assertLocates('Berlin, Germany', 'Berlin', 'DE')
+        self.assertLocates('Berlin Germany', 'Berlin', 'DE')
+        self.assertLocates('San Francisco, CA', 'San Francisco', 'US')
+
+    def test_qualifiers_pick_between_places_of_the_same_name(self):
+        self.assertLocates('Cambridge, UK', 'Cambridge', 'GB')
+        self.assertLocates('Cambridge, MA', 'Cambridge', 'US')
+
+    def test_state_codes_and_names(self):
+        self.assertLocates('Seattle, WA', 'Seattle', 'US')
+        self.assertLocates('Perth, WA', 'Perth', 'AU')
+        self.assertLocates('Perth, Western Australia', 'Perth', 'AU')
+        self.assertLocates('Toronto, ON', 'Toronto', 'CA')
+        self.assertLocates('Hyderabad, Telangana', 'Hyderabad', 'IN')
+        self.assertLocates('Brooklyn, NY', 'New York', 'US')
+
+    def test_qualifiers_rule_out_places_of_the_same_name_elsewhere(self):
+        for location in ['Paris, TX', 'Paris, Texas', 'Athens, GA', 'Dublin, OH', 'Amsterdam, NY', 'Moscow, ID',
+                         'Berlin, Japan']:
+            self.assertIsNone(locate(location), location)
+
+    def test_state_codes_are_not_places(self):
+        for location in ['Rochester, NY', 'Buffalo, NY', 'Albany, NY', 'Baton Rouge, LA', 'New Orleans, LA',
+                         'Shreveport, LA', 'Somewhere, SF', 'Albany, New York']:
+            self.assertIsNone(locate(location), location)
+        self.assertLocates('SF', 'San Francisco', 'US')
+        self.assertLocates('New York, NY', 'New York', 'US')
+        self.assertLocates('Washington, DC', 'Washington', 'US')
+
+    def test_unknown_places(self):
+        self.assertIsNone(locate(''))
+        self.assertIsNone(locate(None))
+        self.assertIsNone(locate('Earth'))
+
+    def test_fold(self):
+        self.assertEqual(fold(' Zürich-Oerlikon  St. '), 'zurich oerlikon st')
+
+
+class DistanceTests(SimpleTestCase):
+    def test_haversine(self):
+        # Berlin to Paris
+        self.assertAlmostEqual(haversine_km(52.52, 13.405, 48.8566, 2.3522), 878, delta=5)
+
+    def test_bounding_box_contains_the_radius(self):
+        min_latitude, max_latitude, min_longitude, max_longitude = bounding_box(52.52, 13.405, 100)
+        self.assertAlmostEqual(haversine_km(52.52, 13.405, max_latitude, 13.405), 100, delta=0.1)
+        self.assertAlmostEqual(haversine_km(52.52, 13.405, 52.52, max_longitude), 100, delta=1)
+        self.assertLess(min_latitude, 52.52)
+        self.assertLess(min_longitude, 13.405)
+
+    def test_bounding_box_near_the_poles_spans_every_longitude(self):
+        _, _, min_longitude, max_longitude = bounding_box(89.9, 0, 100)
+        self.assertEqual((min_longitude, max_longitude), (-180, 180))
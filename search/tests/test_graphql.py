@@ -0,0 +1,29 @@
+from django.test import SimpleTestCase
+from github.GithubException import GithubException, UnknownObjectException
+
+from search.tests.fake import FakeGitHubMixin
+from search.utils.graphql import GraphQLClient
+
+
+class GraphQLClientTests(FakeGitHubMixin, SimpleTestCase):
+    def test_fetches_the_user_with_every_repository(self):
+        user, repositories = GraphQLClient().fetch_user('bench-250')
+        self.assertEqual((user.login, user.public_repos), ('bench-250', 250))
+        self.assertEqual(len({repository.name for repository, _ in repositories}), 250)
+        # pages of 100 repositories
+        self.assertEqual(self.fake.requests, 3)
+        repository, languages = repositories[0]
+        self.assertEqual(languages, self.fake.fixtures['languages'])
+        self.assertEqual(repository.license.name, 'MIT License')
+        self.assertEqual(repository.topics, self.fake.fixtures['repository']['topics'])
+
+    def test_unknown_users(self):
+        with self.assertRaises(UnknownObjectException):
+            GraphQLClient().fetch_user('ghost')
+
+    def test_errors_without_a_json_body(self):
+        self.fake.failure = (502, b'<html><body>Bad Gateway</body></html>')
+        with self.assertRaises(GithubException) as raised:
+            GraphQLClient().fetch_user('bench-1')
+        self.assertEqual(raised.exception.status, 502)
+        self.assertIn('Bad Gateway', raised.exception.data['message'])
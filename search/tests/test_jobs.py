@@ -0,0 +1,48 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from search.jobs import ensure_job
+from search.models import CrawlJob
+
+
+class CrawlJobTests(TestCase):
+    def test_targets_are_case_insensitive(self):
+        job = CrawlJob.enqueue(CrawlJob.Kind.USER, 'OctoCat')
+        self.assertEqual(job.target, 'octocat')
+        self.assertEqual(ensure_job(CrawlJob.Kind.USER, 'octocat'), job)
+        self.assertEqual(CrawlJob.objects.count(), 1)
+
+    def test_claim_takes_a_lease(self):
+        CrawlJob.enqueue(CrawlJob.Kind.USER, 'octocat')
+        job = CrawlJob.claim()
+        self.assertEqual((job.status, job.attempts), (CrawlJob.Status.RUNNING, 1))
+        self.assertIsNotNone(job.heartbeat_at)
+        self.assertIsNone(CrawlJob.claim())
+
+    def test_only_expired_leases_are_requeued(self):
+        for login in ['alive', 'dead', 'dead-for-good']:
+            CrawlJob.enqueue(CrawlJob.Kind.USER, login)
+        alive, dead, dead_for_good = CrawlJob.claim(), CrawlJob.claim(), CrawlJob.claim()
+        long_ago = timezone.now() - timedelta(minutes=5)
+        CrawlJob.objects.filter(pk__in=[alive.pk, dead.pk, dead_for_good.pk]).update(started_at=long_ago,
+                                                                                     heartbeat_at=long_ago)
+        CrawlJob.objects.filter(pk=dead_for_good.pk).update(attempts=CrawlJob.MAX_ATTEMPTS)
+        CrawlJob.renew_leases([alive])
+
+        self.assertEqual(CrawlJob.expire_leases(timedelta(minutes=1)), 2)
+        statuses = dict(CrawlJob.objects.values_list('target', 'status'))
+        self.assertEqual(statuses, {'alive': CrawlJob.Status.RUNNING, 'dead': CrawlJob.Status.PENDING,
+                                    'dead-for-good': CrawlJob.Status.FAILED})
+
+    def test_a_superseded_attempt_does_not_record_its_outcome(self):
+        CrawlJob.enqueue(CrawlJob.Kind.USER, 'octocat')
+        first = CrawlJob.claim()
+        CrawlJob.objects.filter(pk=first.pk).update(status=CrawlJob.Status.PENDING)
+        second = CrawlJob.claim()
+        first.fail('lost the lease')
+        self.assertEqual(CrawlJob.objects.get().status, CrawlJob.Status.RUNNING)
+        second.finish({'login': 'octocat'})
+        job = CrawlJob.objects.get()
+        self.assertEqual((job.status, job.result), (CrawlJob.Status.DONE, {'login': 'octocat'}))
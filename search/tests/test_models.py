@@ -0,0 +1,151 @@
+from collections import Counter
+from datetime import timedelta
+from types import SimpleNamespace
+
+from django.db.models import ProtectedError
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from search.models import GitHubRepository, GitHubUser, Language, Search, UserLanguage
+
+
+class PopularSearchesTests(TestCase):
+    def log(self, by, query, page=1, days_ago=0, times=1):
+        for _ in range(times):
+            search = Search.log(by, query, page, 30, 10, 0.1)
+            search.created_at = timezone.now() - timedelta(days=days_ago)
+            search.save(update_fields=['created_at'])
+
+    def test_ranks_by_decayed_frequency(self):
+        self.log('profession', 'data-scientist', times=3)
+        self.log('location', 'berlin', days_ago=3, times=4)
+        self.log('username', 'bench', page=2, times=1)
+        ranked = Search.popular(since=timezone.now() - timedelta(days=14), half_life=timedelta(days=3))
+        self.assertEqual([(by, query, page) for by, query, page, _ in ranked],
+                         [('profession', 'data-scientist', 1), ('location', 'berlin', 1), ('username', 'bench', 2)])
+        self.assertAlmostEqual(ranked[1][3], 2)
+
+    def test_skips_local_and_old_searches(self):
+        self.log('local', 'python', times=5)
+        self.log('language', 'python', days_ago=30)
+        self.assertEqual(Search.popular(since=timezone.now() - timedelta(days=14), half_life=timedelta(days=3)), [])
+
+    def test_criteria(self):
+        self.assertEqual(Search.criteria('Profession'), Search.SearchCriteria.PROFESSION)
+
+
+class SaveRepositoriesTests(TestCase):
+    def repository(self, **fields):
+        created_at = timezone.now() - timedelta(days=30)
+        return SimpleNamespace(**{
+            'name': 'engine', 'created_at': created_at, 'description': 'Analytical engine', 'forks_count': 1,
+            'license': None, 'topics': [], 'pushed_at': created_at, 'updated_at': created_at, **fields,
+        })
+
+    def test_saving_again_updates_in_place(self):
+        owner = GitHubUser.objects.create(login='ada', hireable=False, public_repos=1)
+        GitHubRepository.save_repositories([(self.repository(), {'Python': 10})], owner)
+        saved = GitHubRepository.objects.get(owner=owner, name='engine')
+
+        pushed_at = timezone.now()
+        GitHubRepository.save_repositories([(self.repository(
+            description='Difference engine', forks_count=5, license=SimpleNamespace(name='MIT License'),
+            topics=['math'], pushed_at=pushed_at, updated_at=pushed_at,
+        ), {'Rust': 30, 'Python': 20})], owner)
+
+        self.assertEqual(GitHubRepository.objects.filter(owner=owner).count(), 1)
+        repository = GitHubRepository.objects.get(owner=owner, name='engine')
+        self.assertEqual(repository.pk, saved.pk)
+        self.assertEqual(repository.description, 'Difference engine')
+        self.assertEqual(repository.forks_count, 5)
+        self.assertEqual(repository.license, 'MIT License')
+        self.assertEqual(repository.topics, ['math'])
+        self.assertEqual(repository.pushed_at, pushed_at)
+        self.assertEqual(repository.languages, ['Rust', 'Python'])
+        self.assertEqual(repository.language_bytes, {'Rust': 30, 'Python': 20})
+
+    def test_repositories_are_per_owner(self):
+        owners = [GitHubUser.objects.create(login=login, hireable=False, public_repos=1) for login in ['ada', 'grace']]
+        for owner in owners:
+            GitHubRepository.save_repositories([(self.repository(), {})], owner)
+        self.assertEqual(GitHubRepository.objects.filter(name='engine').count(), 2)
+
+
+class SearchQueryTests(SimpleTestCase):
+    def test_location_searches_send_what_was_typed(self):
+        # GitHub matches the free text users wrote, "sf" finds users a canonical "San Francisco" would not
+        self.assertEqual(Search.location_query('sf'), 'sf in:location')
+
+
+class LocalSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        def user(login, bio=None, languages=(), **fields):
+            user = GitHubUser.objects.create(login=login, bio=bio, hireable=False, public_repos=0, **fields)
+            UserLanguage.save_user_languages(user, Counter(dict(languages)))
+            return user
+
+        def repository(owner, name, description, languages, license_=None):
+            return GitHubRepository.objects.create(owner=owner, name=name, description=description, forks_count=0,
+                                                   created_at=timezone.now(), languages=languages, license=license_)
+
+        ada = user('ada', 'Machine learning engineer', [('Python', 100), ('Go', 10)])
+        repository(ada, 'models', 'Neural network models', ['Python'], 'MIT License')
+        grace = user('grace', 'Compiler writer', [('Rust', 100)])
+        repository(grace, 'learner', 'A machine learning toolkit', ['Rust'], 'Apache License 2.0')
+        linus = user('linus', 'Kernel hacker', [('C', 100)])
+        repository(linus, 'kernel', 'An operating system kernel', ['C'], 'MIT License')
+
+    def test_matches_profiles_and_repositories(self):
+        users = GitHubUser.search_local('machine learning')
+        # the profile match ranks above the repository match
+        self.assertEqual([user.login for user in users], ['ada', 'grace'])
+
+    def test_filters(self):
+        self.assertEqual([user.login for user in GitHubUser.search_local('machine learning', language='Rust')],
+                         ['grace'])
+        self.assertEqual([user.login for user in GitHubUser.search_local('machine learning', license_='MIT License')],
+                         ['ada'])
+
+    def test_facets(self):
+        facets = GitHubUser.local_facets(GitHubUser.search_local('machine learning'))
+        self.assertEqual(facets['language'], [('Go', 1), ('Python', 1), ('Rust', 1)])
+        self.assertEqual(facets['license'], [('Apache License 2.0', 1), ('MIT License', 1)])
+
+
+class LanguageRegistryTests(TestCase):
+    def setUp(self):
+        Language.invalidate_registry()
+
+    def test_languages_found_by_crawls_do_not_count_as_synced(self):
+        user = GitHubUser.objects.create(login='ada', hireable=False, public_repos=0)
+        UserLanguage.save_user_languages(user, Counter({'Python': 10}))
+        registry = Language.registry()
+        self.assertEqual(registry.names, ['Python'])
+        self.assertFalse(registry.synced)
+
+    def test_sync(self):
+        Language.sync({'Python': ['.py'], 'Go': ['.go']})
+        registry = Language.registry()
+        self.assertTrue(registry.synced)
+        self.assertEqual(registry.canonical_name('python'), 'Python')
+        self.assertEqual(registry.languages_for_extension('GO'), ['Go'])
+
+    def test_sync_keeps_languages_no_longer_listed(self):
+        Language.sync({'Python': ['.py'], 'Cobol': ['.cbl']})
+        user = GitHubUser.objects.create(login='ada', hireable=False, public_repos=0)
+        UserLanguage.save_user_languages(user, Counter({'Cobol': 10}))
+        self.assertEqual(Language.sync({'Python': ['.py', '.pyi']}), (0, 1))
+        self.assertEqual(sorted(Language.registry().names), ['Cobol', 'Python'])
+        self.assertEqual(user.ranked_languages, ['Cobol'])
+
+    def test_reset_keeps_the_languages_users_write(self):
+        Language.sync({'Python': ['.py'], 'Go': ['.go']})
+        user = GitHubUser.objects.create(login='ada', hireable=False, public_repos=0)
+        UserLanguage.save_user_languages(user, Counter({'Go': 10}))
+        Search.reset_known_languages()
+        registry = Language.registry()
+        self.assertEqual(registry.names, ['Go'])
+        self.assertFalse(registry.synced)
+        with self.assertRaises(ProtectedError):
+            Language.objects.filter(name='Go').delete()
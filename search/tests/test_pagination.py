@@ -0,0 +1,58 @@
+import math
+
+from django.test import SimpleTestCase
+
+from search.utils.pagination import MAX_SEARCH_RESULTS, PER_PAGE, CombinedPaginatedList
+
+
+class FakePaginatedList:
+    def __init__(self, items):
+        self.items = list(items)
+        self.totalCount = len(self.items)
+        self.requested = []
+
+    def get_page(self, page_number):
+        self.requested.append(page_number)
+        return self.items[page_number * PER_PAGE:(page_number + 1) * PER_PAGE]
+
+
+class CombinedPaginatedListTests(SimpleTestCase):
+    def setUp(self):
+        # 3 pages, 1 page and none
+        self.first = FakePaginatedList(f'a{number}' for number in range(2 * PER_PAGE + 5))
+        self.second = FakePaginatedList(f'b{number}' for number in range(PER_PAGE))
+        self.empty = FakePaginatedList([])
+        self.combined = CombinedPaginatedList([self.first, self.second, self.empty])
+
+    def test_page_order_interleaves_uneven_lists(self):
+        self.assertEqual(self.combined.page_order, [(0, 0), (1, 0), (0, 1), (0, 2)])
+        self.assertEqual(self.combined.page_count, 4)
+        self.assertEqual(self.combined.totalCount, 3 * PER_PAGE + 5)
+
+    def test_totals_are_capped_like_github_search(self):
+        combined = CombinedPaginatedList([FakePaginatedList(range(MAX_SEARCH_RESULTS + 500))])
+        self.assertEqual(combined.page_count, math.ceil(MAX_SEARCH_RESULTS / PER_PAGE))
+        self.assertEqual(combined.totalCount, MAX_SEARCH_RESULTS)
+
+    def test_get_page_once_a_list_ran_out(self):
+        self.assertEqual(self.combined.get_page(1)[0], 'b0')
+        # the second list has no second page, the first one goes on alone
+        self.assertEqual(self.combined.get_page(2)[0], f'a{PER_PAGE}')
+        self.assertEqual(self.combined.get_page(3), [f'a{number}' for number in range(2 * PER_PAGE, 2 * PER_PAGE + 5)])
+        self.assertEqual(self.combined.get_page(4), [])
+        self.assertEqual(self.second.requested, [0])
+        self.assertEqual(self.empty.requested, [])
+
+    def test_prefetches_the_following_pages(self):
+        combined = CombinedPaginatedList([self.first, self.second], prefetch=2)
+        combined.get_page(0)
+        combined.get_pages([1, 2])
+        self.assertEqual(sorted(self.first.requested), [0, 1])
+        self.assertEqual(self.second.requested, [0])
+
+    def test_iter_items_skips_duplicates(self):
+        first = FakePaginatedList(['ada', 'grace', 'linus'])
+        second = FakePaginatedList(['Grace', 'guido', 'ada'])
+        combined = CombinedPaginatedList([first, second])
+        self.assertEqual(list(combined.iter_items()), ['ada', 'grace', 'linus', 'Grace', 'guido'])
+        self.assertEqual(list(combined.iter_items(key=str.lower)), ['ada', 'grace', 'linus', 'guido'])
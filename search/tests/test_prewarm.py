@@ -0,0 +1,70 @@
+import tempfile
+from datetime import time
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, TestCase
+
+from search.management.commands.prewarm import in_window, parse_window
+from search.models import Search
+from search.tests.fake import FakeGitHubMixin
+from search.utils.ratelimit import BudgetExceededException, RateLimitScheduler, get_scheduler
+
+
+class WindowTests(SimpleTestCase):
+    def test_parse(self):
+        self.assertEqual(parse_window('02:00-06:30'), (time(2), time(6, 30)))
+        with self.assertRaises(CommandError):
+            parse_window('2am-6am')
+
+    def test_in_window(self):
+        window = parse_window('02:00-06:00')
+        self.assertTrue(in_window(window, time(2)))
+        self.assertTrue(in_window(window, time(5, 59)))
+        self.assertFalse(in_window(window, time(6)))
+        self.assertFalse(in_window(window, time(23)))
+
+    def test_window_spanning_midnight(self):
+        window = parse_window('22:00-04:00')
+        self.assertTrue(in_window(window, time(23)))
+        self.assertTrue(in_window(window, time(1)))
+        self.assertFalse(in_window(window, time(4)))
+        self.assertFalse(in_window(window, time(12)))
+
+
+class BudgetTests(SimpleTestCase):
+    def test_calls_past_the_budget_are_refused(self):
+        scheduler = RateLimitScheduler(tokens=[], max_wait=0, pace_threshold=0, max_pace=0)
+        scheduler.budget = 2
+        scheduler.acquire('core')
+        scheduler.acquire('search')
+        with self.assertRaises(BudgetExceededException):
+            scheduler.acquire('core')
+
+
+class PrewarmTests(FakeGitHubMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        Search.log('username', 'bench', 1, 30, 34, 0.1)
+
+    def shared_caches(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        shared = {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': directory.name}
+        return self.settings(CACHES={**settings.CACHES, settings.SEARCH_RESULTS_CACHE: shared,
+                                     settings.PROFILE_PAGE_CACHE: shared})
+
+    def test_refuses_process_local_caches(self):
+        with self.assertRaisesMessage(CommandError, 'search_results and profile_pages'):
+            call_command('prewarm', '--force')
+
+    def test_stops_within_a_page_once_the_budget_is_spent(self):
+        stdout = StringIO()
+        with self.shared_caches():
+            call_command('prewarm', '--force', '--budget', '5', stdout=stdout)
+        # the page needs the search and its 30 users, only 5 calls are made
+        self.assertEqual(self.fake.requests, 5)
+        self.assertIn('API budget of 5 calls spent.', stdout.getvalue())
+        self.assertIsNone(get_scheduler().budget)
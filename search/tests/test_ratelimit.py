@@ -0,0 +1,112 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+from github.GithubException import RateLimitExceededException
+
+from search.utils.ratelimit import RateLimitScheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class FakeCondition:
+    """Waiting moves the fake clock instead of blocking."""
+
+    def __init__(self, clock):
+        self.clock = clock
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def wait(self, timeout):
+        self.clock.sleep(timeout)
+
+    def notify_all(self):
+        pass
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers):
+        self.status_code = status_code
+        self.headers = headers
+
+
+class RateLimitSchedulerTests(SimpleTestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch('search.utils.ratelimit.time', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.scheduler = RateLimitScheduler(tokens=['a', 'b'], max_wait=60, pace_threshold=0, max_pace=0)
+        self.scheduler._condition = FakeCondition(self.clock)
+
+    def quota(self, token, remaining, reset_in, resource='core'):
+        self.scheduler.update(token, resource, {'x-ratelimit-remaining': str(remaining),
+                                                'x-ratelimit-reset': str(self.clock.now + reset_in)})
+
+    def test_resources(self):
+        self.assertEqual(RateLimitScheduler.resource('https://api.github.com/search/users?q=x'), 'search')
+        self.assertEqual(RateLimitScheduler.resource('https://api.github.com/graphql'), 'graphql')
+        self.assertEqual(RateLimitScheduler.resource('https://api.github.com/users/ada'), 'core')
+
+    def test_picks_the_token_with_the_most_calls_left(self):
+        self.quota('a', 5, 600)
+        self.quota('b', 50, 600)
+        self.assertEqual(self.scheduler.acquire('core'), 'b')
+        self.assertEqual(self.scheduler.stats()['remaining'], {'0:core': 5, '1:core': 49})
+
+    def test_quotas_are_per_resource(self):
+        self.quota('a', 0, 600, resource='search')
+        self.quota('b', 0, 600, resource='search')
+        self.assertIn(self.scheduler.acquire('core'), ['a', 'b'])
+
+    def test_waits_for_the_earliest_reset(self):
+        self.quota('a', 0, 30)
+        self.quota('b', 0, 45)
+        self.assertEqual(self.scheduler.acquire('core'), 'a')
+        self.assertGreaterEqual(self.clock.now - 1_000_000, 30)
+        self.assertEqual(self.scheduler.stats()['waits'], 1)
+
+    def test_rejects_calls_that_would_wait_past_max_wait(self):
+        self.quota('a', 0, 120)
+        self.quota('b', 0, 90)
+        with self.assertRaises(RateLimitExceededException):
+            self.scheduler.acquire('core')
+        self.assertEqual(self.clock.now, 1_000_000)
+        self.assertEqual(self.scheduler.stats()['rejections'], 1)
+
+    def test_retries_an_exhausted_token_on_another_one(self):
+        self.quota('a', 10, 600)
+        self.quota('b', 5, 600)
+        sent = []
+
+        def send(headers):
+            sent.append(headers['Authorization'])
+            if headers['Authorization'] == 'token a':
+                return FakeResponse(403, {'x-ratelimit-remaining': '0',
+                                          'x-ratelimit-reset': str(self.clock.now + 600)})
+            return FakeResponse(200, {'x-ratelimit-remaining': '4', 'x-ratelimit-reset': str(self.clock.now + 600)})
+
+        response = self.scheduler.send('https://api.github.com/users/ada', {}, send)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sent, ['token a', 'token b'])
+
+    def test_forbidden_responses_with_quota_left_are_not_retried(self):
+        def send(headers):
+            return FakeResponse(403, {'x-ratelimit-remaining': '10', 'x-ratelimit-reset': str(self.clock.now + 600)})
+
+        self.assertEqual(self.scheduler.send('https://api.github.com/users/ada', {}, send).status_code, 403)
@@ -0,0 +1,61 @@
+import tempfile
+from pathlib import Path
+
+from django.test import SimpleTestCase
+
+from search.utils.response_cache import ResponseCache
+
+
+class ResponseCacheTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        self.cache = ResponseCache(self.directory, max_bytes=1024 * 1024, ttls={'users': 60}, default_ttl=10)
+
+    def disk_size(self):
+        return sum(path.stat().st_size for path in self.directory.glob('*.json'))
+
+    def test_tracks_the_size_on_disk(self):
+        url = 'https://api.github.com/users/octocat'
+        self.cache.set(self.cache.key('GET', url), url, 200, {'ETag': '"a"'}, '{"login": "octocat"}')
+        self.assertEqual(self.cache.stats()['size_bytes'], self.disk_size())
+        self.cache.set(self.cache.key('GET', url), url, 200, {'ETag': '"b"'}, '{"login": "octocat", "id": 1}')
+        self.cache.set(self.cache.key('GET', f'{url}/repos'), url, 200, {}, '[]')
+        self.assertEqual(self.cache.stats()['size_bytes'], self.disk_size())
+
+    def test_refresh_replaces_the_entry(self):
+        url = 'https://api.github.com/users/octocat'
+        key = self.cache.key('GET', url)
+        entry = self.cache.set(key, url, 200, {'ETag': '"a"'}, '{}')
+        entry['stored_at'] -= 120
+        self.cache.refresh(key, entry)
+        self.assertTrue(self.cache.is_fresh(self.cache.get(key)))
+        self.assertEqual([path.suffix for path in self.directory.iterdir()], ['.json'])
+        self.assertEqual(self.cache.stats()['size_bytes'], self.disk_size())
+
+    def test_evicts_the_least_recently_used(self):
+        self.cache.max_bytes = 1000
+        url = 'https://api.github.com/users/'
+        for number in range(10):
+            self.cache.set(self.cache.key('GET', f'{url}{number}'), f'{url}{number}', 200, {}, 'x' * 200)
+        self.assertLessEqual(self.disk_size(), 1000)
+        self.assertEqual(self.cache.stats()['size_bytes'], self.disk_size())
+        self.assertIsNotNone(self.cache.get(self.cache.key('GET', f'{url}9')))
+
+    def test_keys_by_media_type(self):
+        url = 'https://api.github.com/repos/github/linguist/contents/README.md'
+        self.cache.set(self.cache.key('GET', url, 'application/vnd.github.raw'), url, 200, {}, 'raw')
+        _, entry, cached_response, _ = self.cache.prepare('GET', url, {'Accept': 'application/vnd.github+json'})
+        self.assertIsNone(entry)
+        _, _, cached_response, _ = self.cache.prepare('GET', url, {'accept': 'application/vnd.github.raw'})
+        self.assertEqual(cached_response.read(), 'raw')
+
+    def test_revalidates_stale_entries(self):
+        self.cache.ttls['users'] = 0
+        url = 'https://api.github.com/users/octocat'
+        self.cache.set(self.cache.key('GET', url), url, 200, {'ETag': '"a"', 'Last-Modified': 'yesterday'}, '{}')
+        _, entry, cached_response, headers = self.cache.prepare('GET', url, {})
+        self.assertIsNone(cached_response)
+        self.assertEqual(entry['etag'], '"a"')
+        self.assertEqual(headers, {'If-None-Match': '"a"', 'If-Modified-Since': 'yesterday'})
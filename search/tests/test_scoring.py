@@ -0,0 +1,91 @@
+import math
+from datetime import datetime, timezone
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from search.utils import scoring
+from search.utils.scoring import FORKS, HIREABLE, LATEST_CREATED, SECONDS_PER_DAY, VECTOR_SIZE, feature_vector, \
+    rank, score, term_bucket
+
+NOW = 1000 * SECONDS_PER_DAY
+TODAY = 1000
+
+
+def vectors(*rows):
+    """Vectors with the given ``{index: value}`` features and zeros elsewhere."""
+    result = np.zeros((len(rows), VECTOR_SIZE))
+    for row, features in zip(result, rows):
+        for index, value in features.items():
+            row[index] = value
+    return result
+
+
+class FeatureVectorTests(SimpleTestCase):
+    def test_features(self):
+        created_at = datetime(2020, 5, 17, tzinfo=timezone.utc)
+        vector = feature_vector([
+            ('Python web framework, python all the way', ['Python'], ['django'], 3, created_at),
+            (None, ['Python', 'C++'], None, None, None),
+            ('Notes', [], [], 4, datetime(2019, 1, 1, tzinfo=timezone.utc)),
+        ], bio='Pythonista and python developer', hireable=True)
+        self.assertEqual(len(vector), VECTOR_SIZE)
+        # mentioned by the bio and two repositories, each counted once
+        self.assertAlmostEqual(vector[term_bucket('python')], math.log1p(3))
+        self.assertAlmostEqual(vector[term_bucket('c++')], math.log1p(1))
+        self.assertAlmostEqual(vector[FORKS], math.log1p(7))
+        self.assertAlmostEqual(vector[LATEST_CREATED], created_at.timestamp() / SECONDS_PER_DAY)
+        self.assertEqual(vector[HIREABLE], 1.0)
+
+    def test_users_without_anything(self):
+        self.assertEqual(feature_vector([]), [0.0] * VECTOR_SIZE)
+
+
+class ScoreTests(SimpleTestCase):
+    def test_each_component_is_weighted(self):
+        python = term_bucket('python')
+        scores = score(vectors(
+            {python: 2.0},
+            {python: 1.0},
+            {FORKS: 5.0},
+            {LATEST_CREATED: TODAY},
+            {LATEST_CREATED: TODAY - scoring.RECENCY_DAYS},
+            {HIREABLE: 1.0},
+            {},
+        ), ['Python'], now=NOW)
+        expected = [scoring.SKILL_WEIGHT, scoring.SKILL_WEIGHT / 2, scoring.FORKS_WEIGHT, scoring.RECENCY_WEIGHT,
+                    scoring.RECENCY_WEIGHT / math.e, scoring.HIREABLE_WEIGHT, 0]
+        np.testing.assert_allclose(scores, expected)
+
+    def test_skills_of_several_terms_share_their_weight(self):
+        rows = vectors({term_bucket('machine'): 1.0}, {term_bucket('machine'): 1.0, term_bucket('learning'): 1.0})
+        np.testing.assert_allclose(score(rows, ['machine learning'], now=NOW),
+                                   [scoring.SKILL_WEIGHT / 2, scoring.SKILL_WEIGHT])
+
+    def test_all_components_together_score_one(self):
+        row = {term_bucket('rust'): 1.0, FORKS: 1.0, LATEST_CREATED: TODAY, HIREABLE: 1.0}
+        np.testing.assert_allclose(score(vectors(row), ['rust'], now=NOW), [1.0])
+
+    def test_no_vectors(self):
+        self.assertEqual(len(score(np.zeros((0, VECTOR_SIZE)), ['rust'])), 0)
+
+
+class RankTests(SimpleTestCase):
+    def test_best_candidates_first(self):
+        python = term_bucket('python')
+        rows = vectors({HIREABLE: 1.0}, {python: 1.0, HIREABLE: 1.0}, {python: 1.0}, {})
+        self.assertEqual(list(rank(rows, ['python'], now=NOW)), [1, 2, 0, 3])
+
+    def test_ties_keep_their_order(self):
+        rows = vectors({}, {HIREABLE: 1.0}, {}, {HIREABLE: 1.0}, {})
+        self.assertEqual(list(rank(rows, ['python'], now=NOW)), [1, 3, 0, 2, 4])
+
+    def test_vectors_built_from_repositories(self):
+        created_at = datetime.fromtimestamp(NOW, tz=timezone.utc)
+        rows = np.array([
+            feature_vector([('A Go service', ['Go'], [], 0, created_at)]),
+            feature_vector([('Rust tools', ['Rust'], ['cli'], 0, created_at), (None, ['Rust'], [], 0, None)]),
+            feature_vector([('Rust bindings', ['C'], [], 0, created_at)]),
+        ])
+        self.assertEqual(rows.shape, (3, VECTOR_SIZE))
+        self.assertEqual(list(rank(rows, ['rust'], now=NOW)), [1, 2, 0])
@@ -0,0 +1,180 @@
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from search import views
+from search.models import Enumeration, GitHubRepository, GitHubUser, Search
+from search.tests.fake import FakeGitHubMixin
+
+
+class UserDetailsTests(FakeGitHubMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        for alias in settings.CACHES:
+            caches[alias].clear()
+
+    def test_crawls_the_user_with_their_repositories(self):
+        response = self.client.get(reverse('search:user', kwargs=dict(login='bench-45')))
+        self.assertEqual(response.status_code, 200)
+        user = GitHubUser.objects.get(login='bench-45')
+        self.assertEqual(GitHubRepository.objects.filter(owner=user).count(), 45)
+        self.assertEqual(user.languages, ', '.join(self.fake.fixtures['languages']))
+        # the profile, 2 pages of repositories and their 45 languages
+        self.assertEqual(self.fake.requests, 48)
+        self.assertContains(response, 'bench-45')
+
+    @override_settings(GITHUB_BACKEND='graphql')
+    def test_crawls_through_graphql(self):
+        response = self.client.get(reverse('search:user', kwargs=dict(login='bench-150')))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(GitHubRepository.objects.filter(owner__login='bench-150').count(), 150)
+        self.assertEqual(self.fake.requests, 2)
+
+    def test_serves_fresh_users_from_the_database(self):
+        url = reverse('search:user', kwargs=dict(login='bench-5'))
+        self.client.get(url)
+        self.fake.reset()
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.fake.requests, 0)
+
+    def test_answers_revalidations_with_304(self):
+        url = reverse('search:user', kwargs=dict(login='bench-5'))
+        etag = self.client.get(url).headers['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+
+# a cache backend the async views must not use from the event loop
+@override_settings(CACHES={**settings.CACHES, settings.PROFILE_PAGE_CACHE: {
+    'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'test_profile_pages'}})
+class AsyncUserDetailsTests(FakeGitHubMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        call_command('createcachetable', verbosity=0)
+
+    async def test_renders_and_serves_the_cached_page(self):
+        request = RequestFactory().get(reverse('search:user', kwargs=dict(login='bench-5')))
+        response = await views.auser_details(request, 'bench-5')
+        self.assertEqual(response.status_code, 200)
+        request = RequestFactory().get(request.path, HTTP_IF_NONE_MATCH=response.headers['ETag'])
+        self.assertEqual((await views.auser_details(request, 'bench-5')).status_code, 304)
+
+
+class ResultsTests(FakeGitHubMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        for alias in settings.CACHES:
+            caches[alias].clear()
+
+    def test_username_search(self):
+        response = self.client.get(reverse('search:results', kwargs=dict(by='username', query='bench', page=1)))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'bench-user-0')
+        search = Search.objects.get()
+        self.assertEqual((search.by, search.query, search.page, search.result_count),
+                         (Search.SearchCriteria.USERNAME, 'bench', 1, 30))
+
+    def test_pages_past_the_last_are_not_logged(self):
+        response = self.client.get(reverse('search:results', kwargs=dict(by='username', query='bench', page=99)))
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(Search.objects.exists())
+
+    def test_pages_are_served_from_the_results_cache(self):
+        url = reverse('search:results', kwargs=dict(by='username', query='bench', page=2))
+        self.client.get(url)
+        self.fake.reset()
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(self.fake.requests, 0)
+
+
+class EnumerationResultsTests(FakeGitHubMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        for alias in settings.CACHES:
+            caches[alias].clear()
+        self.enumeration = Enumeration.objects.create(by='username', query='bench', kind='users', github_query='bench')
+        self.enumeration.add_logins(['bench-user-7', 'bench-user-3'])
+        self.enumeration.add_logins(['bench-user-1', 'bench-user-3'], depth=1)
+        self.enumeration.finish()
+
+    def logins(self, response):
+        return list(dict.fromkeys(re.findall(r'/search/results/user/([\w-]+)', response.content.decode())))
+
+    def results(self):
+        return self.client.get(reverse('search:results', kwargs=dict(by='username', query='bench', page=1)))
+
+    def test_serves_the_users_found_in_relevance_order(self):
+        response = self.results()
+        self.assertEqual(self.logins(response), ['bench-user-7', 'bench-user-3', 'bench-user-1'])
+        self.assertNotContains(response, 'href="None"')
+        # found by their login only, the users are fetched when their page is served
+        self.assertEqual(self.fake.requests, 3)
+        self.assertFalse(any(user.is_placeholder for user in GitHubUser.objects.all()))
+
+    @override_settings(ENUMERATION_MAX_AGE=60)
+    def test_stale_enumerations_are_not_served(self):
+        Enumeration.objects.update(finished_at=timezone.now() - timedelta(minutes=2))
+        self.assertIsNone(Enumeration.latest_finished('username', 'bench'))
+        self.assertIn('bench-user-0', self.logins(self.results()))
+
+
+@override_settings(RANKING_CANDIDATE_PAGES=1)
+class ProfessionResultsTests(FakeGitHubMixin, TestCase):
+    # the fake's repository searches find repositories of 50 owners, 30 of them on the first result page
+    def setUp(self):
+        super().setUp()
+        for alias in settings.CACHES:
+            caches[alias].clear()
+
+    def results(self, page):
+        return self.client.get(reverse('search:results', kwargs=dict(by='profession', query='machine-learning',
+                                                                      page=page)))
+
+    def logins(self, response):
+        return list(dict.fromkeys(re.findall(r'/search/results/user/([\w-]+)', response.content.decode())))
+
+    def test_ranks_as_far_as_the_page_needs(self):
+        response = self.results(1)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.logins(response)), 30)
+        # only the owners on the first result page are stored, and only the ones shown are fetched
+        self.assertEqual(GitHubUser.objects.count(), 30)
+        self.assertEqual(GitHubUser.objects.filter(html_url__isnull=True).count(), 0)
+        # a page more than ranked so far is offered
+        self.assertEqual(Search.objects.get().page_count, 2)
+
+    def test_later_pages_extend_the_ranking(self):
+        first_page = self.logins(self.results(1))
+        second_page = self.logins(self.results(2))
+        self.assertEqual(len(second_page), 20)
+        self.assertFalse(set(first_page) & set(second_page))
+        self.assertEqual(GitHubUser.objects.count(), 50)
+        self.assertRedirects(self.results(3), reverse(
+            'search:results', kwargs=dict(by='profession', query='machine-learning', page=1)))
+
+    def test_placeholders_are_fetched_when_shown(self):
+        GitHubUser.save_logins(['bench-owner-1'])
+        self.results(1)
+        self.assertIsNotNone(GitHubUser.objects.get(login='bench-owner-1').html_url)
+
+
+class MetricsTests(TestCase):
+    def test_served_to_allowed_addresses(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 200)
+        with override_settings(METRICS_ALLOWED_IPS=['10.0.0.0/8']):
+            self.assertEqual(self.client.get(reverse('metrics'), REMOTE_ADDR='10.1.2.3').status_code, 200)
+
+    def test_hidden_from_everyone_else(self):
+        self.assertEqual(self.client.get(reverse('metrics'), REMOTE_ADDR='203.0.113.7').status_code, 404)
+
+    def test_served_to_staff(self):
+        self.client.force_login(User.objects.create(username='admin', is_staff=True))
+        response = self.client.get(reverse('metrics'), REMOTE_ADDR='203.0.113.7')
+        self.assertContains(response, 'github_scheduler_waits')
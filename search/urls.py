@@ -1,10 +1,16 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
 app_name = 'search'
 
+if settings.SEARCH_ASYNC_VIEWS:
+    results, user_details = views.aresults, views.auser_details
+else:
+    results, user_details = views.results, views.user_details
+
 urlpatterns = [
     path('', views.index, name='search'),
-    path('results/user/<slug:login>', views.user_details, name='user'),
-    path('results/<slug:by>/<slug:query>/page-<int:page>', views.results, name='results')
+    path('results/user/<slug:login>', user_details, name='user'),
+    path('results/<slug:by>/<slug:query>/page-<int:page>', results, name='results')
 ]
\ No newline at end of file
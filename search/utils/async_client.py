@@ -0,0 +1,144 @@
+import asyncio
+import json
+import math
+import time
+import weakref
+from typing import List, Tuple
+
+import httpx
+from django.conf import settings
+from github.GithubException import GithubException, UnknownObjectException
+from github.NamedUser import NamedUser
+from github.Repository import Repository
+
+from . import metrics
+from .clients import get_client
+from .fetch import known_languages
+from .pagination import MAX_SEARCH_RESULTS, PER_PAGE
+from .ratelimit import get_scheduler
+from .response_cache import CachedResponse, get_response_cache
+
+
+REPOSITORIES_PER_PAGE = 100
+ACCEPT = 'application/vnd.github+json'
+
+_http_clients = weakref.WeakKeyDictionary()
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the keep-alive ``httpx.AsyncClient`` shared by every call made on the running event loop."""
+    loop = asyncio.get_running_loop()
+    http_client = _http_clients.get(loop)
+    if http_client is None:
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=settings.GITHUB_POOL_SIZE,
+                                max_keepalive_connections=settings.GITHUB_POOL_SIZE),
+            headers={'Accept': ACCEPT, 'User-Agent': 'talent-scout'},
+            timeout=15,
+        )
+        _http_clients[loop] = http_client
+    return http_client
+
+
+class AsyncPaginatedList:
+    """
+    Search results fetched page by page through :class:`AsyncGitHubClient`.
+
+    Mirrors the parts of ``github.PaginatedList.PaginatedList`` used by the searches; the total
+    count comes with every page, so it is known after the first page fetched.
+    """
+
+    def __init__(self, client, klass, path, params):
+        self.client = client
+        self.klass = klass
+        self.path = path
+        self.params = params
+        self.totalCount = None
+
+    @property
+    def page_count(self) -> int:
+        return math.ceil(min(self.totalCount, MAX_SEARCH_RESULTS) / PER_PAGE)
+
+    async def get_page(self, page_number: int) -> list:
+        data = await self.client.get(self.path, {**self.params, 'per_page': PER_PAGE, 'page': page_number + 1})
+        self.totalCount = data['total_count']
+        return [self.client.wrap(self.klass, item) for item in data['items']]
+
+
+class AsyncGitHubClient:
+    """
+    Non-blocking counterpart of the process-wide PyGithub client for the async views.
+
+    Calls share the event loop's pooled ``httpx.AsyncClient`` and go through the token scheduler
+    and the response cache like the synchronous ones. Every client is meant for one request or
+    crawl and lets at most ``max_concurrency`` (``GITHUB_MAX_WORKERS``) of its calls run at once.
+    Results are wrapped into PyGithub objects, so the models save them unchanged.
+    """
+
+    def __init__(self, max_concurrency=None):
+        self.base_url = settings.GITHUB_API_BASE_URL
+        self.semaphore = asyncio.Semaphore(max_concurrency or settings.GITHUB_MAX_WORKERS)
+        self.http = get_http_client()
+
+    @staticmethod
+    def wrap(klass, data):
+        return get_client().create_from_raw_data(klass, data)
+
+    async def get(self, path, params=None):
+        url = httpx.URL(f'{self.base_url}{path}', params=params)
+
+        async def request(headers):
+            started = time.monotonic()
+            response = await self.http.get(url, headers=headers)
+            metrics.record_github_call(str(url), response, time.monotonic() - started)
+            return response
+
+        async def send(headers):
+            return await get_scheduler().asend(str(url), headers, request)
+
+        async with self.semaphore:
+            cache = get_response_cache()
+            if cache is None:
+                response = await send({'Accept': ACCEPT})
+            else:
+                response = await cache.afetch('GET', str(url), {'Accept': ACCEPT}, send)
+        if isinstance(response, CachedResponse):
+            metrics.record_github_cache_hit()
+            return json.loads(response.body)
+        if response.status_code != 200:
+            # gateways answer errors with HTML pages
+            try:
+                data = response.json()
+            except ValueError:
+                data = {'message': response.text}
+            exception = UnknownObjectException if response.status_code == 404 else GithubException
+            raise exception(response.status_code, data, dict(response.headers))
+        return response.json()
+
+    async def get_user(self, login) -> NamedUser:
+        return self.wrap(NamedUser, await self.get(f'/users/{login}'))
+
+    async def get_languages(self, repository: Repository) -> dict:
+        languages = await self.get(f'/repos/{repository.full_name}/languages')
+        return {language: size for language, size in languages.items() if isinstance(size, int)}
+
+    async def get_repositories(self, named_user: NamedUser, known: dict = None) -> List[Tuple[Repository, dict]]:
+        """:func:`search.utils.fetch.fetch_repositories` with the pages and languages requested concurrently."""
+        known = known or {}
+        page_count = math.ceil(named_user.public_repos / REPOSITORIES_PER_PAGE)
+        pages = await asyncio.gather(*[
+            self.get(f'/users/{named_user.login}/repos', {'per_page': REPOSITORIES_PER_PAGE, 'page': page})
+            for page in range(1, page_count + 1)
+        ])
+        repositories = [self.wrap(Repository, item) for page in pages for item in page]
+        languages = {repository.name: known_languages(repository, known) for repository in repositories}
+        changed = [repository for repository in repositories if languages[repository.name] is None]
+        fetched = await asyncio.gather(*[self.get_languages(repository) for repository in changed])
+        languages.update(zip((repository.name for repository in changed), fetched))
+        return [(repository, languages[repository.name]) for repository in repositories]
+
+    def search_users(self, query, **qualifiers):
+        return AsyncPaginatedList(self, NamedUser, '/search/users', {'q': query, **qualifiers})
+
+    def search_repositories(self, query, **qualifiers):
+        return AsyncPaginatedList(self, Repository, '/search/repositories', {'q': query, **qualifiers})
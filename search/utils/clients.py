@@ -0,0 +1,31 @@
+import threading
+
+from django.conf import settings
+from github import Github
+from github.Consts import DEFAULT_PER_PAGE
+
+
+_clients = {}
+_client_lock = threading.Lock()
+
+
+def get_client(per_page: int = DEFAULT_PER_PAGE) -> Github:
+    """
+    Return the process-wide GitHub client, one per page size.
+
+    The client is created on first use and shares the pooled keep-alive session of
+    :mod:`search.utils.connections`, so asking for it never touches the network. It carries no
+    token of its own: :mod:`search.utils.ratelimit` picks one from ``GITHUB_API_TOKENS`` for
+    every call.
+    """
+    with _client_lock:
+        client = _clients.get(per_page)
+        if client is None:
+            client = Github(
+                base_url=settings.GITHUB_API_BASE_URL,
+                pool_size=settings.GITHUB_POOL_SIZE,
+                seconds_between_requests=settings.GITHUB_SECONDS_BETWEEN_REQUESTS,
+                per_page=per_page,
+            )
+            _clients[per_page] = client
+        return client
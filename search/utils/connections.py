@@ -0,0 +1,105 @@
+import threading
+import time
+
+import requests
+import requests.adapters
+from django.conf import settings
+from github.Requester import Requester, RequestsResponse
+
+from . import metrics
+from .ratelimit import get_scheduler
+from .response_cache import CachedResponse, get_response_cache
+
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(protocol: str) -> requests.Session:
+    """Return the process-wide keep-alive session used for every GitHub call over ``protocol``."""
+    with _sessions_lock:
+        session = _sessions.get(protocol)
+        if session is None:
+            session = requests.Session()
+            session.auth = Requester.noopAuth
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=settings.GITHUB_POOL_SIZE,
+                pool_maxsize=settings.GITHUB_POOL_SIZE,
+            )
+            session.mount(f'{protocol}://', adapter)
+            _sessions[protocol] = session
+        return session
+
+
+class PooledConnection:
+    """
+    Drop-in replacement for PyGithub's requests based connection classes.
+
+    PyGithub keeps the pending request on the connection object between ``request`` and
+    ``getresponse``, so a connection shared by several threads mixes up their requests.
+    The pending request is kept per thread here, and the underlying session is shared
+    across the process so that concurrent calls reuse open connections.
+    """
+    protocol = 'https'
+    default_port = 443
+
+    def __init__(self, host, port=None, strict=False, timeout=None, retry=None, pool_size=None, **kwargs):
+        self.host = host
+        self.port = port if port else self.default_port
+        self.timeout = timeout
+        self.verify = kwargs.get('verify', True)
+        self.session = get_session(self.protocol)
+        self._pending = threading.local()
+
+    def request(self, verb, url, input, headers, stream=False):
+        self._pending.request = (verb, url, input, headers, stream)
+
+    def getresponse(self):
+        verb, url, input, headers, stream = self._pending.request
+        del self._pending.request
+        url = f'{self.protocol}://{self.host}:{self.port}{url}'
+
+        def request(request_headers):
+            started = time.monotonic()
+            response = self.session.request(
+                verb,
+                url,
+                headers=request_headers,
+                data=input,
+                timeout=self.timeout,
+                verify=self.verify,
+                allow_redirects=False,
+                stream=stream,
+            )
+            metrics.record_github_call(url, response, time.monotonic() - started, stream=stream)
+            return response
+
+        def send(request_headers):
+            return get_scheduler().send(url, request_headers, request)
+
+        cache = get_response_cache()
+        if cache is None or verb != 'GET' or stream:
+            return RequestsResponse(send(headers))
+        response = cache.fetch(verb, url, headers, send)
+        if isinstance(response, CachedResponse):
+            metrics.record_github_cache_hit()
+            return response
+        return RequestsResponse(response)
+
+    def close(self):
+        # The session outlives the connection object; PyGithub closes connections eagerly.
+        pass
+
+
+class PooledHTTPConnection(PooledConnection):
+    protocol = 'http'
+    default_port = 80
+
+
+class PooledHTTPSConnection(PooledConnection):
+    protocol = 'https'
+    default_port = 443
+
+
+def install():
+    Requester.injectConnectionClasses(PooledHTTPConnection, PooledHTTPSConnection)
@@ -0,0 +1,68 @@
+import math
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, List, Tuple
+
+from django.conf import settings
+from github.NamedUser import NamedUser
+from github.Repository import Repository
+
+from .metrics import submit
+from .ratelimit import get_scheduler
+
+
+PER_PAGE = 30
+
+
+def fetch_all(fn: Callable, items: Iterable, max_workers: int = None, resource: str = 'core') -> list:
+    """Apply ``fn`` to ``items`` on a bounded thread pool and return the results in input order."""
+    max_workers = max_workers or settings.GITHUB_MAX_WORKERS
+    scheduler = get_scheduler()
+
+    def paced(item):
+        scheduler.pace(resource)
+        return fn(item)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [submit(executor, paced, item) for item in items]
+        return [future.result() for future in futures]
+
+
+def get_languages(repository: Repository) -> dict:
+    # Newer PyGithub releases add the request ``url`` to the returned mapping.
+    return {
+        language: size
+        for language, size in repository.get_languages().items()
+        if isinstance(size, int)
+    }
+
+
+def known_languages(repository: Repository, known: dict):
+    """
+    Return the languages stored for ``repository`` by the last crawl, or None if it has to be fetched again.
+
+    ``known`` maps repository names to their stored ``(pushed_at, updated_at, languages)``. Pushes are
+    what change a repository's languages, so they are reused as long as both timestamps are unchanged.
+    """
+    pushed_at, updated_at, languages = known.get(repository.name, (None, None, None))
+    if pushed_at is None or repository.pushed_at != pushed_at or repository.updated_at != updated_at:
+        return None
+    return languages
+
+
+def fetch_repositories(named_user: NamedUser, max_workers: int = None,
+                       known: dict = None) -> List[Tuple[Repository, dict]]:
+    """
+    Fetch the repositories of ``named_user`` with their languages.
+
+    Languages are only requested for repositories that are new or changed according to ``known``,
+    see :func:`known_languages`.
+    """
+    known = known or {}
+    paginated_repos = named_user.get_repos()
+    page_count = math.ceil(named_user.public_repos / PER_PAGE)
+    pages = fetch_all(paginated_repos.get_page, range(page_count), max_workers)
+    repos = [repo for page in pages for repo in page]
+    languages = {repo.name: known_languages(repo, known) for repo in repos}
+    changed = [repo for repo in repos if languages[repo.name] is None]
+    languages.update(zip((repo.name for repo in changed), fetch_all(get_languages, changed, max_workers)))
+    return [(repo, languages[repo.name]) for repo in repos]
@@ -0,0 +1,195 @@
+import csv
+import math
+import re
+import unicodedata
+from functools import lru_cache
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+
+GAZETTEER = Path(__file__).resolve().parents[1] / 'data' / 'gazetteer.csv'
+EARTH_RADIUS_KM = 6371.0
+DEFAULT_RADIUS_KM = 50
+# Free-text locations repeat a lot ("Berlin", "San Francisco, CA"), so lookups are memoized.
+LOOKUP_CACHE_SIZE = 50_000
+
+# Qualifiers written after a place name, used to tell places of the same name apart and to reject
+# places in another country, e.g. "Cambridge, UK" or "Paris, Texas".
+COUNTRIES = {
+    'usa': 'US', 'united states': 'US', 'united states of america': 'US', 'america': 'US',
+    'canada': 'CA', 'mexico': 'MX', 'brazil': 'BR', 'brasil': 'BR', 'argentina': 'AR', 'chile': 'CL',
+    'colombia': 'CO', 'peru': 'PE', 'uruguay': 'UY',
+    'uk': 'GB', 'united kingdom': 'GB', 'great britain': 'GB', 'england': 'GB', 'scotland': 'GB',
+    'ireland': 'IE', 'france': 'FR', 'germany': 'DE', 'deutschland': 'DE', 'netherlands': 'NL',
+    'the netherlands': 'NL', 'holland': 'NL', 'belgium': 'BE', 'luxembourg': 'LU', 'switzerland': 'CH',
+    'austria': 'AT', 'czech republic': 'CZ', 'czechia': 'CZ', 'poland': 'PL', 'hungary': 'HU',
+    'romania': 'RO', 'bulgaria': 'BG', 'serbia': 'RS', 'croatia': 'HR', 'slovenia': 'SI', 'greece': 'GR',
+    'turkey': 'TR', 'turkiye': 'TR', 'ukraine': 'UA', 'belarus': 'BY', 'russia': 'RU', 'lithuania': 'LT',
+    'latvia': 'LV', 'estonia': 'EE', 'finland': 'FI', 'sweden': 'SE', 'norway': 'NO', 'denmark': 'DK',
+    'iceland': 'IS', 'spain': 'ES', 'portugal': 'PT', 'italy': 'IT', 'israel': 'IL', 'uae': 'AE',
+    'united arab emirates': 'AE', 'egypt': 'EG', 'nigeria': 'NG', 'kenya': 'KE', 'ghana': 'GH',
+    'south africa': 'ZA', 'morocco': 'MA', 'tunisia': 'TN', 'india': 'IN', 'pakistan': 'PK',
+    'bangladesh': 'BD', 'sri lanka': 'LK', 'nepal': 'NP', 'china': 'CN', 'prc': 'CN', 'taiwan': 'TW',
+    'south korea': 'KR', 'korea': 'KR', 'japan': 'JP', 'singapore': 'SG', 'malaysia': 'MY',
+    'thailand': 'TH', 'vietnam': 'VN', 'viet nam': 'VN', 'indonesia': 'ID', 'philippines': 'PH',
+    'australia': 'AU', 'new zealand': 'NZ',
+}
+# State and province names of the countries where they are commonly written after a city, by the
+# codes the gazetteer uses. The codes are qualifiers as well ("Austin, TX").
+ADMINS = {
+    'US': {
+        'alabama': 'AL', 'alaska': 'AK', 'arizona': 'AZ', 'arkansas': 'AR', 'california': 'CA', 'colorado': 'CO',
+        'connecticut': 'CT', 'delaware': 'DE', 'district of columbia': 'DC', 'florida': 'FL', 'georgia': 'GA',
+        'hawaii': 'HI', 'idaho': 'ID', 'illinois': 'IL', 'indiana': 'IN', 'iowa': 'IA', 'kansas': 'KS',
+        'kentucky': 'KY', 'louisiana': 'LA', 'maine': 'ME', 'maryland': 'MD', 'massachusetts': 'MA',
+        'michigan': 'MI', 'minnesota': 'MN', 'mississippi': 'MS', 'missouri': 'MO', 'montana': 'MT',
+        'nebraska': 'NE', 'nevada': 'NV', 'new hampshire': 'NH', 'new jersey': 'NJ', 'new mexico': 'NM',
+        'new york': 'NY', 'north carolina': 'NC', 'north dakota': 'ND', 'ohio': 'OH', 'oklahoma': 'OK',
+        'oregon': 'OR', 'pennsylvania': 'PA', 'rhode island': 'RI', 'south carolina': 'SC', 'south dakota': 'SD',
+        'tennessee': 'TN', 'texas': 'TX', 'utah': 'UT', 'vermont': 'VT', 'virginia': 'VA', 'washington': 'WA',
+        'west virginia': 'WV', 'wisconsin': 'WI', 'wyoming': 'WY',
+    },
+    'CA': {
+        'alberta': 'AB', 'british columbia': 'BC', 'manitoba': 'MB', 'new brunswick': 'NB', 'newfoundland': 'NL',
+        'nova scotia': 'NS', 'ontario': 'ON', 'prince edward island': 'PE', 'quebec': 'QC', 'saskatchewan': 'SK',
+        'northwest territories': 'NT', 'nunavut': 'NU', 'yukon': 'YT',
+    },
+    'IN': {
+        'andhra pradesh': 'AP', 'arunachal pradesh': 'AR', 'assam': 'AS', 'bihar': 'BR', 'chhattisgarh': 'CG',
+        'goa': 'GA', 'gujarat': 'GJ', 'haryana': 'HR', 'himachal pradesh': 'HP', 'jharkhand': 'JH',
+        'karnataka': 'KA', 'kerala': 'KL', 'madhya pradesh': 'MP', 'maharashtra': 'MH', 'manipur': 'MN',
+        'meghalaya': 'ML', 'mizoram': 'MZ', 'nagaland': 'NL', 'odisha': 'OD', 'punjab': 'PB', 'rajasthan': 'RJ',
+        'sikkim': 'SK', 'tamil nadu': 'TN', 'telangana': 'TG', 'tripura': 'TR', 'uttar pradesh': 'UP',
+        'uttarakhand': 'UK', 'west bengal': 'WB', 'delhi': 'DL', 'chandigarh': 'CH', 'puducherry': 'PY',
+    },
+    'AU': {
+        'new south wales': 'NSW', 'victoria': 'VIC', 'queensland': 'QLD', 'western australia': 'WA',
+        'south australia': 'SA', 'tasmania': 'TAS', 'australian capital territory': 'ACT',
+        'northern territory': 'NT',
+    },
+}
+# name -> (code, country), e.g. 'western australia' -> ('WA', 'AU') but not Washington's WA
+ADMIN_NAMES = {name: (code, country) for country, admins in ADMINS.items() for name, code in admins.items()}
+KNOWN_QUALIFIERS = {
+    *COUNTRIES, *ADMIN_NAMES,
+    *(code.lower() for code in COUNTRIES.values()), *(code.lower() for code, _ in ADMIN_NAMES.values()),
+}
+# Words around a place name that do not change where it is
+NOISE = re.compile(r'^(greater|metro|downtown|central) | (area|metro|metropolitan area|region|city area)$')
+SEPARATORS = re.compile(r'[,/|;()·&]| - | and ')
+
+
+class Place(NamedTuple):
+    name: str
+    admin: str
+    country: str
+    latitude: float
+    longitude: float
+    population: int
+
+    @property
+    def label(self):
+        return ', '.join(part for part in [self.name, self.admin, self.country] if part)
+
+    def matches(self, qualifier):
+        # places without a state, e.g. Paris, FR, only match their country
+        if qualifier == self.country.lower() or self.admin and qualifier == self.admin.lower():
+            return True
+        return ADMIN_NAMES.get(qualifier) == (self.admin, self.country) or COUNTRIES.get(qualifier) == self.country
+
+
+def fold(text) -> str:
+    """Lowercase ``text`` without accents, dots and extra whitespace; hyphens count as spaces."""
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(character for character in text if not unicodedata.combining(character))
+    text = text.lower().replace('.', '').replace('-', ' ').replace('_', ' ')
+    return ' '.join(text.split())
+
+
+def is_qualifier(text):
+    return text in COUNTRIES or text in ADMIN_NAMES or len(text) in (2, 3) and text.isalpha()
+
+
+@lru_cache(maxsize=None)
+def load(path=GAZETTEER) -> dict:
+    """Map every folded name and alias in the gazetteer to its places, most populous first."""
+    index = {}
+    with open(path, encoding='utf-8') as file:
+        for row in csv.DictReader(file):
+            place = Place(row['name'], row['admin'], row['country'], float(row['latitude']),
+                          float(row['longitude']), int(row['population']))
+            names = [row['name'], *filter(None, row['aliases'].split('|'))]
+            for name in dict.fromkeys(fold(name) for name in names):
+                index.setdefault(name, []).append(place)
+    for places in index.values():
+        places.sort(key=lambda place: place.population, reverse=True)
+    return index
+
+
+def pick(places, qualifiers) -> Optional[Place]:
+    """The place of ``places`` that ``qualifiers`` point at, or the most populous if they say nothing."""
+    known = [qualifier for qualifier in qualifiers if is_qualifier(qualifier)]
+    for place in places:
+        if all(place.matches(qualifier) for qualifier in known):
+            return place
+    matching = [place for place in places if any(place.matches(qualifier) for qualifier in known)]
+    if matching:
+        return matching[0]
+    # a known country or state none of the places are in: another place of the same name
+    if any(qualifier in KNOWN_QUALIFIERS for qualifier in known):
+        return None
+    return places[0]
+
+
+@lru_cache(maxsize=LOOKUP_CACHE_SIZE)
+def locate(location) -> Optional[Place]:
+    """
+    Map a free-text location such as ``"SF"``, ``"San Francisco, CA"`` or ``"Greater London Area"``
+    to a gazetteer place, or None.
+
+    The location is split on separators and every part, first to last, is looked up by its longest
+    known prefix whose remaining words are only qualifiers (``"Berlin Germany"``); parts after the
+    first that are qualifiers themselves are not looked up as places. The other parts and
+    the qualifiers pick between places of the same name; if they rule all of them out, the location
+    is another place of that name (``"Amsterdam, NY"``) and None.
+    """
+    if not location:
+        return None
+    index = load()
+    text = fold(location)
+    parts = [part for part in (fold(part) for part in SEPARATORS.split(text)) if part]
+    for position, part in enumerate([text, *parts]):
+        if position > 1 and is_qualifier(part):
+            # the state or country of the part before ("Rochester, NY"), not a place of its own; a
+            # first part named like a state is the city ("New York, NY")
+            continue
+        others = [] if position == 0 else parts[:position - 1] + parts[position:]
+        for variant in dict.fromkeys([part, NOISE.sub('', part)]):
+            words = variant.split()
+            for length in range(len(words), 0, -1):
+                rest = words[length:]
+                if rest and not is_qualifier(' '.join(rest)) and not all(is_qualifier(word) for word in rest):
+                    continue
+                places = index.get(' '.join(words[:length]))
+                if places:
+                    return pick(places, others + ([' '.join(rest)] if rest else []))
+    return None
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """Return ``(min_lat, max_lat, min_lon, max_lon)`` of a box containing every point within ``radius_km``."""
+    delta_latitude = math.degrees(radius_km / EARTH_RADIUS_KM)
+    # longitude degrees shrink towards the poles; near them the box spans every longitude
+    cos_latitude = math.cos(math.radians(latitude))
+    if cos_latitude < 1e-6 or delta_latitude + abs(latitude) >= 90:
+        delta_longitude = 180
+    else:
+        delta_longitude = min(math.degrees(radius_km / (EARTH_RADIUS_KM * cos_latitude)), 180)
+    return latitude - delta_latitude, latitude + delta_latitude, longitude - delta_longitude, longitude + delta_longitude
+
+
+def haversine_km(latitude1, longitude1, latitude2, longitude2):
+    latitude1, longitude1, latitude2, longitude2 = map(math.radians, [latitude1, longitude1, latitude2, longitude2])
+    a = (math.sin((latitude2 - latitude1) / 2) ** 2
+         + math.cos(latitude1) * math.cos(latitude2) * math.sin((longitude2 - longitude1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
@@ -0,0 +1,152 @@
+import time
+from typing import List, Tuple
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.utils.dateparse import parse_datetime
+from github.GithubException import GithubException, UnknownObjectException
+
+from . import metrics
+from .connections import get_session
+from .ratelimit import get_scheduler
+
+
+USER_QUERY = '''
+query($login: String!, $after: String, $pageSize: Int!, $languageCount: Int!) {
+  user(login: $login) {
+    login
+    bio
+    websiteUrl
+    company
+    email
+    isHireable
+    url
+    location
+    name
+    repositories(first: $pageSize, after: $after, ownerAffiliations: OWNER, privacy: PUBLIC,
+                 orderBy: {field: NAME, direction: ASC}) {
+      totalCount
+      pageInfo {
+        hasNextPage
+        endCursor
+      }
+      nodes {
+        name
+        url
+        createdAt
+        pushedAt
+        updatedAt
+        description
+        forkCount
+        licenseInfo {
+          name
+        }
+        repositoryTopics(first: 20) {
+          nodes {
+            topic {
+              name
+            }
+          }
+        }
+        languages(first: $languageCount, orderBy: {field: SIZE, direction: DESC}) {
+          edges {
+            size
+            node {
+              name
+            }
+          }
+        }
+      }
+    }
+  }
+}
+'''
+
+
+class GraphQLLicense:
+    def __init__(self, name):
+        self.name = name
+
+
+class GraphQLUser:
+    # mimic the attributes of github.NamedUser.NamedUser read by GitHubUser.save_named_user
+    def __init__(self, data, public_repos):
+        self.login = data['login']
+        self.bio = data['bio']
+        self.blog = data['websiteUrl']
+        self.company = data['company']
+        self.email = data['email'] or None
+        self.hireable = data['isHireable']
+        self.html_url = data['url']
+        self.location = data['location']
+        self.name = data['name']
+        self.public_repos = public_repos
+
+
+class GraphQLRepository:
+    # mimic the attributes of github.Repository.Repository read by GitHubRepository.save_repositories
+    def __init__(self, data):
+        self.name = data['name']
+        self.html_url = data['url']
+        self.created_at = parse_datetime(data['createdAt'])
+        self.pushed_at = parse_datetime(data['pushedAt']) if data['pushedAt'] else None
+        self.updated_at = parse_datetime(data['updatedAt'])
+        self.description = data['description']
+        self.forks_count = data['forkCount']
+        self.license = GraphQLLicense(data['licenseInfo']['name']) if data['licenseInfo'] else None
+        self.topics = [node['topic']['name'] for node in data['repositoryTopics']['nodes']]
+        self.languages = {edge['node']['name']: edge['size'] for edge in data['languages']['edges']}
+
+
+class GraphQLClient:
+    def __init__(self, url=None):
+        self.url = url or settings.GITHUB_GRAPHQL_URL
+        self.session = get_session(urlparse(self.url).scheme)
+
+    def execute(self, query, variables):
+        def request(headers):
+            started = time.monotonic()
+            response = self.session.post(self.url, json={'query': query, 'variables': variables}, headers=headers)
+            metrics.record_github_call(self.url, response, time.monotonic() - started)
+            return response
+
+        response = get_scheduler().send(self.url, {}, request)
+        if response.status_code != 200:
+            # gateways answer errors with HTML pages
+            try:
+                data = response.json()
+            except ValueError:
+                data = {'message': response.text}
+            raise GithubException(response.status_code, data, dict(response.headers))
+        data = response.json()
+        errors = data.get('errors')
+        if errors:
+            if any(error.get('type') == 'NOT_FOUND' for error in errors):
+                raise UnknownObjectException(404, data, dict(response.headers))
+            raise GithubException(response.status_code, data, dict(response.headers))
+        return data['data']
+
+    def fetch_user(self, login) -> Tuple[GraphQLUser, List[Tuple[GraphQLRepository, dict]]]:
+        """
+        Fetch a profile with all its public repositories, their languages and licenses.
+
+        Repositories come in pages of 100, so a user costs one request per hundred repositories
+        instead of one per repository. The return value has the shape of
+        :func:`search.utils.fetch.fetch_repositories` paired with the user.
+        """
+        variables = {
+            'login': login,
+            'after': None,
+            'pageSize': 100,
+            'languageCount': settings.GITHUB_GRAPHQL_LANGUAGE_COUNT,
+        }
+        repositories = []
+        while True:
+            user = self.execute(USER_QUERY, variables)['user']
+            connection = user['repositories']
+            repositories.extend(GraphQLRepository(node) for node in connection['nodes'])
+            if not connection['pageInfo']['hasNextPage']:
+                break
+            variables['after'] = connection['pageInfo']['endCursor']
+        github_user = GraphQLUser(user, public_repos=connection['totalCount'])
+        return github_user, [(repository, repository.languages) for repository in repositories]
@@ -0,0 +1,212 @@
+import contextvars
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlparse
+
+from django.template.backends import django as django_backend
+
+
+current_metrics = contextvars.ContextVar('current_metrics', default=None)
+
+
+def endpoint(url) -> str:
+    """Reduce a GitHub API URL to its endpoint, e.g. ``/repos/{owner}/{repo}/languages``."""
+    parts = urlparse(url).path.strip('/').split('/')
+    if parts[0] == 'users' and len(parts) > 1:
+        parts[1] = '{login}'
+    elif parts[0] == 'repos' and len(parts) > 2:
+        parts[1:3] = ['{owner}', '{repo}']
+    return '/' + '/'.join(parts)
+
+
+class RequestMetrics:
+    """What serving one request cost: GitHub calls, database queries and template rendering."""
+
+    def __init__(self):
+        self.github_calls = Counter()
+        self.github_cache_hits = 0
+        self.github_bytes = 0
+        self.github_seconds = 0.0
+        self.rate_limit_remaining = {}
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.template_seconds = 0.0
+        # GitHub calls are made from worker threads as well
+        self._lock = threading.Lock()
+
+    def record_github_call(self, url, response, seconds, stream=False):
+        content_length = response.headers.get('content-length')
+        if content_length is not None:
+            size = int(content_length)
+        else:
+            size = 0 if stream else len(response.content)
+        remaining = response.headers.get('x-ratelimit-remaining')
+        with self._lock:
+            self.github_calls[endpoint(url)] += 1
+            self.github_bytes += size
+            self.github_seconds += seconds
+            if remaining is not None:
+                resource = response.headers.get('x-ratelimit-resource', 'core')
+                self.rate_limit_remaining[resource] = int(remaining)
+
+    def record_github_cache_hit(self):
+        with self._lock:
+            self.github_cache_hits += 1
+
+    def record_query(self, seconds):
+        with self._lock:
+            self.db_queries += 1
+            self.db_seconds += seconds
+
+    def record_template(self, seconds):
+        with self._lock:
+            self.template_seconds += seconds
+
+    def as_dict(self):
+        return {
+            'github_calls': sum(self.github_calls.values()),
+            'github_calls_by_endpoint': dict(self.github_calls),
+            'github_cache_hits': self.github_cache_hits,
+            'github_bytes': self.github_bytes,
+            'github_seconds': round(self.github_seconds, 4),
+            'rate_limit_remaining': dict(self.rate_limit_remaining),
+            'db_queries': self.db_queries,
+            'db_seconds': round(self.db_seconds, 4),
+            'template_seconds': round(self.template_seconds, 4),
+        }
+
+
+def record_github_call(url, response, seconds, stream=False):
+    metrics = current_metrics.get()
+    if metrics is not None:
+        metrics.record_github_call(url, response, seconds, stream=stream)
+
+
+def record_github_cache_hit():
+    metrics = current_metrics.get()
+    if metrics is not None:
+        metrics.record_github_cache_hit()
+
+
+def time_query(execute, sql, params, many, context):
+    """Database execute wrapper counting the queries made for the current request."""
+    metrics = current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.monotonic()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.record_query(time.monotonic() - started)
+
+
+def install_query_timer(sender, connection, **kwargs):
+    # connection_created receiver; every thread has its own connection
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_query)
+
+
+def submit(executor, fn, *args):
+    """Submit ``fn`` to ``executor`` in a copy of the current context, so its calls count towards the request."""
+    return executor.submit(contextvars.copy_context().run, fn, *args)
+
+
+class TimedTemplate:
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        started = time.monotonic()
+        try:
+            return self.template.render(context, request)
+        finally:
+            metrics = current_metrics.get()
+            if metrics is not None:
+                metrics.record_template(time.monotonic() - started)
+
+
+class DjangoTemplates(django_backend.DjangoTemplates):
+    """The Django template backend, timing every template rendered by a view."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
+
+
+class MetricsRegistry:
+    """Process-wide totals of the per-request metrics, by view."""
+
+    def __init__(self):
+        self.requests = Counter()
+        self.request_seconds = Counter()
+        self.github_calls = Counter()
+        self.github_cache_hits = Counter()
+        self.github_bytes = Counter()
+        self.github_seconds = Counter()
+        self.db_queries = Counter()
+        self.db_seconds = Counter()
+        self.template_seconds = Counter()
+        self.rate_limit_remaining = {}
+        self._lock = threading.Lock()
+
+    def observe(self, view, status, metrics: RequestMetrics, seconds):
+        with self._lock:
+            self.requests[(view, str(status))] += 1
+            self.request_seconds[view] += seconds
+            for call_endpoint, count in metrics.github_calls.items():
+                self.github_calls[(view, call_endpoint)] += count
+            self.github_cache_hits[view] += metrics.github_cache_hits
+            self.github_bytes[view] += metrics.github_bytes
+            self.github_seconds[view] += metrics.github_seconds
+            self.db_queries[view] += metrics.db_queries
+            self.db_seconds[view] += metrics.db_seconds
+            self.template_seconds[view] += metrics.template_seconds
+            self.rate_limit_remaining.update(metrics.rate_limit_remaining)
+
+    def samples(self):
+        """Yield ``(name, type, help, [(labels, value)])`` for every metric."""
+        with self._lock:
+            yield ('requests_total', 'counter', 'Requests served.',
+                   [({'view': view, 'status': status}, count) for (view, status), count in self.requests.items()])
+            yield ('request_seconds_total', 'counter', 'Time spent serving requests.',
+                   [({'view': view}, value) for view, value in self.request_seconds.items()])
+            yield ('github_calls_total', 'counter', 'GitHub API calls made while serving requests.',
+                   [({'view': view, 'endpoint': call_endpoint}, count)
+                    for (view, call_endpoint), count in self.github_calls.items()])
+            for name, help_text, counter in [
+                ('github_cache_hits_total', 'GitHub API calls answered from the response cache.',
+                 self.github_cache_hits),
+                ('github_bytes_total', 'Bytes received from the GitHub API.', self.github_bytes),
+                ('github_seconds_total', 'Time spent waiting for the GitHub API.', self.github_seconds),
+                ('db_queries_total', 'Database queries made while serving requests.', self.db_queries),
+                ('db_seconds_total', 'Time spent in database queries.', self.db_seconds),
+                ('template_seconds_total', 'Time spent rendering templates.', self.template_seconds),
+            ]:
+                yield name, 'counter', help_text, [({'view': view}, value) for view, value in counter.items()]
+            yield ('github_rate_limit_remaining', 'gauge', 'Rate limit left as last reported by GitHub.',
+                   [({'resource': resource}, value) for resource, value in self.rate_limit_remaining.items()])
+
+
+def render_prometheus(samples, prefix='talentscout_') -> str:
+    def format_labels(labels):
+        if not labels:
+            return ''
+        escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+                   for value in labels.values())
+        return '{' + ','.join(f'{name}="{value}"' for name, value in zip(labels, escaped)) + '}'
+
+    lines = []
+    for name, metric_type, help_text, values in samples:
+        lines.append(f'# HELP {prefix}{name} {help_text}')
+        lines.append(f'# TYPE {prefix}{name} {metric_type}')
+        lines.extend(f'{prefix}{name}{format_labels(labels)} {value}' for labels, value in values)
+    return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
@@ -0,0 +1,103 @@
+import hashlib
+import threading
+from calendar import timegm
+
+from django.conf import settings
+from django.core.cache import caches
+from django.template import loader
+from django.utils.safestring import mark_safe
+
+
+# Bump when the profile or repository card templates change, so pages rendered by older ones are not served.
+TEMPLATE_VERSION = 1
+
+
+class ProfilePageCache:
+    """
+    Rendered profile pages and repository cards kept in a Django cache.
+
+    Pages are keyed by login and ``GitHubUser.changed_at``, which every write to the user or their
+    repositories bumps, so a page is rendered once per crawl and never served stale. Cards are keyed
+    by a hash of what they show, so re-rendering a page after a crawl reuses the cards of the
+    repositories that did not change.
+    """
+
+    def __init__(self, alias):
+        self.alias = alias
+        self.hits = 0
+        self.misses = 0
+        self.card_hits = 0
+        self.card_misses = 0
+        self._lock = threading.Lock()
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    @staticmethod
+    def last_modified(user):
+        """``changed_at`` of ``user`` as a timestamp, or None for rows written before it was tracked."""
+        changed_at = user.profile_changed_at
+        return timegm(changed_at.utctimetuple()) if changed_at is not None else None
+
+    @staticmethod
+    def etag(user):
+        changed_at = user.profile_changed_at
+        if changed_at is None:
+            return None
+        return f'{TEMPLATE_VERSION}-{user.pk}-{int(changed_at.timestamp() * 1_000_000)}'
+
+    def key(self, user):
+        return f'search:profile:{self.etag(user)}'
+
+    def get(self, user):
+        html = self.cache.get(self.key(user)) if self.etag(user) is not None else None
+        self._count('hits' if html is not None else 'misses')
+        return html
+
+    def set(self, user, html):
+        if self.etag(user) is not None:
+            self.cache.set(self.key(user), html)
+
+    @staticmethod
+    def card_key(repository):
+        fields = (TEMPLATE_VERSION, repository.html_url, repository.description, repository.language)
+        return f'search:repository-card:{hashlib.md5(repr(fields).encode("utf-8")).hexdigest()}'
+
+    def render_cards(self, repositories) -> list:
+        """Render the card of every repository, reading and storing all of them in one round trip each."""
+        keys = [self.card_key(repository) for repository in repositories]
+        cards = self.cache.get_many(keys)
+        missing = {}
+        template = loader.get_template('search/repository_card.html')
+        for key, repository in zip(keys, repositories):
+            if key not in cards:
+                missing[key] = cards[key] = template.render({'repo': repository})
+        if missing:
+            self.cache.set_many(missing)
+        with self._lock:
+            self.card_hits += len(keys) - len(missing)
+            self.card_misses += len(missing)
+        return [mark_safe(cards[key]) for key in keys]
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'card_hits': self.card_hits,
+            'card_misses': self.card_misses,
+        }
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+
+_profile_page_cache = None
+
+
+def get_profile_page_cache() -> ProfilePageCache:
+    global _profile_page_cache
+    if _profile_page_cache is None:
+        _profile_page_cache = ProfilePageCache(alias=settings.PROFILE_PAGE_CACHE)
+    return _profile_page_cache
@@ -1,26 +1,59 @@
+import math
+from concurrent.futures import ThreadPoolExecutor
 from github.PaginatedList import PaginatedList
-from typing import List
+from typing import Callable, Iterator, List
+
+from .metrics import submit
+
+PER_PAGE = 30
+# GitHub search only serves the first thousand results of a query.
+MAX_SEARCH_RESULTS = 1000
+
+_page_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='pages')
+
+
+def count_pages(paginated_list) -> int:
+    if hasattr(paginated_list, 'page_count'):
+        return paginated_list.page_count
+    return math.ceil(min(paginated_list.totalCount, MAX_SEARCH_RESULTS) / PER_PAGE)
 
 
 class CombinedPaginatedList:
-    def __init__(self, paginated_lists: List[PaginatedList]):
+    """
+    Interleaves the pages of several search result lists: page 0 of every list, then page 1, and so on.
+
+    Lists drop out of the rotation once they run out of pages. Pages are fetched on a shared
+    thread pool, and after each page the next ``prefetch`` ones are requested in the background;
+    with the GitHub response cache in place this also makes the following request for them cheap.
+    """
+
+    def __init__(self, paginated_lists: List[PaginatedList], prefetch: int = 0):
         self.paginated_lists = paginated_lists
+        self.prefetch = prefetch
+        self._totals = None
         self._page_order = None
-        self.current_page = 0
-        self._max_paginated_list_length = None
-        self._totalCount = None
+        self._pages = {}
+
+    @property
+    def totals(self) -> List[int]:
+        if self._totals is None:
+            futures = [submit(_page_executor, lambda paginated_list: paginated_list.totalCount, paginated_list)
+                       for paginated_list in self.paginated_lists]
+            self._totals = [future.result() for future in futures]
+        return self._totals
 
     def _order_pages(self):
+        page_counts = [math.ceil(min(total, MAX_SEARCH_RESULTS) / PER_PAGE) for total in self.totals]
         return [
             (list_number, page_number)
-            for page_number in range(self.max_paginated_list_length)
-            for list_number in range(self.paginated_list_count)
-            if page_number < (self.paginated_lists[list_number].totalCount / 30)
+            for page_number in range(max(page_counts, default=0))
+            for list_number, page_count in enumerate(page_counts)
+            if page_number < page_count
         ]
 
     @property
     def page_order(self):
-        if not self._page_order:
+        if self._page_order is None:
             self._page_order = self._order_pages()
         return self._page_order
 
@@ -28,20 +61,64 @@ class CombinedPaginatedList:
     def paginated_list_count(self) -> int:
         return len(self.paginated_lists)
 
+    @property
+    def page_count(self) -> int:
+        return len(self.page_order)
+
+    @property
+    def totalCount(self):
+        return sum(min(total, MAX_SEARCH_RESULTS) for total in self.totals)
+
+    def _fetch(self, page_key):
+        future = self._pages.get(page_key)
+        if future is None:
+            list_number, page_number = page_key
+            future = submit(_page_executor, self.paginated_lists[list_number].get_page, page_number)
+            self._pages[page_key] = future
+        return future
+
+    def get_page(self, page_number: int) -> list:
+        if page_number >= self.page_count:
+            return []
+        page = self._fetch(self.page_order[page_number]).result()
+        for page_key in self.page_order[page_number + 1:page_number + 1 + self.prefetch]:
+            self._fetch(page_key)
+        return page
+
+    def get_pages(self, page_numbers) -> List[list]:
+        """Fetch several pages concurrently."""
+        futures = [self._fetch(self.page_order[page_number])
+                   for page_number in page_numbers if page_number < self.page_count]
+        return [future.result() for future in futures]
+
+    def iter_items(self, key: Callable = None) -> Iterator:
+        """Stream the items of every page in order, skipping items whose ``key`` was already seen."""
+        seen = set()
+        for page_number in range(self.page_count):
+            for item in self.get_page(page_number):
+                item_key = key(item) if key is not None else item
+                if item_key in seen:
+                    continue
+                seen.add(item_key)
+                yield item
+
+
+class QuerySetPaginatedList:
+    def __init__(self, queryset, per_page: int = PER_PAGE):
+        self.queryset = queryset
+        self.per_page = per_page
+        self._totalCount = None
+
     @property
     def totalCount(self):
-        if not self._totalCount:
-            self._totalCount = sum(paginated_list.totalCount for paginated_list in self.paginated_lists)
+        if self._totalCount is None:
+            self._totalCount = self.queryset.count()
         return self._totalCount
 
     @property
-    def max_paginated_list_length(self):
-        if not self._max_paginated_list_length:
-            self._max_paginated_list_length = max(paginated_list.totalCount / 30
-                                                  for paginated_list in self.paginated_lists)
-        return self._max_paginated_list_length
+    def page_count(self) -> int:
+        return math.ceil(self.totalCount / self.per_page)
 
     def get_page(self, page_number: int) -> list:
-        page, list_index = divmod(page_number, self.paginated_list_count)
-        paginated_list = self.paginated_lists[list_index]
-        return paginated_list.get_page(page)
+        start = page_number * self.per_page
+        return list(self.queryset[start:start + self.per_page])
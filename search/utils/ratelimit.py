@@ -0,0 +1,182 @@
+import asyncio
+import threading
+import time
+from urllib.parse import urlparse
+
+from django.conf import settings
+from github.GithubException import RateLimitExceededException
+
+
+class BudgetExceededException(RateLimitExceededException):
+    """Raised for calls past the scheduler's :attr:`~RateLimitScheduler.budget`."""
+
+
+class RateLimitScheduler:
+    """
+    Routes GitHub calls across a pool of tokens by remaining quota.
+
+    GitHub limits every token separately per resource (``core``, ``search``, ``graphql``). The
+    scheduler tracks ``X-RateLimit-Remaining``/``X-RateLimit-Reset`` per token and resource, sends
+    each call with the token that has the most headroom, and once every token is exhausted holds
+    the call until the earliest reset instead of letting it fail. Calls that would have to wait
+    longer than ``max_wait`` seconds raise :class:`RateLimitExceededException`. Once ``budget`` is
+    set, only that many more calls are made and later ones raise :class:`BudgetExceededException`.
+    """
+
+    def __init__(self, tokens, max_wait, pace_threshold, max_pace):
+        self.tokens = list(tokens) or [None]
+        self.max_wait = max_wait
+        self.pace_threshold = pace_threshold
+        self.max_pace = max_pace
+        self.budget = None
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.rejections = 0
+        self._state = {}
+        self._condition = threading.Condition()
+
+    @staticmethod
+    def resource(url):
+        path = urlparse(url).path
+        if path.endswith('/graphql'):
+            return 'graphql'
+        if '/search/' in path:
+            return 'search'
+        return 'core'
+
+    def _headroom(self, token, resource, now):
+        remaining, reset = self._state.get((token, resource), (None, 0))
+        if remaining is None or reset <= now:
+            return float('inf'), reset
+        return remaining, reset
+
+    def _record_wait(self, seconds):
+        if seconds > 0:
+            self.waits += 1
+            self.wait_seconds += seconds
+
+    def acquire(self, resource):
+        """Reserve one call on ``resource`` and return the token to make it with."""
+        started = time.monotonic()
+        waited = False
+        with self._condition:
+            if self.budget is not None:
+                if self.budget <= 0:
+                    raise BudgetExceededException(403, {'message': 'GitHub call budget spent'}, None)
+                self.budget -= 1
+            while True:
+                now = time.time()
+                headrooms = {token: self._headroom(token, resource, now) for token in self.tokens}
+                token = max(self.tokens, key=lambda candidate: headrooms[candidate][0])
+                remaining, reset = headrooms[token]
+                if remaining > 0:
+                    if remaining != float('inf'):
+                        self._state[(token, resource)] = (remaining - 1, reset)
+                    if waited:
+                        self._record_wait(time.monotonic() - started)
+                    return token
+                wait = min(reset for _, reset in headrooms.values()) - now
+                if time.monotonic() - started + wait > self.max_wait:
+                    self.rejections += 1
+                    raise RateLimitExceededException(
+                        403, {'message': f'GitHub {resource} rate limit exhausted for every token'}, None
+                    )
+                self._condition.wait(timeout=max(wait, 0.01))
+                waited = True
+
+    def update(self, token, resource, headers):
+        """Record the quota reported by a response made with ``token``."""
+        resource = headers.get('x-ratelimit-resource', resource)
+        remaining = headers.get('x-ratelimit-remaining')
+        reset = headers.get('x-ratelimit-reset')
+        retry_after = headers.get('retry-after')
+        with self._condition:
+            if retry_after is not None:
+                self._state[(token, resource)] = (0, time.time() + float(retry_after))
+            elif remaining is not None and reset is not None:
+                self._state[(token, resource)] = (int(remaining), float(reset))
+            self._condition.notify_all()
+
+    def send(self, url, headers, send):
+        """
+        Make a call through ``send`` with the best token, retrying on another token or after the
+        reset when GitHub answers that the quota is gone.
+        """
+        resource = self.resource(url)
+        while True:
+            token = self.acquire(resource)
+            request_headers = dict(headers)
+            if token is not None:
+                request_headers['Authorization'] = f'token {token}'
+            response = send(request_headers)
+            self.update(token, resource, response.headers)
+            exhausted = (response.headers.get('x-ratelimit-remaining') == '0'
+                         or 'retry-after' in response.headers)
+            if response.status_code in (403, 429) and exhausted:
+                continue
+            return response
+
+    async def asend(self, url, headers, send):
+        """:meth:`send` for a coroutine ``send``; waiting for quota happens off the event loop."""
+        resource = self.resource(url)
+        while True:
+            token = await asyncio.to_thread(self.acquire, resource)
+            request_headers = dict(headers)
+            if token is not None:
+                request_headers['Authorization'] = f'token {token}'
+            response = await send(request_headers)
+            self.update(token, resource, response.headers)
+            exhausted = (response.headers.get('x-ratelimit-remaining') == '0'
+                         or 'retry-after' in response.headers)
+            if response.status_code in (403, 429) and exhausted:
+                continue
+            return response
+
+    def pace(self, resource='core'):
+        """Spread the quota left across all tokens over the time until it resets once it runs low."""
+        now = time.time()
+        with self._condition:
+            known = [self._state[(token, resource)] for token in self.tokens if (token, resource) in self._state]
+            if len(known) < len(self.tokens):
+                return 0
+            remaining = sum(token_remaining for token_remaining, reset in known if reset > now)
+            if remaining > self.pace_threshold:
+                return 0
+            until_reset = max(min(reset for _, reset in known) - now, 0)
+        delay = min(until_reset / max(remaining, 1), self.max_pace)
+        time.sleep(delay)
+        with self._condition:
+            self._record_wait(delay)
+        return delay
+
+    def stats(self):
+        now = time.time()
+        with self._condition:
+            return {
+                'waits': self.waits,
+                'wait_seconds': self.wait_seconds,
+                'rejections': self.rejections,
+                'remaining': {
+                    f'{index}:{resource}': remaining
+                    for (token, resource), (remaining, reset) in self._state.items()
+                    for index in [self.tokens.index(token)]
+                    if reset > now
+                },
+            }
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> RateLimitScheduler:
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = RateLimitScheduler(
+                tokens=settings.GITHUB_API_TOKENS,
+                max_wait=settings.GITHUB_RATE_LIMIT_MAX_WAIT,
+                pace_threshold=settings.GITHUB_RATE_LIMIT_THRESHOLD,
+                max_pace=settings.GITHUB_MAX_BACKOFF,
+            )
+        return _scheduler
@@ -0,0 +1,245 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlparse
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_HEADERS = ('x-ratelimit-limit', 'x-ratelimit-remaining', 'x-ratelimit-reset',
+                      'x-ratelimit-used', 'x-ratelimit-resource')
+
+
+class CachedResponse:
+    # mimic github.Requester.RequestsResponse
+    def __init__(self, status, headers, body):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def getheaders(self):
+        return self.headers.items()
+
+    def read(self):
+        return self.body
+
+
+class ResponseCache:
+    """
+    File backed cache of GitHub GET responses.
+
+    Entries are kept for a per endpoint TTL and revalidated with ``If-None-Match`` /
+    ``If-Modified-Since`` afterwards; GitHub does not count 304 responses against the rate
+    limit. The directory is kept under ``max_bytes`` by evicting the least recently used
+    entries, recency being tracked through file modification times.
+    """
+
+    def __init__(self, directory, max_bytes, ttls, default_ttl):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.ttls = ttls
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.evictions = 0
+        self._size = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(verb, url, accept=None):
+        # the media type asked for changes the body, e.g. raw file contents instead of JSON
+        return hashlib.sha256(f'{verb} {url} {accept or ""}'.encode('utf-8')).hexdigest()
+
+    def ttl(self, url):
+        for segment in urlparse(url).path.strip('/').split('/'):
+            if segment in self.ttls:
+                return self.ttls[segment]
+        return self.default_ttl
+
+    def _path(self, key):
+        return self.directory / f'{key}.json'
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, encoding='utf-8') as file:
+                entry = json.load(file)
+        except (OSError, ValueError):
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry
+
+    def is_fresh(self, entry):
+        return time.time() - entry['stored_at'] < self.ttl(entry['url'])
+
+    def set(self, key, url, status, headers, body):
+        headers = {name.lower(): value for name, value in headers.items()}
+        entry = {
+            'url': url,
+            'status': status,
+            'headers': {name: value for name, value in headers.items() if name not in RATE_LIMIT_HEADERS},
+            'body': body,
+            'etag': headers.get('etag'),
+            'last_modified': headers.get('last-modified'),
+            'stored_at': time.time(),
+        }
+        data = json.dumps(entry).encode('utf-8')
+        with self._lock:
+            # sized before the entry is written, which would count it twice otherwise
+            size = self._current_size()
+            replaced = self._write(self._path(key), data)
+            self._size = size + len(data) - replaced
+            if self._size > self.max_bytes:
+                self._evict()
+        return entry
+
+    def refresh(self, key, entry):
+        entry['stored_at'] = time.time()
+        data = json.dumps(entry).encode('utf-8')
+        with self._lock:
+            replaced = self._write(self._path(key), data)
+            if self._size is not None:
+                self._size += len(data) - replaced
+
+    def _write(self, path, data):
+        """Replace ``path`` with ``data`` atomically, so readers never see a partial entry; returns the replaced size."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        temporary_path = path.with_suffix(f'.{threading.get_ident()}.tmp')
+        temporary_path.write_bytes(data)
+        try:
+            replaced = path.stat().st_size
+        except OSError:
+            replaced = 0
+        os.replace(temporary_path, path)
+        return replaced
+
+    def prepare(self, verb, url, headers):
+        """
+        Look a GET up before sending it.
+
+        Returns the cache key, the stored entry, the response to answer with if the entry is still
+        fresh, and the request headers, made conditional when there is an entry to revalidate.
+        """
+        accept = next((value for name, value in headers.items() if name.lower() == 'accept'), None)
+        key = self.key(verb, url, accept)
+        entry = self.get(key)
+        if entry is not None and self.is_fresh(entry):
+            self._count('hits')
+            logger.debug('GitHub cache hit: %s', url)
+            return key, entry, CachedResponse(entry['status'], entry['headers'], entry['body']), headers
+        if entry is not None:
+            headers = dict(headers)
+            if entry['etag']:
+                headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                headers['If-Modified-Since'] = entry['last_modified']
+        return key, entry, None, headers
+
+    def complete(self, key, url, entry, response):
+        """Store the ``response`` to a prepared GET and return what to answer with."""
+        if entry is not None and response.status_code == 304:
+            self._count('revalidations')
+            logger.debug('GitHub cache revalidated: %s', url)
+            self.refresh(key, entry)
+            return CachedResponse(entry['status'], {**entry['headers'], **response.headers}, entry['body'])
+        self._count('misses')
+        logger.debug('GitHub cache miss: %s', url)
+        if response.status_code == 200:
+            self.set(key, url, response.status_code, response.headers, response.text)
+        return response
+
+    def fetch(self, verb, url, headers, send):
+        """
+        Answer a GET from the cache, revalidating stale entries, or fall back to ``send``.
+
+        ``send`` takes the request headers and returns a ``requests.Response``; the return value
+        is either that response or a :class:`CachedResponse`.
+        """
+        key, entry, cached_response, headers = self.prepare(verb, url, headers)
+        if cached_response is not None:
+            return cached_response
+        return self.complete(key, url, entry, send(headers))
+
+    async def afetch(self, verb, url, headers, send):
+        """
+        :meth:`fetch` for a coroutine ``send`` returning an ``httpx.Response``.
+
+        Reading and writing entries touches the disk, so it runs in worker threads off the event loop.
+        """
+        key, entry, cached_response, headers = await sync_to_async(self.prepare, thread_sensitive=False)(
+            verb, url, headers
+        )
+        if cached_response is not None:
+            return cached_response
+        response = await send(headers)
+        return await sync_to_async(self.complete, thread_sensitive=False)(key, url, entry, response)
+
+    def clear(self):
+        with self._lock:
+            for path in self.directory.glob('*.json'):
+                path.unlink(missing_ok=True)
+            self._size = 0
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'revalidations': self.revalidations,
+            'evictions': self.evictions,
+            'saved_requests': self.hits + self.revalidations,
+            'size_bytes': self._size or 0,
+        }
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _current_size(self):
+        if self._size is None:
+            self._size = sum(path.stat().st_size for path in self.directory.glob('*.json'))
+        return self._size
+
+    def _evict(self):
+        entries = []
+        for path in self.directory.glob('*.json'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        size = sum(entry_size for _, entry_size, _ in entries)
+        target = self.max_bytes * 0.9
+        for _, entry_size, path in entries:
+            if size <= target:
+                break
+            path.unlink(missing_ok=True)
+            size -= entry_size
+            self.evictions += 1
+        self._size = size
+
+
+_response_cache = None
+
+
+def get_response_cache():
+    global _response_cache
+    if _response_cache is None and settings.GITHUB_CACHE_ENABLED:
+        _response_cache = ResponseCache(
+            directory=settings.GITHUB_CACHE_DIR,
+            max_bytes=settings.GITHUB_CACHE_MAX_BYTES,
+            ttls=settings.GITHUB_CACHE_TTLS,
+            default_ttl=settings.GITHUB_CACHE_DEFAULT_TTL,
+        )
+    return _response_cache
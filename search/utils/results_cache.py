@@ -0,0 +1,158 @@
+import asyncio
+import logging
+import threading
+import time
+import weakref
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import text
+
+
+logger = logging.getLogger(__name__)
+
+
+class ResultsCache:
+    """
+    Materialized search result pages kept in a Django cache, keyed by ``(by, query slug, page)``.
+
+    Concurrent misses for the same key are collapsed into one upstream fetch: threads of a process
+    wait on the first one's future, and other processes wait for the ``<key>:lock`` entry the
+    fetching process holds in the cache (only effective with a shared backend), then read its result.
+    TTL and eviction come from the cache backend's ``TIMEOUT`` and ``MAX_ENTRIES``.
+    """
+
+    def __init__(self, alias, lock_timeout, poll_interval=0.1):
+        self.alias = alias
+        self.lock_timeout = lock_timeout
+        self.poll_interval = poll_interval
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+        self._inflight = {}
+        # tasks belong to the event loop they were created on, so every loop dedupes its own fetches
+        self._async_inflight = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    @staticmethod
+    def key(by, query, page):
+        return f'search:results:{by}:{text.slugify(query)}:{page}'
+
+    def get_or_fetch(self, key, fetch):
+        value = self.cache.get(key)
+        if value is not None:
+            self._count('hits')
+            logger.debug('Search results cache hit: %s', key)
+            return value
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+        if not leader:
+            self._count('shared')
+            return future.result()
+        try:
+            value = self._fetch_once(key, fetch)
+        except BaseException as exception:
+            future.set_exception(exception)
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    def _fetch_once(self, key, fetch):
+        cache = self.cache
+        lock_key = f'{key}:lock'
+        deadline = time.monotonic() + self.lock_timeout
+        locked = cache.add(lock_key, 1, self.lock_timeout)
+        while not locked and time.monotonic() < deadline:
+            time.sleep(self.poll_interval)
+            value = cache.get(key)
+            if value is not None:
+                self._count('shared')
+                return value
+            locked = cache.add(lock_key, 1, self.lock_timeout)
+        self._count('misses')
+        logger.debug('Search results cache miss: %s', key)
+        try:
+            value = fetch()
+            cache.set(key, value)
+            return value
+        finally:
+            if locked:
+                cache.delete(lock_key)
+
+    async def aget_or_fetch(self, key, fetch):
+        """:meth:`get_or_fetch` for a coroutine function ``fetch``, deduplicated per event loop."""
+        value = await self.cache.aget(key)
+        if value is not None:
+            self._count('hits')
+            logger.debug('Search results cache hit: %s', key)
+            return value
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            inflight = self._async_inflight.setdefault(loop, {})
+        task = inflight.get(key)
+        if task is not None:
+            self._count('shared')
+            return await asyncio.shield(task)
+        task = asyncio.ensure_future(self._afetch_once(key, fetch))
+        inflight[key] = task
+        task.add_done_callback(lambda _: inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _afetch_once(self, key, fetch):
+        cache = self.cache
+        lock_key = f'{key}:lock'
+        deadline = time.monotonic() + self.lock_timeout
+        locked = await cache.aadd(lock_key, 1, self.lock_timeout)
+        while not locked and time.monotonic() < deadline:
+            await asyncio.sleep(self.poll_interval)
+            value = await cache.aget(key)
+            if value is not None:
+                self._count('shared')
+                return value
+            locked = await cache.aadd(lock_key, 1, self.lock_timeout)
+        self._count('misses')
+        logger.debug('Search results cache miss: %s', key)
+        try:
+            value = await fetch()
+            await cache.aset(key, value)
+            return value
+        finally:
+            if locked:
+                await cache.adelete(lock_key)
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'shared': self.shared,
+        }
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+
+_results_cache = None
+
+
+def get_results_cache() -> ResultsCache:
+    global _results_cache
+    if _results_cache is None:
+        _results_cache = ResultsCache(
+            alias=settings.SEARCH_RESULTS_CACHE,
+            lock_timeout=settings.SEARCH_RESULTS_LOCK_TIMEOUT,
+        )
+    return _results_cache
@@ -0,0 +1,91 @@
+import math
+import re
+import time
+import zlib
+from typing import Iterable, List
+
+import numpy as np
+
+# Candidate feature vectors: hashed skill terms followed by a few numeric features.
+TERM_BUCKETS = 256
+FORKS = TERM_BUCKETS
+LATEST_CREATED = TERM_BUCKETS + 1
+HIREABLE = TERM_BUCKETS + 2
+VECTOR_SIZE = TERM_BUCKETS + 3
+
+SKILL_WEIGHT = 0.6
+FORKS_WEIGHT = 0.15
+RECENCY_WEIGHT = 0.15
+HIREABLE_WEIGHT = 0.1
+# Days after which the recency of a user's newest repository has decayed to 1/e.
+RECENCY_DAYS = 365
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+_token_pattern = re.compile(r'[a-z0-9+#]+')
+
+
+def tokenize(value) -> List[str]:
+    return _token_pattern.findall(value.lower()) if value else []
+
+
+def term_bucket(term: str) -> int:
+    return zlib.crc32(term.encode('utf-8')) % TERM_BUCKETS
+
+
+def feature_vector(repositories: Iterable, bio=None, hireable=False) -> List[float]:
+    """
+    Build the feature vector of a user from ``(description, languages, topics, forks_count, created_at)`` rows.
+
+    Every term bucket holds ``log(1 + n)`` for the number of repositories (and the bio) mentioning
+    one of its terms, so that a user with many repositories on a skill ranks higher without a single
+    prolific account drowning out everyone else.
+    """
+    mentions = [0] * TERM_BUCKETS
+    forks = 0
+    latest_created = 0.0
+    documents = [set(tokenize(bio))]
+    for description, languages, topics, forks_count, created_at in repositories:
+        terms = set(tokenize(description))
+        for name in [*(languages or []), *(topics or [])]:
+            terms.update(tokenize(name))
+        documents.append(terms)
+        forks += forks_count or 0
+        if created_at is not None:
+            latest_created = max(latest_created, created_at.timestamp() / SECONDS_PER_DAY)
+    for terms in documents:
+        for bucket in {term_bucket(term) for term in terms}:
+            mentions[bucket] += 1
+    vector = [math.log1p(count) for count in mentions]
+    vector.extend([math.log1p(forks), latest_created, 1.0 if hireable else 0.0])
+    return vector
+
+
+def skill_weights(skills: Iterable[str]) -> np.ndarray:
+    """Spread a weight of one per skill over the buckets of its terms."""
+    weights = np.zeros(TERM_BUCKETS)
+    for skill in skills:
+        terms = tokenize(skill)
+        for term in terms:
+            weights[term_bucket(term)] += 1 / len(terms)
+    return weights
+
+
+def score(vectors: np.ndarray, skills: Iterable[str], now=None) -> np.ndarray:
+    """Score every row of ``vectors`` against ``skills``; each component is scaled to [0, 1] before weighting."""
+    if not len(vectors):
+        return np.zeros(0)
+    today = (now if now is not None else time.time()) / SECONDS_PER_DAY
+    skill_scores = vectors[:, :TERM_BUCKETS] @ skill_weights(skills)
+    forks = vectors[:, FORKS]
+    latest_created = vectors[:, LATEST_CREATED]
+    recency = np.where(latest_created > 0, np.exp(-np.clip(today - latest_created, 0, None) / RECENCY_DAYS), 0)
+    return (SKILL_WEIGHT * skill_scores / max(skill_scores.max(), 1e-9)
+            + FORKS_WEIGHT * forks / max(forks.max(), 1e-9)
+            + RECENCY_WEIGHT * recency
+            + HIREABLE_WEIGHT * vectors[:, HIREABLE])
+
+
+def rank(vectors: np.ndarray, skills: Iterable[str], now=None) -> np.ndarray:
+    """Return the row indexes of ``vectors`` from the best to the worst candidate; ties keep their order."""
+    return np.argsort(-score(vectors, skills, now=now), kind='stable')
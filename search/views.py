@@ -1,11 +1,28 @@
-from collections import Counter
-from django.http import HttpResponse
+import ipaddress
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import Http404, HttpResponse
 from django.shortcuts import redirect
 from django.template import loader
 from django.urls import reverse
-from .models import GitHubUser, GitHubRepository, Search
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from .async_crawl import acrawl_user, asearch_page
+from .crawl import crawl_user, search_page
+from .jobs import ensure_job, schedule_user_refresh, search_page_target
+from .models import CrawlJob, GitHubUser, Search
 from .forms import SearchForm
-import math
+from .utils import metrics as request_metrics
+from .utils.page_cache import get_profile_page_cache
+from .utils.ratelimit import get_scheduler
+from .utils.response_cache import get_response_cache
+from .utils.results_cache import get_results_cache
+from github.GithubException import RateLimitExceededException
+
+
+LOCAL_SEARCH = Search.SearchCriteria.LOCAL.label.lower()
 
 
 def index(request):
@@ -21,53 +38,245 @@ def index(request):
     return HttpResponse(html_template.render(context, request))
 
 
-def results(request, by, query, page):
+def crawl_pending(request, job):
+    context = {
+        'job': job,
+    }
+    html_template = loader.get_template('search/pending.html')
+    return HttpResponse(html_template.render(context, request), status=202)
+
+
+def local_results(query, page, filters):
+    paginated_list, _ = Search(query=query, by=LOCAL_SEARCH).search(query, LOCAL_SEARCH, **filters)
+    page_count = paginated_list.page_count
+    facets = GitHubUser.local_facets(paginated_list.queryset)
+    return paginated_list.get_page(page - 1), page_count, facets
+
+
+def results_filters(request):
+    try:
+        radius_km = float(request.GET['km'])
+    except (KeyError, ValueError):
+        radius_km = None
+    return {
+        'language': request.GET.get('language'),
+        'license_': request.GET.get('license'),
+        'near': request.GET.get('near'),
+        'radius_km': radius_km,
+    }
+
+
+def background_results(job):
+    page_count = job.result['page_count']
+    users = GitHubUser.objects.in_bulk(job.result['logins'], field_name='login')
+    return [users[login] for login in job.result['logins'] if login in users], page_count
+
+
+def page_exists(page, page_count):
+    return page <= max(page_count, 1)
+
+
+def render_results(request, by, query, page, results_page, page_count, facets=None):
     def reverse_url_kwargs(page_number):
         return {
             'by': by,
             'query': query,
             'page': page_number,
         }
-    search = Search(query=query, by=by)
-    paginated_list, return_type = search.search(query, by)
-    page_count = math.ceil(paginated_list.totalCount / 30)
-    if page > page_count:
-        url = reverse("search:results", kwargs=reverse_url_kwargs(1))
-        return redirect(url)
-    results_page = paginated_list.get_page(page - 1)
-    if return_type == GitHubRepository:
-        results_page = list(set(repo.owner for repo in results_page))
+
+    def results_url(page_number):
+        url = reverse("search:results", kwargs=reverse_url_kwargs(page_number))
+        return f'{url}?{request.GET.urlencode()}' if request.GET else url
+
+    if not page_exists(page, page_count):
+        return redirect(results_url(1))
     user_page_urls = [reverse('search:user', kwargs=dict(login=user.login)) for user in results_page]
     pagination = {
-        page_number: reverse("search:results", kwargs=reverse_url_kwargs(page_number)) if (page_number != page) else None
+        page_number: results_url(page_number) if (page_number != page) else None
         for page_number in range(max(page - 2, 1), min(page + 3, page_count))
     }
     context = {
         'results': zip(results_page, user_page_urls),
-        'pagination_dict': pagination
+        'pagination_dict': pagination,
+        'facets': facets,
+        'fallback': 'fallback' in request.GET,
+        'near': by == LOCAL_SEARCH and request.GET.get('near'),
     }
     html_template = loader.get_template('search/results.html')
     return HttpResponse(html_template.render(context, request))
 
 
-def user_details(request, login):
-    github_user = Search().get_user(login)
-    paginated_repos = github_user.get_repos()
-    page_count = math.ceil(paginated_repos.totalCount / 30)
-    github_repos_list = []
-    languages = Counter()
-    for page in range(page_count):
-        for repo in paginated_repos.get_page(page):
-            languages.update(repo.get_languages())
-            github_repos_list.append(repo)
-    languages = sorted(languages.keys(), key=languages.get, reverse=True)
-    user = GitHubUser.save_named_user(github_user, languages)
-    for repo in github_repos_list:
-        GitHubRepository.save_repository(repo, user)
+def results(request, by, query, page):
+    started = time.monotonic()
+    facets = None
+    if by == LOCAL_SEARCH:
+        results_page, page_count, facets = local_results(query, page, results_filters(request))
+    elif settings.SEARCH_BACKGROUND_CRAWL:
+        job = ensure_job(CrawlJob.Kind.SEARCH_PAGE, search_page_target(by, query, page))
+        if job.status != CrawlJob.Status.DONE:
+            return crawl_pending(request, job)
+        results_page, page_count = background_results(job)
+    else:
+        try:
+            results_page, page_count = search_page(by, query, page)
+        except RateLimitExceededException:
+            url = reverse("search:results", kwargs=dict(by=LOCAL_SEARCH, query=query, page=1))
+            return redirect(f'{url}?fallback=1')
+    # pages past the last are redirected to the first, which is logged when it is served
+    if page_exists(page, page_count):
+        Search.log(by, query, page, len(results_page), page_count, time.monotonic() - started)
+    return render_results(request, by, query, page, results_page, page_count, facets)
+
+
+async def aresults(request, by, query, page):
+    started = time.monotonic()
+    facets = None
+    if by == LOCAL_SEARCH:
+        results_page, page_count, facets = await sync_to_async(local_results)(query, page, results_filters(request))
+    elif settings.SEARCH_BACKGROUND_CRAWL:
+        job = await sync_to_async(ensure_job)(CrawlJob.Kind.SEARCH_PAGE, search_page_target(by, query, page))
+        if job.status != CrawlJob.Status.DONE:
+            return crawl_pending(request, job)
+        results_page, page_count = await sync_to_async(background_results)(job)
+    else:
+        try:
+            results_page, page_count = await asearch_page(by, query, page)
+        except RateLimitExceededException:
+            url = reverse("search:results", kwargs=dict(by=LOCAL_SEARCH, query=query, page=1))
+            return redirect(f'{url}?fallback=1')
+    if page_exists(page, page_count):
+        await sync_to_async(Search.log)(by, query, page, len(results_page), page_count, time.monotonic() - started)
+    return render_results(request, by, query, page, results_page, page_count, facets)
+
+
+def set_validators(response, user):
+    page_cache = get_profile_page_cache()
+    etag, last_modified = page_cache.etag(user), page_cache.last_modified(user)
+    if etag is not None:
+        response.headers['ETag'] = quote_etag(etag)
+        response.headers['Last-Modified'] = http_date(last_modified)
+        # browsers keep the page but revalidate it on every visit
+        patch_cache_control(response, no_cache=True)
+    return response
+
+
+def cached_user(request, user):
+    """
+    Answer from what is already rendered for the current version of ``user``: a 304 if the browser's
+    copy is current, else the cached page. Returns None if the page has to be rendered.
+    """
+    page_cache = get_profile_page_cache()
+    etag = page_cache.etag(user)
+    if etag is None:
+        return None
+    response = get_conditional_response(request, etag=quote_etag(etag), last_modified=page_cache.last_modified(user))
+    if response is None:
+        html = page_cache.get(user)
+        if html is None:
+            return None
+        response = HttpResponse(html)
+    return set_validators(response, user)
+
+
+def render_user(request, user, languages, github_repos_list):
+    page_cache = get_profile_page_cache()
     context = {
-        'github_user': github_user,
+        'github_user': user,
         'github_user_languages': languages,
-        'github_repos_list': github_repos_list,
+        'github_repo_cards': page_cache.render_cards(github_repos_list),
     }
     html_template = loader.get_template('search/user.html')
-    return HttpResponse(html_template.render(context, request))
+    # rendered without the request: the page is the same for every visitor and cached for all of them
+    html = html_template.render(context)
+    page_cache.set(user, html)
+    return set_validators(HttpResponse(html), user)
+
+
+def user_details(request, login):
+    user = GitHubUser.objects.filter(login__iexact=login).first()
+    if user is None or user.fetched_at is None:
+        if settings.SEARCH_BACKGROUND_CRAWL:
+            job = ensure_job(CrawlJob.Kind.USER, login)
+            if job.status != CrawlJob.Status.DONE:
+                return crawl_pending(request, job)
+            user = GitHubUser.objects.get(login=job.result['login'])
+        else:
+            user = crawl_user(login)
+    elif user.is_stale:
+        schedule_user_refresh(user.login)
+    response = cached_user(request, user)
+    if response is not None:
+        return response
+    github_repos_list = list(user.githubrepository_set.select_related('owner').order_by('name'))
+    return render_user(request, user, user.ranked_languages, github_repos_list)
+
+
+async def auser_details(request, login):
+    user = await GitHubUser.objects.filter(login__iexact=login).afirst()
+    if user is None or user.fetched_at is None:
+        if settings.SEARCH_BACKGROUND_CRAWL:
+            job = await sync_to_async(ensure_job)(CrawlJob.Kind.USER, login)
+            if job.status != CrawlJob.Status.DONE:
+                return crawl_pending(request, job)
+            user = await GitHubUser.objects.aget(login=job.result['login'])
+        else:
+            user = await acrawl_user(login)
+    elif user.is_stale:
+        await sync_to_async(schedule_user_refresh)(user.login)
+    # the page cache may be a database or file backend
+    response = await sync_to_async(cached_user)(request, user)
+    if response is not None:
+        return response
+    languages = [
+        language async for language in
+        user.user_languages.order_by('rank').values_list('language__name', flat=True)
+    ]
+    github_repos_list = [
+        repository async for repository in
+        user.githubrepository_set.select_related('owner').order_by('name')
+    ]
+    return await sync_to_async(render_user)(request, user, languages, github_repos_list)
+
+
+def metrics_allowed(request):
+    if request.user.is_active and request.user.is_staff:
+        return True
+    try:
+        address = ipaddress.ip_address(request.META.get('REMOTE_ADDR', ''))
+    except ValueError:
+        return False
+    return any(address in ipaddress.ip_network(network, strict=False) for network in settings.METRICS_ALLOWED_IPS)
+
+
+def metrics(request):
+    """Request totals and the GitHub client's cache and quota state in the Prometheus text format."""
+    if not metrics_allowed(request):
+        raise Http404
+    samples = list(request_metrics.registry.samples())
+    response_cache = get_response_cache()
+    if response_cache is not None:
+        samples.extend(
+            (f'github_response_cache_{name}', 'gauge', f'GitHub response cache {name.replace("_", " ")}.',
+             [({}, value)])
+            for name, value in response_cache.stats().items()
+        )
+    samples.extend(
+        (f'search_results_cache_{name}', 'gauge', f'Search results cache {name}.', [({}, value)])
+        for name, value in get_results_cache().stats().items()
+    )
+    samples.extend(
+        (f'profile_page_cache_{name}', 'gauge', f'Profile page cache {name.replace("_", " ")}.', [({}, value)])
+        for name, value in get_profile_page_cache().stats().items()
+    )
+    scheduler_stats = get_scheduler().stats()
+    samples.extend([
+        ('github_scheduler_waits', 'gauge', 'Calls held back for rate limits.', [({}, scheduler_stats['waits'])]),
+        ('github_scheduler_wait_seconds', 'gauge', 'Time calls were held back for rate limits.',
+         [({}, scheduler_stats['wait_seconds'])]),
+        ('github_scheduler_rejections', 'gauge', 'Calls failed because every token was exhausted.',
+         [({}, scheduler_stats['rejections'])]),
+        ('github_token_remaining', 'gauge', 'Calls left per token and resource.',
+         [(dict(zip(['token', 'resource'], key.split(':'))), remaining)
+          for key, remaining in scheduler_stats['remaining'].items()]),
+    ])
+    return HttpResponse(request_metrics.render_prometheus(samples), content_type='text/plain; version=0.0.4')
@@ -37,11 +37,13 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'home',
     'search',
 ]
 
 MIDDLEWARE = [
+    'search.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -55,7 +57,8 @@ ROOT_URLCONF = 'talentscout.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # Django's backend, timing template rendering for the request metrics
+        'BACKEND': 'search.utils.metrics.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -92,6 +95,40 @@ DATABASES = {
     }
 }
 
+# Caches
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+# All default to process-local memory; in production point them at a backend shared by every
+# process, e.g. django.core.cache.backends.filebased.FileBasedCache or .db.DatabaseCache.
+
+LOCMEM_CACHE = 'django.core.cache.backends.locmem.LocMemCache'
+SEARCH_RESULTS_CACHE = 'search_results'
+PROFILE_PAGE_CACHE = 'profile_pages'
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', LOCMEM_CACHE),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'default'),
+    },
+    SEARCH_RESULTS_CACHE: {
+        'BACKEND': os.environ.get('SEARCH_RESULTS_CACHE_BACKEND', LOCMEM_CACHE),
+        'LOCATION': os.environ.get('SEARCH_RESULTS_CACHE_LOCATION', 'search-results'),
+        'TIMEOUT': int(os.environ.get('SEARCH_RESULTS_CACHE_TTL', 5 * 60)),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.environ.get('SEARCH_RESULTS_CACHE_MAX_ENTRIES', 5000)),
+        },
+    },
+    # Rendered profile pages and repository cards; entries are versioned, the TTL only bounds their size
+    PROFILE_PAGE_CACHE: {
+        'BACKEND': os.environ.get('PROFILE_PAGE_CACHE_BACKEND', LOCMEM_CACHE),
+        'LOCATION': os.environ.get('PROFILE_PAGE_CACHE_LOCATION', 'profile-pages'),
+        'TIMEOUT': int(os.environ.get('PROFILE_PAGE_CACHE_TTL', 24 * 60 * 60)),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.environ.get('PROFILE_PAGE_CACHE_MAX_ENTRIES', 20000)),
+        },
+    },
+}
+# Seconds a process waits for another one fetching the same search page before fetching it itself.
+SEARCH_RESULTS_LOCK_TIMEOUT = 30
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -127,6 +164,106 @@ USE_TZ = True
 
 
 GITHUB_API_TOKEN = os.environ.get('GITHUB_API_TOKEN')
+# Comma-separated tokens; every call goes through the one with the most remaining quota
+# for its resource (core, search or graphql). When all of them are exhausted, calls wait
+# for the earliest reset, for up to GITHUB_RATE_LIMIT_MAX_WAIT seconds.
+GITHUB_API_TOKENS = [
+    token for token in os.environ.get('GITHUB_API_TOKENS', GITHUB_API_TOKEN or '').split(',') if token
+]
+GITHUB_RATE_LIMIT_MAX_WAIT = float(os.environ.get('GITHUB_RATE_LIMIT_MAX_WAIT', 60))
+GITHUB_API_BASE_URL = os.environ.get('GITHUB_API_BASE_URL', 'https://api.github.com')
+# 'rest' crawls users through PyGithub, one request per repository; 'graphql' fetches a
+# profile with its repositories, languages and licenses a hundred repositories at a time.
+GITHUB_BACKEND = os.environ.get('GITHUB_BACKEND', 'rest')
+GITHUB_GRAPHQL_URL = os.environ.get('GITHUB_GRAPHQL_URL', 'https://api.github.com/graphql')
+GITHUB_GRAPHQL_LANGUAGE_COUNT = 20
+
+# Concurrent GitHub fetches: worker count, and the remaining-quota level (summed over
+# tokens) at which workers start spacing out their calls (waiting at most
+# GITHUB_MAX_BACKOFF seconds).
+GITHUB_MAX_WORKERS = int(os.environ.get('GITHUB_MAX_WORKERS', 8))
+GITHUB_RATE_LIMIT_THRESHOLD = int(os.environ.get('GITHUB_RATE_LIMIT_THRESHOLD', 100))
+GITHUB_MAX_BACKOFF = float(os.environ.get('GITHUB_MAX_BACKOFF', 5))
+# Keep-alive connections kept open per host by the shared HTTP session.
+GITHUB_POOL_SIZE = int(os.environ.get('GITHUB_POOL_SIZE', GITHUB_MAX_WORKERS))
+# PyGithub serializes calls 0.25s apart by default, which defeats concurrent fetching.
+GITHUB_SECONDS_BETWEEN_REQUESTS = float(os.environ.get('GITHUB_SECONDS_BETWEEN_REQUESTS', 0)) or None
+
+# Profiles crawled more recently than this many seconds are served from the database;
+# older ones are served as they are while a refresh runs in the background.
+GITHUB_USER_MAX_AGE = int(os.environ.get('GITHUB_USER_MAX_AGE', 24 * 60 * 60))
+
+# When enabled, views enqueue crawl jobs for `manage.py crawl_worker` and poll for them
+# instead of calling GitHub inside the request. Finished jobs are reused for
+# CRAWL_JOB_RESULT_MAX_AGE seconds.
+SEARCH_BACKGROUND_CRAWL = str(os.environ.get('SEARCH_BACKGROUND_CRAWL')) == "1"
+CRAWL_JOB_RESULT_MAX_AGE = int(os.environ.get('CRAWL_JOB_RESULT_MAX_AGE', 10 * 60))
+# Workers renew the lease of their running jobs a few times per CRAWL_JOB_LEASE seconds; jobs
+# whose lease ran out, because their worker died, are requeued.
+CRAWL_JOB_LEASE = int(os.environ.get('CRAWL_JOB_LEASE', 60))
+
+# Serve the results and user pages with the async views; only worthwhile under ASGI.
+SEARCH_ASYNC_VIEWS = str(os.environ.get('SEARCH_ASYNC_VIEWS')) == "1"
+
+# Result pages of combined (profession) searches fetched ahead in the background.
+SEARCH_PREFETCH_PAGES = int(os.environ.get('SEARCH_PREFETCH_PAGES', 1))
+
+# Finished enumerations (manage.py enumerate_search) serve their search for ENUMERATION_MAX_AGE seconds.
+ENUMERATION_MAX_AGE = int(os.environ.get('ENUMERATION_MAX_AGE', 7 * 24 * 60 * 60))
+
+# Profession searches rank the owners of RANKING_CANDIDATE_PAGES result pages at a time, as far
+# into the search as the page served needs, and keep the ranking for RANKING_CACHE_TTL seconds.
+RANKING_CANDIDATE_PAGES = int(os.environ.get('RANKING_CANDIDATE_PAGES', 4))
+RANKING_CACHE_TTL = int(os.environ.get('RANKING_CACHE_TTL', 10 * 60))
+
+# manage.py prewarm runs within PREWARM_WINDOW (local time, may span midnight), spends at most
+# PREWARM_API_BUDGET GitHub calls per run and keeps the result pages it warms for PREWARM_RESULTS_TTL seconds.
+# It refuses to run unless SEARCH_RESULTS_CACHE and PROFILE_PAGE_CACHE use a backend shared with the web processes.
+PREWARM_WINDOW = os.environ.get('PREWARM_WINDOW', '02:00-06:00')
+PREWARM_API_BUDGET = int(os.environ.get('PREWARM_API_BUDGET', 1000))
+PREWARM_RESULTS_TTL = int(os.environ.get('PREWARM_RESULTS_TTL', 12 * 60 * 60))
+
+# Unfiltered admin changelists of tables estimated to hold more rows than this show the planner's
+# estimate instead of counting them.
+ADMIN_ESTIMATED_COUNT_THRESHOLD = int(os.environ.get('ADMIN_ESTIMATED_COUNT_THRESHOLD', 100_000))
+
+# On-disk cache of GitHub GET responses. Entries are served without a request for the
+# TTL of their endpoint (keyed by URL path segment), then revalidated with their ETag.
+GITHUB_CACHE_ENABLED = str(os.environ.get('GITHUB_CACHE_ENABLED', '1')) == "1"
+GITHUB_CACHE_DIR = os.environ.get('GITHUB_CACHE_DIR', BASE_DIR / '.cache' / 'github')
+GITHUB_CACHE_MAX_BYTES = int(os.environ.get('GITHUB_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+GITHUB_CACHE_DEFAULT_TTL = 300
+GITHUB_CACHE_TTLS = {
+    'search': 60,
+    'users': 60 * 60,
+    'repos': 60 * 60,
+}
+
+# /metrics answers staff users and the addresses or networks in METRICS_ALLOWED_IPS (comma-separated,
+# e.g. the Prometheus server's); it is a 404 for everyone else. Behind a proxy, REMOTE_ADDR is the proxy's.
+METRICS_ALLOWED_IPS = [
+    network for network in os.environ.get('METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',') if network
+]
+
+# Logging
+# https://docs.djangoproject.com/en/3.2/topics/logging/
+# search.metrics logs one JSON line per request with what it cost.
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'search': {
+            'handlers': ['console'],
+            'level': os.environ.get('SEARCH_LOG_LEVEL', 'INFO'),
+        },
+    },
+}
 
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/3.2/howto/static-files/
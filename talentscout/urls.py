@@ -15,9 +15,11 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
+from search.views import metrics
 
 urlpatterns = [
     path('', include('home.urls')),
     path('admin/', admin.site.urls),
     path('search/', include('search.urls')),
+    path('metrics', metrics, name='metrics'),
 ]